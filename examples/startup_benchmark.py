@@ -0,0 +1,47 @@
+"""Startup time of the passeu command line: module import, --help and a cached solve, in fresh interpreters."""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPOSITORY = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+INPUT_FILE = os.path.join(REPOSITORY, 'passeu', 'tests', 'interface', 'input_data.xls')
+IMPORT_SCRIPT = ('import time; start = time.perf_counter(); import {module}; '
+                 'print(time.perf_counter() - start)')
+
+
+def time_import(module, repeats):
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT.format(module=module)], cwd=REPOSITORY,
+                                check=True, capture_output=True, text=True).stdout
+        times.append(float(output))
+    return statistics.median(times)
+
+
+def time_command(args, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=REPOSITORY, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(repeats=5):
+    print(f'Median of {repeats} runs')
+    for module in ('passeu.main', 'passeu.utils.datastructures'):
+        print(f'  import {module:30s}: {time_import(module, repeats) * 1000:8.1f} ms')
+    print(f'  {"python -m passeu.main --help":37s}: {time_command(["-m", "passeu.main", "--help"], repeats) * 1000:8.1f} ms')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        args = ['-m', 'passeu.main', '--input', INPUT_FILE, '--cache_dir', cache_dir, '--params',
+                'max_time_in_seconds:1']
+        # The first solve fills the cache
+        time_command(args, 1)
+        print(f'  {"cached solve":37s}: {time_command(args, repeats) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
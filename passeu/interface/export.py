@@ -0,0 +1,125 @@
+import csv
+import json
+
+# Exporters of a solved roster. They stream the solution arrays of a passeu.utils.solution.RosterSolution employee by
+# employee, so nothing but the current row is held in memory on top of the arrays.
+
+PENALTY_HEADER = ['rule', 'group', 'employee', 'day', 'week', 'shift', 'level', 'previous_shift', 'value', 'coefficient',
+                  'penalty']
+HOURS_HEADER = ['employee_id', 'name', 'hours', 'contract_weekly_hours']
+
+
+def schedule_header(shop_data):
+    header = ['employee_id', 'name', 'level']
+    for d in range(shop_data.num_days):
+        header.extend([f'day{d}_shift', f'day{d}_hours'])
+    return header
+
+
+def schedule_row(shop_data, employee_id, employee, shifts, hours):
+    row = [employee_id, employee.name, employee.level]
+    for shift, day_hours in zip(shifts, hours):
+        row.extend([shop_data.shifts[shift], day_hours])
+    return row
+
+
+def hours_row(employee_id, employee, hours):
+    return [employee_id, employee.name, sum(hours), employee.contract_weekly_hours]
+
+
+def write_csv(output_prefix, solution):
+    """
+    Writes the roster to ``<output_prefix>_schedule.csv``, ``<output_prefix>_hours.csv`` and
+    ``<output_prefix>_penalties.csv``
+
+    Args:
+        output_prefix (str): Path prefix of the output files
+        solution (passeu.utils.solution.RosterSolution): Solved roster
+
+    Returns:
+        list(str): Paths of the files written
+    """
+    shop_data = solution.roster_model.shop_data
+    paths = [f'{output_prefix}_schedule.csv', f'{output_prefix}_hours.csv', f'{output_prefix}_penalties.csv']
+
+    with open(paths[0], 'w', newline='') as schedule_file, open(paths[1], 'w', newline='') as hours_file:
+        schedule_writer = csv.writer(schedule_file)
+        hours_writer = csv.writer(hours_file)
+        schedule_writer.writerow(schedule_header(shop_data))
+        hours_writer.writerow(HOURS_HEADER)
+        for e, employee, shifts, hours in solution.employee_rows():
+            schedule_writer.writerow(schedule_row(shop_data, e, employee, shifts, hours))
+            hours_writer.writerow(hours_row(e, employee, hours))
+
+    with open(paths[2], 'w', newline='') as penalties_file:
+        penalties_writer = csv.DictWriter(penalties_file, PENALTY_HEADER)
+        penalties_writer.writeheader()
+        for record in solution.penalty_rows():
+            penalties_writer.writerow(record)
+
+    return paths
+
+
+def write_jsonl(output_file, solution):
+    """
+    Writes the roster as json lines: one ``employee`` record per employee, one ``penalty`` record per non zero
+    objective term and a final ``summary`` record
+
+    Args:
+        output_file (str): Path to the output file
+        solution (passeu.utils.solution.RosterSolution): Solved roster
+    """
+    shop_data = solution.roster_model.shop_data
+    with open(output_file, 'w') as f:
+        for e, employee, shifts, hours in solution.employee_rows():
+            record = {'type': 'employee',
+                      'employee_id': e,
+                      'name': employee.name,
+                      'level': employee.level,
+                      'shifts': [shop_data.shifts[shift] for shift in shifts],
+                      'hours': hours,
+                      'total_hours': sum(hours),
+                      'contract_weekly_hours': employee.contract_weekly_hours}
+            f.write(json.dumps(record) + '\n')
+
+        for record in solution.penalty_rows():
+            record['type'] = 'penalty'
+            f.write(json.dumps(record) + '\n')
+
+        f.write(json.dumps({'type': 'summary',
+                            'status': solution.status_name,
+                            'objective': solution.objective_value}) + '\n')
+
+
+def write_excel(output_file, solution):
+    """
+    Writes the roster to an Excel workbook with ``Schedule``, ``Hours`` and ``Penalties`` sheets.
+
+    Requires ``openpyxl``, whose write-only mode streams rows to disk.
+
+    Args:
+        output_file (str): Path to the output .xlsx file
+        solution (passeu.utils.solution.RosterSolution): Solved roster
+    """
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('openpyxl is required to write Excel workbooks')
+
+    shop_data = solution.roster_model.shop_data
+    workbook = openpyxl.Workbook(write_only=True)
+    schedule_sheet = workbook.create_sheet('Schedule')
+    hours_sheet = workbook.create_sheet('Hours')
+    penalties_sheet = workbook.create_sheet('Penalties')
+
+    schedule_sheet.append(schedule_header(shop_data))
+    hours_sheet.append(HOURS_HEADER)
+    for e, employee, shifts, hours in solution.employee_rows():
+        schedule_sheet.append(schedule_row(shop_data, e, employee, shifts, hours))
+        hours_sheet.append(hours_row(e, employee, hours))
+
+    penalties_sheet.append(PENALTY_HEADER)
+    for record in solution.penalty_rows():
+        penalties_sheet.append([record.get(column) for column in PENALTY_HEADER])
+
+    workbook.save(output_file)
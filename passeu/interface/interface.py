@@ -1,21 +1,67 @@
-import pandas as pd
+# pandas is imported when a file is read, so that importing passeu does not pay for it
+
+# Sheets of an input file, the first three required
+SHEETS = ('Employees', 'Requests', 'ShopDemands', 'Availability', 'Roles', 'RoleDemands', 'DepartmentDemands')
+
+
+def read_sheets(input_file_xls):
+    """
+    Every sheet of an input file, parsed at once. The ``create_*`` functions accept the sheets in place of the file,
+    which is then only parsed once
+
+    Returns:
+        dict: {sheet name: pd.DataFrame}
+    """
+    import pandas as pd
+    return pd.read_excel(input_file_xls, sheet_name=None, header=0)
+
+
+def read_sheet(input_file_xls, sheet_name, optional=False):
+    """
+    A sheet of an input file, or of the sheets read with ``read_sheets``
+
+    Returns:
+        pd.DataFrame: Sheet, ``None`` if it is optional and missing
+    """
+    import pandas as pd
+    if isinstance(input_file_xls, dict):
+        if optional and sheet_name not in input_file_xls:
+            return None
+        return input_file_xls[sheet_name]
+    if optional:
+        xls = pd.ExcelFile(input_file_xls)
+        if sheet_name not in xls.sheet_names:
+            return None
+        return pd.read_excel(xls, sheet_name=sheet_name, header=0)
+    return pd.read_excel(input_file_xls, sheet_name=sheet_name, header=0)
+
+
+def read_rows(df, columns, integers=()):
+    """
+    Rows of a sheet as tuples of plain Python values of ``columns``, read a column at a time. The ``integers``
+    columns are cast to int
+    """
+    return list(zip(*[(df[column].astype(int) if column in integers else df[column]).tolist()
+                      for column in columns]))
 
 
 def create_employee_data(input_file_xls):
     """
 
     Args:
-        input_file_xls (str): Path to excel file containing input data
+        input_file_xls (str): Path to excel file containing input data, or its sheets, see ``read_sheets``
 
     Returns:
         tuple: list(dict): list of {name:Name, contract_weekly_hours:Hours} and lookup dictionary employee_name:employee_id
     """
-    df = pd.read_excel(input_file_xls, sheet_name='Employees', header=0)
+    df = read_sheet(input_file_xls, 'Employees')
     employees = []
     employee_lookup = {}
 
     for index, row in df.iterrows():
         employee = {'name': row['Name'], 'contract_weekly_hours': int(row['Hours'])}
+        if 'Department' in df.columns:
+            employee['department'] = int(row['Department'])
         employees.append(employee)
         employee_lookup[row['Name']] = index
 
@@ -23,16 +69,12 @@ def create_employee_data(input_file_xls):
 
 
 def create_request_list(input_file_xls):
-    df = pd.read_excel(input_file_xls, sheet_name='Requests', header=0)
-    requests = []
-    for index, row in df.iterrows():
-        requests.append((row['Name'], row['Shift'], int(row['Day']), int(row['Weight'])))
-
-    return requests
+    df = read_sheet(input_file_xls, 'Requests')
+    return read_rows(df, ('Name', 'Shift', 'Day', 'Weight'), integers=('Day', 'Weight'))
 
 
 def create_shop_headcount_demand(input_file_xls):
-    df = pd.read_excel(input_file_xls, sheet_name='ShopDemands', header=0)
+    df = read_sheet(input_file_xls, 'ShopDemands')
     headcount_demand = []
     order = []
     for index, row in df.iterrows():
@@ -40,3 +82,65 @@ def create_shop_headcount_demand(input_file_xls):
         headcount_demand.append((int(row['Morning']), int(row['Afternoon']), int(row['Close'])))
 
     return [headcount_demand[i_order] for i_order in order]
+
+
+def create_unavailability_list(input_file_xls):
+    """
+    Shifts employees are unavailable for, from the optional ``Availability`` sheet with ``Name``, ``Shift`` and ``Day``
+    columns. A ``Shift`` of ``All`` marks the employee as unavailable for every working shift of the day.
+
+    Returns:
+        list(tuple): (name, shift, day) entries, empty if there is no ``Availability`` sheet
+    """
+    df = read_sheet(input_file_xls, 'Availability', optional=True)
+    if df is None:
+        return []
+    return read_rows(df, ('Name', 'Shift', 'Day'), integers=('Day',))
+
+
+def create_role_list(input_file_xls):
+    """
+    Roles held by the employees, from the optional ``Roles`` sheet with ``Name`` and ``Role`` columns, one row per
+    employee and role
+
+    Returns:
+        list(tuple): (name, role) entries, empty if there is no ``Roles`` sheet
+    """
+    df = read_sheet(input_file_xls, 'Roles', optional=True)
+    if df is None:
+        return []
+    return read_rows(df, ('Name', 'Role'))
+
+
+def create_role_demand_list(input_file_xls):
+    """
+    Role cover demands, from the optional ``RoleDemands`` sheet with ``Role``, ``Shift``, ``Day`` (day of the week)
+    and ``Demand`` columns
+
+    Returns:
+        list(tuple): (role, shift, day, demand) entries, empty if there is no ``RoleDemands`` sheet
+    """
+    df = read_sheet(input_file_xls, 'RoleDemands', optional=True)
+    if df is None:
+        return []
+    return read_rows(df, ('Role', 'Shift', 'Day', 'Demand'), integers=('Day', 'Demand'))
+
+
+def create_department_headcount_demand(input_file_xls):
+    """
+    Headcount demands of each department, from the optional ``DepartmentDemands`` sheet with the columns of the
+    ``ShopDemands`` sheet and a ``Department`` one
+
+    Returns:
+        dict: {department: list of (morning, afternoon, close) demands for each day}, empty if there is no
+          ``DepartmentDemands`` sheet
+    """
+    df = read_sheet(input_file_xls, 'DepartmentDemands', optional=True)
+    if df is None:
+        return {}
+    demands = {}
+    for department, rows in df.groupby('Department'):
+        rows = rows.sort_values('Day')
+        demands[int(department)] = [(int(row['Morning']), int(row['Afternoon']), int(row['Close']))
+                                    for index, row in rows.iterrows()]
+    return demands
@@ -0,0 +1,120 @@
+import io
+import json
+import zipfile
+import numpy as np
+from ortools.sat.python import cp_model
+from passeu.utils.datastructures import Employee, EmployeeData, ShopData
+from passeu.utils.solution import SolutionModel, objective_arrays, objective_from_arrays
+
+# A saved roster model is a zip archive holding the binary CpModelProto, the shop data needed to report the
+# solution, and the passeu layout: proto indices of the work/work_hours variables and of the objective terms, with
+# the objective coefficients and attribution.
+FORMAT_VERSION = 1
+MODEL_ENTRY = 'model.pb'
+METADATA_ENTRY = 'metadata.json'
+LAYOUT_ENTRY = 'layout.npz'
+
+
+class ReplayModel(SolutionModel):
+    """
+    Roster model loaded from a saved archive, ready to be solved without the input data or a rebuild.
+
+    It provides the attributes of ``passeu.utils.roster_model.RosterModel`` needed to extract and report a solution
+    (``model``, ``shop_data``, ``objective`` and ``layout()``). The objective terms only hold coefficients and
+    attribution, not the variables themselves.
+    """
+
+    def __init__(self, model, shop_data, objective_terms, variable_layout):
+        super().__init__(shop_data, objective_terms)
+        self.model = model
+        self.variable_layout = variable_layout
+
+    def layout(self):
+        return self.variable_layout
+
+
+def write_model(output_file, roster_model):
+    """
+    Saves a built roster model
+
+    Args:
+        output_file (str): Path to the output archive
+        roster_model (passeu.utils.roster_model.RosterModel): Built roster model
+    """
+    shop_data = roster_model.shop_data
+    employee_data = shop_data.employee_data
+    metadata = {
+        'version': FORMAT_VERSION,
+        'employees': [{'name': employee.name,
+                       'contract_weekly_hours': employee.contract_weekly_hours,
+                       'level': employee.level,
+                       'maximum_overtime': employee.maximum_overtime,
+                       'department': employee.department} for employee in employee_data.employees],
+        'requests': [list(request) for request in employee_data.requests],
+        'unavailable_shifts': [list(shift) for shift in employee_data.unavailable_shifts],
+        'roles': employee_data.roles,
+        'qualifications': [list(qualification) for qualification in employee_data.qualifications],
+        'role_cover_demands': [list(demand) for demand in shop_data.role_cover_demands],
+        'weekly_cover_demands': [list(demand) for demand in shop_data.weekly_cover_demands],
+        'department_cover_demands': [[department, [list(demand) for demand in demands]]
+                                     for department, demands in shop_data.department_cover_demands.items()],
+        'fixed_assignments': [list(assignment) for assignment in shop_data.fixed_assignments],
+    }
+
+    arrays = dict(roster_model.layout())
+    arrays.update(objective_arrays(roster_model.objective))
+    layout_buffer = io.BytesIO()
+    np.savez(layout_buffer, **arrays)
+
+    with zipfile.ZipFile(output_file, 'w') as archive:
+        archive.writestr(MODEL_ENTRY, roster_model.model.Proto().SerializeToString())
+        archive.writestr(METADATA_ENTRY, json.dumps(metadata))
+        archive.writestr(LAYOUT_ENTRY, layout_buffer.getvalue())
+
+
+def load_model(input_file):
+    """
+    Loads a roster model saved with ``write_model``
+
+    Args:
+        input_file (str): Path to the archive
+
+    Returns:
+        ReplayModel: Loaded model
+    """
+    with zipfile.ZipFile(input_file, 'r') as archive:
+        model_bytes = archive.read(MODEL_ENTRY)
+        metadata = json.loads(archive.read(METADATA_ENTRY))
+        arrays = np.load(io.BytesIO(archive.read(LAYOUT_ENTRY)))
+        arrays = {key: arrays[key] for key in arrays.files}
+
+    if metadata['version'] != FORMAT_VERSION:
+        raise ValueError(f'Unsupported model archive version {metadata["version"]}, expected {FORMAT_VERSION}')
+
+    model = cp_model.CpModel()
+    model.Proto().ParseFromString(model_bytes)
+
+    shop_data = ShopData()
+    shop_data.weekly_cover_demands = [tuple(demand) for demand in metadata['weekly_cover_demands']]
+    shop_data.department_cover_demands = {department: [tuple(demand) for demand in demands]
+                                          for department, demands in metadata.get('department_cover_demands', [])}
+    shop_data.fixed_assignments = [tuple(assignment) for assignment in metadata['fixed_assignments']]
+    shop_data.role_cover_demands = [tuple(demand) for demand in metadata.get('role_cover_demands', [])]
+    employee_data = EmployeeData()
+    employee_data.employees = [Employee(entry['name'], entry['contract_weekly_hours'], level=entry['level'],
+                                        maximum_overtime=entry['maximum_overtime'],
+                                        department=entry.get('department', 0))
+                               for entry in metadata['employees']]
+    employee_data.levels = {employee.level for employee in employee_data.employees}
+    employee_data.requests = [tuple(request) for request in metadata['requests']]
+    employee_data.unavailable_shifts = [tuple(shift) for shift in metadata.get('unavailable_shifts', [])]
+    employee_data.roles = metadata.get('roles', [])
+    employee_data.qualifications = [tuple(qualification) for qualification in metadata.get('qualifications', [])]
+    shop_data.employee_data = employee_data
+
+    objective_terms = objective_from_arrays(arrays)
+    # The remaining arrays are the variable layout
+    for name in objective_arrays(objective_terms):
+        del arrays[name]
+
+    return ReplayModel(model, shop_data, objective_terms, arrays)
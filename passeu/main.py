@@ -1,265 +1,695 @@
-from ortools.sat.python import cp_model
+import glob
+import os
 import sys
-import passeu.utils.constraints as constraints
 from absl import app
 from absl import flags
-from google.protobuf import text_format
-import passeu.utils.datastructures as datastructures
+
+# ortools, protobuf, numpy and pandas take most of the start up time. They are imported where they are first needed
+# so that flag parsing and --help do not pay for them, and cached solves do not load the CP-SAT solver.
 
 FLAGS = flags.FLAGS
 
+flags.DEFINE_list('input', None,
+                  'Shop input files, directories holding them or glob patterns. Each shop is solved in turn.')
+flags.DEFINE_string('output_dir', '',
+                    'Directory to write the roster of each shop to, named after its input file, in the formats of '
+                    '--output_formats.')
+flags.DEFINE_list('output_formats', ['csv'],
+                  'Roster formats written to --output_dir: csv, jsonl and/or xlsx.')
+flags.DEFINE_string('rules_file', '',
+                    'Json file of scheduling rules overriding the default ones, see '
+                    'passeu.utils.rules.DEFAULT_RULES.')
 flags.DEFINE_string('output_proto', '',
-                    'Output file to write the cp_model proto to.')
-flags.DEFINE_string('params', 'max_time_in_seconds:10.0',
-                    'Sat solver parameters.')
-
-# DATA STRUCTURES
-
-def solve_shift_scheduling(params, output_proto, input_xls_file):
-
-    shop_data = datastructures.ShopData(input_xls_file)
-    shop_data.load_weekly_headcount_demand()
-    shop_data.load_employees()
-
-    num_employees = shop_data.employee_data.num_employees
-    requests = shop_data.employee_data.requests
-    employees = shop_data.employee_data.employees
-
-    import pdb; pdb.set_trace()
-
-    # START CONSTRAINTS
-    # Shift constraints on continuous sequence :
-    #     (shift, hard_min, soft_min, min_penalty,
-    #             soft_max, hard_max, max_penalty)
-    shift_constraints = [
-        # One or two consecutive days of rest (shift 0), this is a hard constraint.
-        (0, 1, 1, 0, 3, 3, 0),  # changing to 3
-        # betweem 2 and 3 consecutive days of night shifts, 1 and 4 are
-        # possible but penalized.
-        (3, 1, 2, 20, 3, 4, 5),
-    ]
-
-    # Weekly hour constraint: each employee hard min of contract hours, soft max contract hours
-    # hard max overtime
-    # (hard_min, soft_min, min_penalty, soft_max, hard_max, max_penalty)
-    weekly_hour_constraints = []
-
-    # Weekly sum constraints on shifts days:
-    #     (shift, hard_min, soft_min, min_penalty,
-    #             soft_max, hard_max, max_penalty)
-    weekly_sum_constraints = [
-        # Constraints on rests per week.
-        (0, 2, 2, 7, 2, 3, 4),
-        # At least 1 night shift per week (penalized). At most 4 (hard).
-        (3, 0, 1, 3, 4, 4, 0),
-    ]
-
-    # Penalized transitions:
-    #     (previous_shift, next_shift, penalty (0 means forbidden))
-    penalized_transitions = [
-        # Afternoon to night has a penalty of 4.
-        (2, 3, 4),
-        # Night to morning is forbidden.
-        (3, 1, 0),
-    ]
-
-    # daily demands for work shifts (morning, afternoon, night) for each day
-    # of the week starting on Monday.  TODO: change to hours?? -> Add a total worked hours soft constraint too
-    weekly_cover_demands = shop_data.weekly_cover_demands
-
-    # Penalty for exceeding the cover constraint per shift type.
-    excess_cover_penalties = (2, 2, 5)
-
-    # END CONSTRAINTS
-
-    model = cp_model.CpModel()
-
-    # now need to add as variable to Employee class whether they work or not
-    work = {}
-    for e in range(num_employees):
-        for s in range(shop_data.num_shifts):
-            for d in range(shop_data.num_days):
-                work[e, s, d] = model.NewBoolVar(f'work{e}_{s}_{d}')
-
-    # shift duration
-    work_hours = {}
-    domain = cp_model.Domain.FromValues([0, 6, 8])
-    for e in range(num_employees):
-        for d in range(shop_data.num_days):
-            work_hours[e, d] = model.NewIntVarFromDomain(domain=domain,
-                                                         name=f'workhours{e}_{d}')
-
-    # Linear terms of the objective in a minimization context.
-    obj_int_vars = []
-    obj_int_coeffs = []
-    obj_bool_vars = []
-    obj_bool_coeffs = []
-
-    # Exactly one shift per day.
-    for e in range(num_employees):
-        for d in range(shop_data.num_days):
-            model.Add(sum(work[e, s, d] for s in range(shop_data.num_shifts)) == 1)
-
-    # Fixed assignments. Hard constraint
-    for e, s, d in shop_data.fixed_assignments:
-        model.Add(work[e, s, d] == 1)
-
-    # Employee requests
-    for e, s, d, w in requests:
-        obj_bool_vars.append(work[e, s, d])
-        obj_bool_coeffs.append(w)
-
-    # Shift constraints
-    for ct in shift_constraints:
-        shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost = ct
-        for e in range(num_employees):
-            works = [work[e, shift, d] for d in range(shop_data.num_days)]
-            variables, coeffs = constraints.add_soft_sequence_constraint(
-                model, works, hard_min, soft_min, min_cost, soft_max, hard_max,
-                max_cost,
-                'shift_constraint(employee %i, shift %i)' % (e, shift))
-            obj_bool_vars.extend(variables)
-            obj_bool_coeffs.extend(coeffs)
-
-    # Link off shifts and 0 hours
-    for e in range(num_employees):
-        for d in range(shop_data.num_days):
-            model.Add(work_hours[(e, d)] == 0).OnlyEnforceIf(work[(e, 0, d)])
-
-            # This one should not be needed once we add the summation of weekly hours constraints
-            model.Add(work_hours[(e, d)] > 0).OnlyEnforceIf(work[(e, 0, d)].Not())
-
-    # Max weekly working hours - currently a hard constraint to meet contract hours
-    # TODO: add soft_max (contract hours) and hard_max (overtime)
-    for e in range(num_employees):
-        model.Add(sum([work_hours[(e, d)] for d in range(shop_data.num_days)]) == employees[e].contract_weekly_hours)
-
-    # Weekly sum constraints
-    for ct in weekly_sum_constraints:
-        shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost = ct
-        for e in range(num_employees):
-            for w in range(shop_data.num_weeks):
-                works = [work[e, shift, d + w * 7] for d in range(7)]
-                variables, coeffs = constraints.add_soft_sum_constraint(
-                    model, works, hard_min, soft_min, min_cost, soft_max,
-                    hard_max, max_cost,
-                    'weekly_sum_constraint(employee %i, shift %i, week %i)' %
-                    (e, shift, w))
-                obj_int_vars.extend(variables)
-                obj_int_coeffs.extend(coeffs)
-
-    # Penalized transitions
-    for previous_shift, next_shift, cost in penalized_transitions:
-        for e in range(num_employees):
-            for d in range(shop_data.num_days - 1):
-                transition = [
-                    work[e, previous_shift, d].Not(), work[e, next_shift,
-                                                           d + 1].Not()
-                ]
-                if cost == 0:
-                    model.AddBoolOr(transition)
-                else:
-                    trans_var = model.NewBoolVar(
-                        'transition (employee=%i, day=%i)' % (e, d))
-                    transition.append(trans_var)
-                    model.AddBoolOr(transition)
-                    obj_bool_vars.append(trans_var)
-                    obj_bool_coeffs.append(cost)
-
-
-    # Cover constraints
-    for s in range(1, shop_data.num_shifts):
-        for w in range(shop_data.num_weeks):
-            for d in range(7):
-                works = [work[e, s, w * 7 + d] for e in range(num_employees)]
-                # Ignore Off shift.
-                min_demand = weekly_cover_demands[d][s - 1]
-                worked = model.NewIntVar(min_demand, num_employees, '')
-                model.Add(worked == sum(works))
-                over_penalty = excess_cover_penalties[s - 1]
-                if over_penalty > 0:
-                    name = 'excess_demand(shift=%i, week=%i, day=%i)' % (s, w,
-                                                                         d)
-                    excess = model.NewIntVar(0, num_employees - min_demand,
-                                             name)
-                    model.Add(excess == worked - min_demand)
-                    obj_int_vars.append(excess)
-                    obj_int_coeffs.append(over_penalty)
-
-
-    # Objective
-    model.Minimize(
-        sum(obj_bool_vars[i] * obj_bool_coeffs[i]
-            for i in range(len(obj_bool_vars))) +
-        sum(obj_int_vars[i] * obj_int_coeffs[i]
-            for i in range(len(obj_int_vars))))
+                    'Output file to write the model to, as a binary archive that --input_model replays or as a '
+                    'text proto if the file name ends in .pbtxt or .txt.')
+flags.DEFINE_string('input_model', '',
+                    'Model archive written with --output_proto to solve instead of the input data.')
+flags.DEFINE_string('output_csv', '',
+                    'Output path prefix to write the roster to as csv files.')
+flags.DEFINE_string('output_jsonl', '',
+                    'Output file to write the roster to as json lines.')
+flags.DEFINE_string('output_xlsx', '',
+                    'Output file to write the roster to as an Excel workbook.')
+flags.DEFINE_bool('debug_names', False,
+                  'Name the model variables, e.g. to read the proto written with --output_proto.')
+flags.DEFINE_string('cache_dir', '',
+                    'Directory of the solve result cache. Solves matching a cached one return its roster.')
+flags.DEFINE_string('params', '',
+                    'Sat solver parameters, overriding those of the profile.')
+flags.DEFINE_bool('deterministic', False,
+                  'Solve reproducibly, e.g. to benchmark changes: fixed --random_seed, the workers of the profile '
+                  'interleaved and a --deterministic_time limit instead of the wall time one.')
+flags.DEFINE_integer('random_seed', 0,
+                     'Random seed of the solver with --deterministic.')
+flags.DEFINE_float('deterministic_time', 10.,
+                   'Deterministic time limit of each solve with --deterministic.')
+flags.DEFINE_string('profile', 'balanced',
+                    'Sat solver parameter profile: fast-feasible, balanced, prove-optimal or a tuned profile. If not '
+                    'given, each shop is solved with the tuned-<size class> profile of its size, if loaded, and '
+                    'balanced otherwise.')
+flags.DEFINE_string('profiles_file', '',
+                    'Json file of tuned solver profiles, as written by passeu.tuning.')
+flags.DEFINE_bool('lexicographic', False,
+                  'Solve for shop cover first, then for employee requests and fairness.')
+flags.DEFINE_list('stage_time_limits', None,
+                  'Time limit in seconds of each lexicographic stage.')
+flags.DEFINE_list('stage_tolerances', None,
+                  'Objective value each lexicographic stage may degrade by in the following stages, 0 by default.')
+flags.DEFINE_float('relative_gap_limit', 0.,
+                   'If positive, stop the search once the relative gap to the best bound is below this value.')
+flags.DEFINE_float('stall_time_limit', 0.,
+                   'If positive, stop the search when no improving solution is found for that many seconds.')
+flags.DEFINE_float('lns_time_limit', 0.,
+                   'If positive, solve with the roster large neighbourhood search for that many seconds.')
+flags.DEFINE_float('lns_neighbourhood_time_limit', 1.,
+                   'Time limit in seconds of each large neighbourhood search iteration.')
+flags.DEFINE_string('history_file', '',
+                    'File of the rolling fairness aggregates of past rosters. Its employees who closed or worked '
+                    'weekends more than their colleagues are penalised for doing it again.')
+flags.DEFINE_integer('history_weeks', 8,
+                     'Number of past weeks aggregated by a new --history_file.')
+flags.DEFINE_bool('publish', False,
+                  'Add the solved roster to --history_file and to --archive_dir.')
+flags.DEFINE_string('archive_dir', '',
+                    'Directory of the archive of published rosters. Without --history_file, the fairness aggregates '
+                    'of the --history_weeks weeks before --week are read from it.')
+flags.DEFINE_integer('week', 0,
+                     'Number of the first week of the roster in --archive_dir.')
+flags.DEFINE_bool('precheck', True,
+                  'Check the shop data for obvious infeasibilities before building the model, and skip the solve '
+                  'if any is found.')
+flags.DEFINE_bool('diagnose', False,
+                  'If the shop is infeasible, run a short solve with assumption literals to find the rules causing it.')
+flags.DEFINE_bool('decompose', False,
+                  'Solve the independent groups of employees, e.g. departments, as separate models in parallel.')
+flags.DEFINE_integer('decompose_workers', 0,
+                     'Number of components solved at the same time with --decompose, 0 for one per component. At '
+                     'most the number of cores, which share the num_workers of --params.')
+flags.DEFINE_integer('processes', 1,
+                     'Number of shops of a batch solved at the same time, each in its own process.')
+flags.DEFINE_bool('memory_profile', False,
+                  'Print the time, resident memory and peak memory of each phase of the model build.')
+flags.DEFINE_string('telemetry_dir', '',
+                    'Directory to write the solver telemetry to: the improving solutions, search statistics and '
+                    'model size of each shop, and their aggregate over the batch.')
+flags.DEFINE_bool('watch', False,
+                  'Keep watching the input file after the solve, and solve again each time it is saved. Only the '
+                  'changed sheets and rows are reloaded, and the previous roster hints the new solve while the '
+                  'employees are the same. Stop with Ctrl-C.')
+flags.DEFINE_float('watch_interval', 1.,
+                   'Seconds between two checks of the input file with --watch.')
+
+# Process exit code of each solver status. A run over several shops exits with the highest code of its shops
+EXIT_CODES = {
+    'OPTIMAL': 0,
+    'FEASIBLE': 0,
+    'ERROR': 1,  # the shop could not be loaded or solved
+    'UNKNOWN': 2,  # no roster found within the limits
+    'INFEASIBLE': 3,
+    'MODEL_INVALID': 4,
+}
+
+SHOP_FILE_EXTENSIONS = ('.xls', '.xlsx')
+
+
+def shop_files(inputs):
+    """
+    Shop input files given as files, directories or glob patterns. Directories are expanded to the shop files they
+    hold, in name order
+
+    Raises:
+        FileNotFoundError: If an input matches no file
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            matches = sorted(os.path.join(path, name) for name in os.listdir(path)
+                             if name.endswith(SHOP_FILE_EXTENSIONS))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path))
+        if not matches:
+            raise FileNotFoundError(f'No shop file found at {path}')
+        files.extend(matches)
+    return files
+
+
+def load_shop_data(input_xls_file):
+    """
+    Shop data of an input file, whose sheets are parsed at once
+    """
+    import passeu.utils.reload as reload
+
+    return reload.ShopReloader(input_xls_file).load()
+
+
+def solve_shift_scheduling(params, output_proto, input_xls_file, lexicographic=False, stage_time_limits=None,
+                           stage_tolerances=None, lns_time_limit=0., lns_neighbourhood_time_limit=1., relative_gap_limit=0.,
+                           stall_time_limit=0., output_csv='', output_jsonl='', output_xlsx='', debug_names=False,
+                           result_cache=None, rules=None, decompose=False, decompose_workers=0, history=None,
+                           precheck=True, diagnose=False, telemetry=None, memory_profile=False, shop_data=None,
+                           hint=None, size_params=None):
+    """
+    Builds and solves the roster model of a shop. If a ``passeu.utils.telemetry.BatchTelemetry`` is given, the solve
+    is recorded to it under the name of the input file. The shop data is read from the input file unless given, and
+    ``hint``, a (shifts, hours) roster of the same employees, hints the model. ``size_params`` maps benchmark size
+    classes to the parameters solving their shops instead of ``params``
+
+    Returns:
+        tuple: (status, roster_solution) with the solver status name and the solution, ``None`` if none was found
+    """
+    import passeu.utils.benchmark as benchmark
+    import passeu.utils.rules as roster_rules
+
+    if shop_data is None:
+        shop_data = load_shop_data(input_xls_file)
+    size = benchmark.size_class(len(shop_data.employee_data.employees))
+    if size_params and size in size_params:
+        print(f'Solving with the tuned-{size} profile')
+        params = size_params[size]
+    if rules is None:
+        rules = roster_rules.DEFAULT_RULES
+    telemetry_name = os.path.splitext(os.path.basename(input_xls_file))[0]
+
+    # Everything besides the shop data and rules that changes the solve outcome
+    solve_options = {'params': params, 'lexicographic': lexicographic, 'stage_time_limits': stage_time_limits,
+                     'stage_tolerances': stage_tolerances,
+                     'lns_time_limit': lns_time_limit, 'lns_neighbourhood_time_limit': lns_neighbourhood_time_limit,
+                     'relative_gap_limit': relative_gap_limit, 'stall_time_limit': stall_time_limit,
+                     'decompose': decompose, 'decompose_workers': decompose_workers}
+    if history is not None:
+        names = [employee.name for employee in shop_data.employee_data.employees]
+        solve_options['history'] = history.rolling(names).tolist()
+    if result_cache is not None:
+        roster_solution = result_cache.get(shop_data, rules, solve_options)
+        if roster_solution is not None:
+            report(roster_solution, roster_solution.statistics, output_csv, output_jsonl, output_xlsx)
+            if telemetry is not None:
+                telemetry.record(telemetry_name, statistics=roster_solution.statistics)
+            return roster_solution.status_name, roster_solution
+
+    # The solver is only loaded once the cache missed
+    import passeu.interface.model_io as model_io
+    import passeu.utils.decomposition as decomposition
+    import passeu.utils.diagnosis as diagnosis
+    import passeu.utils.lexicographic as lexicographic_solve
+    import passeu.utils.lns as lns
+    import passeu.utils.memory as memory
+    import passeu.utils.precheck as precheck_shop
+    import passeu.utils.roster_model as roster
+    import passeu.utils.solution as solution
+
+    if precheck:
+        issues = precheck_shop.precheck(shop_data, rules)
+        if issues:
+            print_issues(issues)
+            if telemetry is not None:
+                telemetry.record(telemetry_name, statistics={'status': 'INFEASIBLE'})
+            return 'INFEASIBLE', None
+
+    if decompose:
+        roster_solution, statistics = decomposition.solve_decomposed(shop_data, rules=rules, params=params,
+                                                                     max_workers=decompose_workers,
+                                                                     debug_names=debug_names, history=history)
+        if result_cache is not None and roster_solution is not None:
+            result_cache.put(shop_data, rules, solve_options, roster_solution)
+        report(roster_solution, statistics, output_csv, output_jsonl, output_xlsx)
+        if telemetry is not None:
+            telemetry.record(telemetry_name, statistics=statistics)
+        if diagnose and statistics['status'] == 'INFEASIBLE':
+            print_core(*diagnosis.diagnose(shop_data, rules=rules, params=params))
+        return statistics['status'], roster_solution
+
+    roster_model = roster.RosterModel(shop_data, rules=rules, debug_names=debug_names, history=history)
+    profile = memory.MemoryProfile() if memory_profile else None
+    roster_model.build(profile)
+    if profile is not None:
+        profile.report()
+
+    if result_cache is not None and hint is None:
+        hint = result_cache.hint(shop_data)
+        if hint is not None:
+            print('Hinting the model with a cached roster of the same employees')
+    if hint is not None:
+        roster_model.add_roster_hints(*hint)
+
+    model = roster_model.model
+    work = roster_model.work
+    work_hours = roster_model.work_hours
+    obj = roster_model.objective
 
     if output_proto:
         print('Writing proto to %s' % output_proto)
-        with open(output_proto, 'w') as text_file:
-            text_file.write(str(model))
+        if output_proto.endswith('.pbtxt') or output_proto.endswith('.txt'):
+            with open(output_proto, 'w') as text_file:
+                text_file.write(str(model))
+        else:
+            model_io.write_model(output_proto, roster_model)
 
     # Solve the model.
+    timeline = None
+    note = None
+    if lexicographic:
+        solver, status = lexicographic_solve.solve_lexicographic(roster_model, params=params,
+                                                                 stage_time_limits=stage_time_limits,
+                                                                 tolerances=stage_tolerances)
+        note = ('lexicographic solve: no timeline is recorded as each stage minimises a different objective, the '
+                'response is that of the last stage')
+    elif lns_time_limit > 0:
+        roster_lns = lns.RosterLNS(roster_model, params=params,
+                                   neighbourhood_time_limit=lns_neighbourhood_time_limit)
+        solver, status = roster_lns.solve(lns_time_limit)
+        timeline = roster_lns.timeline
+    else:
+        solver, status, timeline = solve_model(model, params, relative_gap_limit, stall_time_limit)
+
+    roster_solution = extract_solution(roster_model, solver, status)
+    if lexicographic and roster_solution is not None:
+        # The solver only holds the objective of the last stage
+        roster_solution.objective_value = roster_solution.penalty_total()
+    if result_cache is not None and roster_solution is not None:
+        result_cache.put(shop_data, rules, solve_options, roster_solution)
+    statistics = solution.solver_statistics(solver, status)
+    report(roster_solution, statistics, output_csv, output_jsonl, output_xlsx)
+    if telemetry is not None:
+        telemetry.record(telemetry_name, model=model, solver=solver, status=status, timeline=timeline, note=note)
+    if diagnose and statistics['status'] == 'INFEASIBLE':
+        print_core(*diagnosis.diagnose(shop_data, rules=rules, params=params))
+    return statistics['status'], roster_solution
+
+
+def watch_shift_scheduling(params, input_file, interval=1., result_cache=None, **options):
+    """
+    Solves a shop, then again each time its input file is saved, until interrupted. See ``solve_shift_scheduling``
+    for the arguments
+
+    Args:
+        interval (float): Seconds between two checks of the input file
+
+    Returns:
+        str: Solver status name of the last solve
+    """
+    import signal
+    import time
+    import passeu.utils.datastructures as datastructures
+    import passeu.utils.reload as reload
+
+    reloader = reload.ShopReloader(input_file)
+    reloader.load()
+    status, roster_solution = solve_shift_scheduling(params, '', input_file, result_cache=result_cache,
+                                                     shop_data=reloader.shop_data, **options)
+    print(f'Watching {input_file}, stop with Ctrl-C')
+    try:
+        while True:
+            # CP-SAT leaves its own SIGINT handler installed after a solve, which would kill the process
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            time.sleep(interval)
+            try:
+                delta = reloader.reload()
+            except datastructures.UnknownReferenceError as error:
+                # Wait for the names to be fixed
+                print(error, file=sys.stderr)
+                continue
+            if not delta:
+                continue
+            print(f'Reloaded {input_file}: {delta}')
+            hint = None
+            if roster_solution is not None and not delta.employees_changed:
+                hint = (roster_solution.shifts, roster_solution.hours)
+            status, roster_solution = solve_shift_scheduling(params, '', input_file, result_cache=result_cache,
+                                                             shop_data=reloader.shop_data, hint=hint, **options)
+    except KeyboardInterrupt:
+        pass
+    return status
+
+
+def solve_shop_process(params, input_file, cache_dir='', telemetry=False, **options):
+    """
+    Solves a shop in a worker process of a batch, see ``solve_shift_scheduling`` for the arguments. The roster is
+    handed over to the parent process in shared memory, see ``passeu.utils.handoff``
+
+    Args:
+        cache_dir (str): Directory of the result cache, none if empty
+        telemetry (bool): Record the solve telemetry
+
+    Returns:
+        tuple: (status, descriptor, telemetry_runs) with the solver status name, the descriptor of the shared roster,
+          ``None`` if none was found, and the runs recorded by the telemetry, if any
+    """
+    import passeu.utils.cache as cache
+    import passeu.utils.handoff as handoff
+    import passeu.utils.telemetry as solve_telemetry
+
+    result_cache = cache.ResultCache(cache_dir) if cache_dir else None
+    batch_telemetry = solve_telemetry.BatchTelemetry() if telemetry else None
+    status, roster_solution = solve_shift_scheduling(params, '', input_file, result_cache=result_cache,
+                                                     telemetry=batch_telemetry, **options)
+    descriptor = handoff.share(roster_solution) if roster_solution is not None else None
+    return status, descriptor, batch_telemetry.runs if telemetry else []
+
+
+def replay_shift_scheduling(params, input_model, relative_gap_limit=0., stall_time_limit=0., output_csv='',
+                            output_jsonl='', output_xlsx=''):
+    """
+    Solves a roster model saved with --output_proto, without reading the input data or rebuilding the model
+
+    Returns:
+        str: Solver status name
+    """
+    import passeu.interface.model_io as model_io
+    import passeu.utils.solution as solution
+
+    replay_model = model_io.load_model(input_model)
+    solver, status, _ = solve_model(replay_model.model, params, relative_gap_limit, stall_time_limit)
+    statistics = solution.solver_statistics(solver, status)
+    report(extract_solution(replay_model, solver, status), statistics, output_csv, output_jsonl, output_xlsx)
+    return statistics['status']
+
+
+def solve_model(model, params, relative_gap_limit=0., stall_time_limit=0.):
+    """
+    Solves a model, printing each improving solution
+
+    Returns:
+        tuple: (solver, status, timeline) with the (wall_time, objective, best_bound) of each improving solution
+    """
+    from ortools.sat.python import cp_model
+    from google.protobuf import text_format
+    import passeu.utils.callbacks as callbacks
+
     solver = cp_model.CpSolver()
     if params:
         text_format.Parse(params, solver.parameters)
-    solution_printer = cp_model.ObjectiveSolutionPrinter()
-    status = solver.Solve(model, solution_printer)
+    if relative_gap_limit > 0 or stall_time_limit > 0:
+        solution_printer = callbacks.EarlyStopping(relative_gap_limit=relative_gap_limit,
+                                                   stall_time_limit=stall_time_limit)
+        solution_printer.start_timer()
+        status = solver.Solve(model, solution_printer)
+        solution_printer.stop_timer()
+    else:
+        solution_printer = callbacks.ObjectiveTimeline()
+        status = solver.Solve(model, solution_printer)
+    return solver, status, solution_printer.timeline
+
+
+def extract_solution(roster_model, solver, status):
+    """
+    Solution of a solve, ``None`` if none was found
+    """
+    from ortools.sat.python import cp_model
+    import passeu.utils.solution as solution
 
-    # Print solution.
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        print()
-        header = '          '
-        for w in range(shop_data.num_weeks):
-            header += 'M T W T F S S '
-        print(header)
-        for e in range(num_employees):
-            schedule = ''
-            for d in range(shop_data.num_days):
-                for s in range(shop_data.num_shifts):
-                    # hours = solver.Value(work_hours[e, s, d])
-                    hours = solver.Value(work_hours[e, d])
-                    works = solver.BooleanValue(work[e, s, d])
-                    # print(f'Shift {s}', works, hours)
-                    if works:
-                        schedule += shop_data.shifts[s] + f'({hours})' + ' '
-            print(f'{employees[e].name} (id={e}): {schedule}')
-        print()
-        print('Total Employee hours:')
-        for e in range(num_employees):
-            employee_hours = 0
-            for d in range(shop_data.num_days):
-                for s in range(shop_data.num_shifts):
-                    if solver.BooleanValue(work[e, s, d]):
-                        employee_hours += solver.Value(work_hours[e, d])
-            print(f'{employees[e].name} (id={e}): {employee_hours} hrs (max {employees[e].contract_weekly_hours} hrs)')
-        print()
-        print('Penalties:')
-        for i, var in enumerate(obj_bool_vars):
-            if solver.BooleanValue(var):
-                penalty = obj_bool_coeffs[i]
-                if penalty > 0:
-                    print('  %s violated, penalty=%i' % (var.Name(), penalty))
-                else:
-                    print('  %s fulfilled, gain=%i' % (var.Name(), -penalty))
-
-        for i, var in enumerate(obj_int_vars):
-            if solver.Value(var) > 0:
-                print('  %s violated by %i, linear penalty=%i' %
-                      (var.Name(), solver.Value(var), obj_int_coeffs[i]))
+        return solution.RosterSolution.from_solver(roster_model, solver, status)
+    return None
+
+
+def report(roster_solution, statistics, output_csv='', output_jsonl='', output_xlsx=''):
+    import passeu.interface.export as export
+
+    # Print solution.
+    if roster_solution is not None:
+        print_solution(roster_solution)
+
+        if output_csv:
+            print('Writing roster to %s' % ', '.join(export.write_csv(output_csv, roster_solution)))
+        if output_jsonl:
+            print('Writing roster to %s' % output_jsonl)
+            export.write_jsonl(output_jsonl, roster_solution)
+        if output_xlsx:
+            print('Writing roster to %s' % output_xlsx)
+            export.write_excel(output_xlsx, roster_solution)
 
     print()
     print('Statistics')
-    print('  - status          : %s' % solver.StatusName(status))
-    print('  - conflicts       : %i' % solver.NumConflicts())
-    print('  - branches        : %i' % solver.NumBranches())
-    print('  - wall time       : %f s' % solver.WallTime())
+    print('  - status          : %s' % statistics['status'])
+    print('  - conflicts       : %i' % statistics['conflicts'])
+    print('  - branches        : %i' % statistics['branches'])
+    print('  - wall time       : %f s' % statistics['wall_time'])
+    if 'deterministic_time' in statistics:
+        print('  - deterministic   : %f' % statistics['deterministic_time'])
+    if statistics.get('components'):
+        print('  - components      : %i' % statistics['components'])
+    if statistics.get('cached'):
+        print('  - cached          : True')
+
+
+def print_issues(issues):
+    print()
+    print(f'Precheck found {len(issues)} issues, the shop is infeasible:')
+    for issue in issues:
+        print(f'  [{issue["check"]}] {issue["message"]}')
+
+
+def print_core(status, core):
+    import passeu.utils.objective as objective
+
+    print()
+    if not core:
+        print(f'Diagnosis found no infeasibility core, status {status}')
+        return
+    print('Infeasibility core, these rules cannot all hold:')
+    for record in core:
+        print(f'  {objective.describe(record)}')
+
+
+def print_solution(roster_solution):
+    import passeu.utils.objective as objective
+
+    shop_data = roster_solution.roster_model.shop_data
+    roles = shop_data.employee_data.roles
+
+    print()
+    header = '          '
+    for w in range(shop_data.num_weeks):
+        header += 'M T W T F S S '
+    print(header)
+    for e, employee, shifts, hours in roster_solution.employee_rows():
+        schedule = ''
+        for shift, day_hours, role in zip(shifts, hours, roster_solution.roles[e].tolist()):
+            schedule += shop_data.shifts[shift] + f'({day_hours})' + (f'[{roles[role]}]' if role >= 0 else '') + ' '
+        print(f'{employee.name} (id={e}): {schedule}')
+    print()
+    print('Total Employee hours:')
+    for e, employee, shifts, hours in roster_solution.employee_rows():
+        print(f'{employee.name} (id={e}): {sum(hours)} hrs (max {employee.contract_weekly_hours} hrs)')
+    print()
+    print('Penalties:')
+    for record in roster_solution.bool_penalty_rows():
+        if record['penalty'] > 0:
+            print('  %s violated, penalty=%i' % (objective.describe(record), record['penalty']))
+        else:
+            print('  %s fulfilled, gain=%i' % (objective.describe(record), -record['penalty']))
+
+    for record in roster_solution.int_penalty_rows():
+        if record['value'] > 0:
+            print('  %s violated by %i, linear penalty=%i' %
+                  (objective.describe(record), record['value'], record['coefficient']))
+    print()
+    print('Penalty per rule:')
+    for rule, penalty in roster_solution.penalty_by('rule').items():
+        print(f'  {rule}: {penalty}')
+
+
+def shop_name(input_file):
+    """
+    Name of a shop in the roster archive, its input file name without extension
+    """
+    return os.path.splitext(os.path.basename(input_file))[0]
+
+
+def output_paths(input_file):
+    """
+    Roster output paths of a shop, (output_csv, output_jsonl, output_xlsx), empty for formats not written
+    """
+    if not FLAGS.output_dir:
+        return FLAGS.output_csv, FLAGS.output_jsonl, FLAGS.output_xlsx
+
+    prefix = os.path.join(FLAGS.output_dir, shop_name(input_file))
+    return (prefix if 'csv' in FLAGS.output_formats else '',
+            prefix + '.jsonl' if 'jsonl' in FLAGS.output_formats else '',
+            prefix + '.xlsx' if 'xlsx' in FLAGS.output_formats else '')
 
 
 def main(_):
-    input_xls_file = './tests/interface/input_data.xls'
-    solve_shift_scheduling(FLAGS.params, FLAGS.output_proto, input_xls_file)
+    from concurrent.futures import ProcessPoolExecutor
+    import passeu.utils.archive as archive
+    import passeu.utils.benchmark as benchmark
+    import passeu.utils.cache as cache
+    import passeu.utils.handoff as handoff
+    import passeu.utils.history as fairness_history
+    import passeu.utils.profiles as profiles
+    import passeu.utils.rules as roster_rules
+    import passeu.utils.telemetry as solve_telemetry
+
+    if FLAGS.profiles_file:
+        profiles.load_profiles(FLAGS.profiles_file)
+    params = profiles.resolve(FLAGS.profile, FLAGS.params)
+    # Without --profile, the shops of a size class tuned by passeu.tuning are solved with its profile
+    size_params = {}
+    if not FLAGS['profile'].present:
+        size_params = {size: profiles.resolve(f'tuned-{size}', FLAGS.params) for size in benchmark.SIZE_CLASSES
+                       if f'tuned-{size}' in profiles.PROFILES}
+    if FLAGS.deterministic:
+        if FLAGS.stall_time_limit > 0 or FLAGS.lns_time_limit > 0 or FLAGS.stage_time_limits:
+            raise app.UsageError('--deterministic cannot be combined with the wall time limits --stall_time_limit, '
+                                 '--lns_time_limit or --stage_time_limits.')
+        params = profiles.deterministic(params, random_seed=FLAGS.random_seed,
+                                        deterministic_time=FLAGS.deterministic_time)
+        size_params = {size: profiles.deterministic(tuned, random_seed=FLAGS.random_seed,
+                                                    deterministic_time=FLAGS.deterministic_time)
+                       for size, tuned in size_params.items()}
+
+    if FLAGS.input_model:
+        status = replay_shift_scheduling(params, FLAGS.input_model,
+                                         relative_gap_limit=FLAGS.relative_gap_limit,
+                                         stall_time_limit=FLAGS.stall_time_limit,
+                                         output_csv=FLAGS.output_csv,
+                                         output_jsonl=FLAGS.output_jsonl,
+                                         output_xlsx=FLAGS.output_xlsx)
+        return EXIT_CODES[status]
+
+    if not FLAGS.input:
+        raise app.UsageError('Either --input or --input_model is required.')
+    unknown_formats = set(FLAGS.output_formats) - {'csv', 'jsonl', 'xlsx'}
+    if unknown_formats:
+        raise app.UsageError(f'Unknown output formats {unknown_formats}.')
+    input_files = shop_files(FLAGS.input)
+    if len(input_files) > 1 and (FLAGS.output_proto or FLAGS.output_csv or FLAGS.output_jsonl or FLAGS.output_xlsx):
+        raise app.UsageError('Use --output_dir to write the rosters of several shops.')
+    if FLAGS.decompose and (FLAGS.lexicographic or FLAGS.lns_time_limit > 0 or FLAGS.output_proto):
+        raise app.UsageError('--decompose solves one model per component, it cannot be combined with '
+                             '--lexicographic, --lns_time_limit or --output_proto.')
+    if FLAGS.processes > 1 and FLAGS.output_proto:
+        raise app.UsageError('--output_proto writes a single model, it cannot be combined with --processes.')
+    if FLAGS.watch and (len(input_files) > 1 or FLAGS.output_proto or FLAGS.publish):
+        raise app.UsageError('--watch solves a single shop, it cannot be combined with --output_proto or --publish.')
+    if FLAGS.publish and not (FLAGS.history_file or FLAGS.archive_dir):
+        raise app.UsageError('--publish requires --history_file or --archive_dir.')
+    if FLAGS.output_dir:
+        os.makedirs(FLAGS.output_dir, exist_ok=True)
+
+    rules = roster_rules.load_rules(FLAGS.rules_file) if FLAGS.rules_file else None
+    stage_time_limits = None
+    if FLAGS.stage_time_limits:
+        stage_time_limits = [float(limit) for limit in FLAGS.stage_time_limits]
+    stage_tolerances = None
+    if FLAGS.stage_tolerances:
+        stage_tolerances = [int(tolerance) for tolerance in FLAGS.stage_tolerances]
+    result_cache = cache.ResultCache(FLAGS.cache_dir) if FLAGS.cache_dir else None
+    roster_archive = archive.RosterArchive(FLAGS.archive_dir) if FLAGS.archive_dir else None
+    history = None
+    if FLAGS.history_file:
+        if os.path.exists(FLAGS.history_file):
+            history = fairness_history.FairnessHistory.load(FLAGS.history_file)
+        else:
+            history = fairness_history.FairnessHistory(num_weeks=FLAGS.history_weeks)
+    elif roster_archive is not None:
+        history = roster_archive.fairness_history(FLAGS.week - 1, num_weeks=FLAGS.history_weeks)
+    telemetry = solve_telemetry.BatchTelemetry() if FLAGS.telemetry_dir else None
+
+    options = dict(lexicographic=FLAGS.lexicographic, stage_time_limits=stage_time_limits,
+                   stage_tolerances=stage_tolerances,
+                   lns_time_limit=FLAGS.lns_time_limit,
+                   lns_neighbourhood_time_limit=FLAGS.lns_neighbourhood_time_limit,
+                   relative_gap_limit=FLAGS.relative_gap_limit,
+                   stall_time_limit=FLAGS.stall_time_limit,
+                   debug_names=FLAGS.debug_names,
+                   rules=rules,
+                   decompose=FLAGS.decompose,
+                   decompose_workers=FLAGS.decompose_workers,
+                   history=history,
+                   precheck=FLAGS.precheck,
+                   diagnose=FLAGS.diagnose,
+                   memory_profile=FLAGS.memory_profile,
+                   size_params=size_params)
+
+    if FLAGS.watch:
+        output_csv, output_jsonl, output_xlsx = output_paths(input_files[0])
+        status = watch_shift_scheduling(params, input_files[0], interval=FLAGS.watch_interval,
+                                        output_csv=output_csv, output_jsonl=output_jsonl, output_xlsx=output_xlsx,
+                                        result_cache=result_cache, **options)
+        return EXIT_CODES[status]
+
+    def failed(input_file, error):
+        if len(input_files) == 1:
+            raise error
+        # Carry on with the other shops of the batch
+        print(f'Failed to solve {input_file}: {error!r}', file=sys.stderr)
+        statuses[input_file] = 'ERROR'
+
+    statuses = {}
+    roster_solutions = []
+    shops = []  # shop name of each roster solution
+    if FLAGS.processes > 1 and len(input_files) > 1:
+        # Each shop is solved in a worker process, which hands its roster over in shared memory
+        with ProcessPoolExecutor(max_workers=FLAGS.processes) as executor:
+            futures = []
+            for input_file in input_files:
+                print(f'Solving {input_file}')
+                output_csv, output_jsonl, output_xlsx = output_paths(input_file)
+                futures.append((input_file, executor.submit(
+                    solve_shop_process, params, input_file, cache_dir=FLAGS.cache_dir,
+                    telemetry=telemetry is not None, output_csv=output_csv, output_jsonl=output_jsonl,
+                    output_xlsx=output_xlsx, **options)))
+            for input_file, future in futures:
+                try:
+                    statuses[input_file], descriptor, telemetry_runs = future.result()
+                    # The roster carries its employees, the input file is not read again
+                    roster_solution = handoff.receive(descriptor) if descriptor is not None else None
+                except Exception as error:
+                    failed(input_file, error)
+                    continue
+                if roster_solution is not None:
+                    roster_solutions.append(roster_solution)
+                    shops.append(shop_name(input_file))
+                if telemetry is not None:
+                    telemetry.runs.extend(telemetry_runs)
+    else:
+        for input_file in input_files:
+            print(f'Solving {input_file}')
+            output_csv, output_jsonl, output_xlsx = output_paths(input_file)
+            try:
+                statuses[input_file], roster_solution = solve_shift_scheduling(
+                    params, FLAGS.output_proto, input_file,
+                    output_csv=output_csv,
+                    output_jsonl=output_jsonl,
+                    output_xlsx=output_xlsx,
+                    result_cache=result_cache,
+                    telemetry=telemetry,
+                    **options)
+            except Exception as error:
+                failed(input_file, error)
+                continue
+            if roster_solution is not None:
+                roster_solutions.append(roster_solution)
+                shops.append(shop_name(input_file))
+
+    if len(input_files) > 1:
+        print()
+        print('Shops')
+        for input_file, status in statuses.items():
+            print(f'  - {input_file}: {status}')
+
+    # The rosters of a batch are published together, as the same weeks
+    if FLAGS.publish and roster_solutions and FLAGS.history_file:
+        print(f'Publishing {len(roster_solutions)} rosters to {FLAGS.history_file}')
+        history.publish(roster_solutions)
+        history.save(FLAGS.history_file)
+    if FLAGS.publish and roster_solutions and roster_archive is not None:
+        print(f'Archiving {len(roster_solutions)} rosters to {FLAGS.archive_dir} from week {FLAGS.week}')
+        for shop, roster_solution in zip(shops, roster_solutions):
+            roster_archive.append(shop, FLAGS.week, roster_solution)
+    if telemetry is not None:
+        print(f'Writing telemetry of {len(telemetry.runs)} solves to {FLAGS.telemetry_dir}')
+        telemetry.write(FLAGS.telemetry_dir)
+    return max(EXIT_CODES[status] for status in statuses.values())
+
+
+def run():
+    app.run(main)
 
 
 if __name__ == '__main__':
-    app.run(main)
+    run()
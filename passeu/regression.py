@@ -0,0 +1,70 @@
+import json
+from absl import app
+from absl import flags
+import passeu.utils.profiles as profiles
+import passeu.utils.regression as regression
+import passeu.utils.roster_model as roster
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list('size_classes', ['small'],
+                  'Benchmark shop size classes solved on top of the bundled input_data.xls.')
+flags.DEFINE_integer('num_shops', 1,
+                     'Number of benchmark shops per size class.')
+flags.DEFINE_string('profile', 'balanced',
+                    'Sat solver parameter profile, made deterministic.')
+flags.DEFINE_string('params', '',
+                    'Sat solver parameters, overriding those of the profile.')
+flags.DEFINE_integer('random_seed', 0,
+                     'Random seed of the solver.')
+flags.DEFINE_float('deterministic_time', 10.,
+                   'Deterministic time limit of each solve.')
+flags.DEFINE_string('rules_file', '',
+                    'Json file of scheduling rules overriding the default ones.')
+flags.DEFINE_integer('repeats', 1,
+                     'Number of times each shop is solved. Runs differing from the first one are reported.')
+flags.DEFINE_string('output', 'regression.json',
+                    'Output file the metrics of each shop are written to.')
+flags.DEFINE_string('baseline', '',
+                    'Metrics written by an earlier run to compare with. The run fails if any shop regressed.')
+flags.DEFINE_float('tolerance', 0.05,
+                   'Relative increase of the objective or deterministic time allowed over the baseline.')
+
+
+def main(_):
+    params = profiles.deterministic(profiles.resolve(FLAGS.profile, FLAGS.params), random_seed=FLAGS.random_seed,
+                                    deterministic_time=FLAGS.deterministic_time)
+    rules = roster.load_rules(FLAGS.rules_file) if FLAGS.rules_file else None
+    print(f'Solving with {params}')
+
+    results = {}
+    nondeterministic = []
+    for name, shop_data in regression.regression_shops(FLAGS.size_classes, FLAGS.num_shops).items():
+        runs = [regression.run(shop_data, params, rules) for _ in range(FLAGS.repeats)]
+        results[name] = runs[0]
+        if any(metrics != runs[0] for metrics in runs[1:]):
+            nondeterministic.append(name)
+        print(f'  {name}: {runs[0]["status"]}, objective {runs[0]["objective_value"]}, '
+              f'deterministic time {runs[0]["deterministic_time"]:0.3f}')
+
+    print('Writing metrics to %s' % FLAGS.output)
+    with open(FLAGS.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    failed = False
+    if nondeterministic:
+        print(f'Runs differ between repeats for {nondeterministic}')
+        failed = True
+    if FLAGS.baseline:
+        with open(FLAGS.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = regression.compare(results, baseline, FLAGS.tolerance)
+        print(f'{len(regressions)} regressions from {FLAGS.baseline}')
+        for description in regressions:
+            print(f'  {description}')
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    app.run(main)
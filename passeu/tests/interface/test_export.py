@@ -0,0 +1,76 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from ortools.sat.python import cp_model
+import passeu.interface.export as export
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+class TestExport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solver = cp_model.CpSolver()
+        cls.roster_model = roster.RosterModel(small_shop())
+        cls.solution = solve(cls.roster_model, solver=cls.solver)
+
+    def test_solution_arrays(self):
+        for e in range(7):
+            for d in range(7):
+                s = self.solution.shifts[e, d]
+                self.assertTrue(self.solver.BooleanValue(self.roster_model.work[e, s, d]))
+                self.assertEqual(self.solution.hours[e, d], self.solver.Value(self.roster_model.work_hours[e, d]))
+
+        penalty = sum(record['penalty'] for record in self.solution.penalty_rows())
+        self.assertEqual(penalty, self.solution.objective_value)
+
+    def test_penalty_aggregation(self):
+        for field in ('group', 'rule', 'employee', 'day'):
+            penalty_by_field = self.solution.penalty_by(field)
+            expected = {}
+            for record in self.solution.penalty_rows():
+                if field in record:
+                    expected[record[field]] = expected.get(record[field], 0) + record['penalty']
+            self.assertEqual(penalty_by_field, expected)
+
+        self.assertEqual(sum(self.solution.penalty_by('rule').values()), self.solution.objective_value)
+
+    def test_write_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = export.write_csv(os.path.join(directory, 'roster'), self.solution)
+            with open(paths[1]) as f:
+                rows = list(csv.DictReader(f))
+
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]['name'], 'Dakota')
+        self.assertEqual(int(rows[1]['hours']), 28)
+
+    def test_write_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, 'roster.jsonl')
+            export.write_jsonl(output_file, self.solution)
+            with open(output_file) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(sum(record['type'] == 'employee' for record in records), 7)
+        self.assertEqual(records[-1]['objective'], self.solution.objective_value)
+
+    def test_write_excel(self):
+        try:
+            import openpyxl
+        except ImportError:
+            self.skipTest('openpyxl not installed')
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, 'roster.xlsx')
+            export.write_excel(output_file, self.solution)
+            workbook = openpyxl.load_workbook(output_file)
+            self.assertEqual(workbook.sheetnames, ['Schedule', 'Hours', 'Penalties'])
+            self.assertEqual(workbook['Schedule'].max_row, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
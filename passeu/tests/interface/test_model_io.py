@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from ortools.sat.python import cp_model
+import passeu.interface.model_io as model_io
+import passeu.utils.roster_model as roster
+import passeu.utils.solution as solution
+from passeu.tests.shops import small_shop
+
+
+class TestModelIO(unittest.TestCase):
+
+    def test_write_load_model(self):
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build()
+
+        with tempfile.TemporaryDirectory() as directory:
+            model_file = os.path.join(directory, 'model.passeu')
+            model_io.write_model(model_file, roster_model)
+            replay_model = model_io.load_model(model_file)
+
+        self.assertEqual(replay_model.model.Proto(), roster_model.model.Proto())
+        self.assertEqual([employee.name for employee in replay_model.shop_data.employee_data.employees],
+                         [employee.name for employee in roster_model.shop_data.employee_data.employees])
+        self.assertEqual(replay_model.objective.int_index.columns()['rule'].tolist(),
+                         roster_model.objective.int_index.columns()['rule'].tolist())
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 10.
+        status = solver.Solve(replay_model.model)
+        roster_solution = solution.RosterSolution.from_solver(replay_model, solver, status)
+
+        self.assertEqual(roster_solution.hours[1].sum(), 28)
+        self.assertEqual(sum(roster_solution.penalty_by('rule').values()), solver.ObjectiveValue())
+
+
+if __name__ == '__main__':
+    unittest.main()
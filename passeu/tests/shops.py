@@ -0,0 +1,42 @@
+from ortools.sat.python import cp_model
+from passeu.utils.datastructures import Employee, ShopData, EmployeeData
+from passeu.utils.solution import RosterSolution
+
+
+def small_shop():
+    """
+    Small single week shop, with the same employees and demands as ``interface/input_data.xls``, used across tests
+    """
+    shop_data = ShopData()
+    shop_data.weekly_cover_demands = [(1, 1, 1)] * 7
+
+    employee_data = EmployeeData()
+    employee_data.employees = [
+        Employee('Logan', 40),
+        Employee('Dakota', 28),
+        Employee('Turco', 40),
+        Employee('Curro', 40),
+        Employee('Dass', 40, level=1),
+        Employee('Marquesa', 40, level=1),
+        Employee('Duque', 40, level=2),
+    ]
+    employee_data.levels = {0, 1, 2}
+    employee_data.requests = [(0, 0, 0, -2)]  # Logan wants monday off
+    shop_data.employee_data = employee_data
+
+    return shop_data
+
+
+def solve(roster_model, time_limit=10., solver=None):
+    """
+    Builds and solves a roster model, e.g. of ``small_shop()``, with a new solver unless one is given
+
+    Returns:
+        passeu.utils.solution.RosterSolution: Solution
+    """
+    roster_model.build()
+    if solver is None:
+        solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(roster_model.model)
+    return RosterSolution.from_solver(roster_model, solver, status)
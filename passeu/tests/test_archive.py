@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+import numpy as np
+import passeu.utils.archive as archive
+import passeu.utils.history as history
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+class TestArchive(unittest.TestCase):
+
+    def test_archive(self):
+        roster_solution = solve(roster.RosterModel(small_shop()))
+        names = [employee.name for employee in small_shop().employee_data.employees]
+        num_weeks = small_shop().num_weeks
+
+        with tempfile.TemporaryDirectory() as directory:
+            roster_archive = archive.RosterArchive(directory)
+            self.assertIsNone(roster_archive.week('shop', 10))
+            roster_archive.append('shop', 10, roster_solution)
+
+            # Reopened, every week is read back in place
+            roster_archive = archive.RosterArchive(directory)
+            self.assertEqual(roster_archive.weeks('shop'), list(range(10, 10 + num_weeks)))
+            for w in range(num_weeks):
+                week_names, shifts, hours, roles = roster_archive.week('shop', 10 + w)
+                self.assertEqual(week_names, names)
+                np.testing.assert_array_equal(shifts, roster_solution.shifts[:, w * 7:(w + 1) * 7])
+                np.testing.assert_array_equal(hours, roster_solution.hours[:, w * 7:(w + 1) * 7])
+                np.testing.assert_array_equal(roles, roster_solution.roles[:, w * 7:(w + 1) * 7])
+
+            # Fairness aggregates match those of the published rosters
+            fairness_history = history.FairnessHistory(num_weeks=num_weeks)
+            fairness_history.publish([roster_solution])
+            archived = roster_archive.fairness_history(10 + num_weeks - 1, num_weeks=num_weeks)
+            np.testing.assert_array_equal(archived.rolling(names), fairness_history.rolling(names))
+
+            # Archiving a week again supersedes it
+            roster_archive.append('shop', 10 + num_weeks - 1, roster_solution)
+            _, shifts, _, _ = roster_archive.week('shop', 10 + num_weeks - 1)
+            np.testing.assert_array_equal(shifts, roster_solution.shifts[:, :7])
+            self.assertEqual(len(roster_archive.week_rows(10 + num_weeks - 1)), len(names))
+
+
+if __name__ == '__main__':
+    unittest.main()
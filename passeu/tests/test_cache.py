@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+import passeu.interface.export as export
+import passeu.utils.cache as cache
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+class TestCache(unittest.TestCase):
+
+    params = 'max_time_in_seconds:10.0'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.solution = solve(roster.RosterModel(small_shop()))
+
+    def test_fingerprint(self):
+        shop_data = small_shop()
+        key = cache.fingerprint(shop_data, roster.DEFAULT_RULES, self.params)
+
+        self.assertEqual(key, cache.fingerprint(small_shop(), roster.DEFAULT_RULES, self.params))
+        self.assertNotEqual(key, cache.fingerprint(shop_data, roster.DEFAULT_RULES, 'max_time_in_seconds:1.0'))
+        shop_data.employee_data.requests.append((1, 0, 3, -2))
+        self.assertNotEqual(key, cache.fingerprint(shop_data, roster.DEFAULT_RULES, self.params))
+        self.assertEqual(cache.shape_key(shop_data), cache.shape_key(small_shop()))
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache.ResultCache(directory).put(small_shop(), roster.DEFAULT_RULES, self.params, self.solution)
+
+            result_cache = cache.ResultCache(directory)
+            cached = result_cache.get(small_shop(), roster.DEFAULT_RULES, self.params)
+            self.assertIsNone(result_cache.get(small_shop(), roster.DEFAULT_RULES, ''))
+
+            near_match = small_shop()
+            near_match.weekly_cover_demands = [(1, 2, 1)] * 7
+            shifts, hours = result_cache.hint(near_match)
+
+        self.assertTrue(cached.statistics['cached'])
+        self.assertEqual(cached.shifts.tolist(), self.solution.shifts.tolist())
+        self.assertEqual(cached.penalty_by('rule'), self.solution.penalty_by('rule'))
+        self.assertEqual(list(cached.penalty_rows()), list(self.solution.penalty_rows()))
+        self.assertEqual(hours.tolist(), self.solution.hours.tolist())
+
+    def test_cached_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache.ResultCache(directory).put(small_shop(), roster.DEFAULT_RULES, self.params, self.solution)
+            cached = cache.ResultCache(directory).get(small_shop(), roster.DEFAULT_RULES, self.params)
+            output_file = os.path.join(directory, 'roster.jsonl')
+            export.write_jsonl(output_file, cached)
+            with open(output_file) as f:
+                records = [json.loads(line) for line in f]
+        penalties = [record for record in records if record['type'] == 'penalty']
+        self.assertEqual([record['penalty'] for record in penalties],
+                         [record['penalty'] for record in self.solution.penalty_rows()])
+
+    def test_lru_eviction(self):
+        result_cache = cache.ResultCache(max_entries=2)
+        for params in ('a', 'b', 'c'):
+            result_cache.put(small_shop(), roster.DEFAULT_RULES, params, self.solution)
+
+        self.assertIsNone(result_cache.get(small_shop(), roster.DEFAULT_RULES, 'a'))
+        self.assertIsNotNone(result_cache.get(small_shop(), roster.DEFAULT_RULES, 'c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.benchmark as benchmark
+import passeu.utils.callbacks as callbacks
+import passeu.utils.roster_model as roster
+
+
+class SyntheticEarlyStopping(callbacks.EarlyStopping):
+    """
+    Early stopping fed with solutions of given wall time, objective and best bound instead of a solver's
+    """
+
+    def __init__(self, **kwargs):
+        callbacks.EarlyStopping.__init__(self, verbose=False, **kwargs)
+        self.solution = None
+        self.stopped = threading.Event()
+
+    def feed(self, wall_time, objective, best_bound):
+        self.solution = (wall_time, objective, best_bound)
+        self.on_solution_callback()
+
+    def WallTime(self):
+        return self.solution[0]
+
+    def ObjectiveValue(self):
+        return self.solution[1]
+
+    def BestObjectiveBound(self):
+        return self.solution[2]
+
+    def StopSearch(self):
+        self.stopped.set()
+
+
+class TestCallbacks(unittest.TestCase):
+
+    def test_relative_gap_limit(self):
+        early_stopping = SyntheticEarlyStopping(relative_gap_limit=0.5)
+        early_stopping.feed(1., 100., 10.)
+        self.assertFalse(early_stopping.stopped.is_set())
+
+        early_stopping.feed(2., 80., 50.)
+        self.assertTrue(early_stopping.stopped.is_set())
+        self.assertEqual(early_stopping.stop_reason, 'relative gap 0.3750 below limit 0.5 at 2.00 s')
+
+    def test_stall_time_limit(self):
+        early_stopping = SyntheticEarlyStopping(stall_time_limit=0.05)
+        early_stopping.start_timer()
+        early_stopping.feed(1., 100., 10.)
+        self.assertTrue(early_stopping.stopped.wait(10.))
+        early_stopping.stop_timer()
+
+        self.assertEqual(early_stopping.stop_reason, 'no improvement in 0.05 s after objective 100.0')
+
+    def test_stall_without_solution(self):
+        early_stopping = SyntheticEarlyStopping(stall_time_limit=0.05)
+        early_stopping.start_timer()
+        self.assertTrue(early_stopping.stopped.wait(10.))
+        early_stopping.stop_timer()
+
+        self.assertEqual(early_stopping.stop_reason, 'no solution in 0.05 s')
+
+    def test_stop_timer(self):
+        early_stopping = SyntheticEarlyStopping(stall_time_limit=0.05)
+        early_stopping.start_timer()
+        early_stopping.stop_timer()
+        time.sleep(0.2)
+
+        # The solve has returned, the stall timer does not fire
+        self.assertIsNone(early_stopping.stop_reason)
+        self.assertFalse(early_stopping.stopped.is_set())
+
+    def test_solve(self):
+        roster_model = roster.RosterModel(benchmark.benchmark_shop(30))
+        roster_model.build()
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 20.
+        solver.parameters.num_workers = 8
+        early_stopping = callbacks.EarlyStopping(relative_gap_limit=0.5, verbose=False)
+        solver.Solve(roster_model.model, early_stopping)
+        early_stopping.stop_timer()
+
+        # The status depends on how far the search went once stopped, only the stop reason is checked
+        self.assertIn('relative gap', early_stopping.stop_reason)
+
+
+if __name__ == '__main__':
+    unittest.main()
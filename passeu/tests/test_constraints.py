@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from ortools.sat.python import cp_model
+import passeu.utils.constraints as constraints
+
+
+class TestSoftSumConstraints(unittest.TestCase):
+
+    def roster(self, model, sums, negated=False):
+        works = []
+        for total in sums:
+            row = [model.NewBoolVar('') for _ in range(7)]
+            model.Add(sum(row) == (7 - total if negated else total))
+            works.append([var.Not() for var in row] if negated else row)
+        return works
+
+    def minimize(self, model, variables, coeffs):
+        model.Minimize(sum(coeff * var for coeff, var in zip(coeffs, variables)))
+        solver = cp_model.CpSolver()
+        status = solver.Solve(model)
+        if status != cp_model.OPTIMAL:
+            return None
+        return [solver.Value(var) * coeff for var, coeff in zip(variables, coeffs)]
+
+    def solve(self, sums, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost):
+        model = cp_model.CpModel()
+        works = self.roster(model, sums)
+        variables, coeffs, rows, _ = constraints.add_soft_sum_constraints(
+            model, works, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost)
+        penalties = self.minimize(model, [model.GetIntVarFromProtoIndex(int(var)) for var in variables], coeffs)
+        return penalties and list(zip(rows.tolist(), penalties))
+
+    def test_penalties(self):
+        penalties = self.solve([1, 2, 4, 6], 1, 2, 3, 4, 6, 5)
+        self.assertEqual(penalties, [(0, 3), (0, 0), (1, 0), (1, 0), (2, 0), (2, 0), (3, 0), (3, 10)])
+
+    def test_per_row_bounds(self):
+        penalties = self.solve([2, 5], 0, [3, 0], 1, 7, 7, 0)
+        self.assertEqual(penalties, [(0, 1)])
+
+    def test_bounds(self):
+        model = cp_model.CpModel()
+        works = [[model.NewBoolVar('') for _ in range(7)] for _ in range(2)]
+        _, _, rows, bounds = constraints.add_soft_sum_constraints(model, works, 1, 2, 3, [4, 7], 7, 5)
+        self.assertEqual(list(zip(rows.tolist(), map(tuple, bounds.tolist()))),
+                         [(0, (2, -1)), (0, (4, 1)), (1, (2, -1))])
+
+    def test_hard_bounds(self):
+        self.assertIsNone(self.solve([0, 2], 1, 1, 0, 7, 7, 0))
+
+    def test_scalar_constraint(self):
+        sums = [1, 2, 3, 4, 5, 6]
+        bounds = (1, 2, 3, 4, 6, 5)
+        for negated in (False, True):
+            model = cp_model.CpModel()
+            works = self.roster(model, sums, negated)
+            variables, coeffs, rows, _ = constraints.add_soft_sum_constraints(
+                model, np.array([[var.Index() for var in row] for row in works]), *bounds)
+            penalties = self.minimize(model, [model.GetIntVarFromProtoIndex(int(var)) for var in variables], coeffs)
+            batched = np.bincount(rows, weights=penalties, minlength=len(sums))
+
+            scalar = []
+            for row in sums:
+                model = cp_model.CpModel()
+                works = self.roster(model, [row], negated)
+                variables, coeffs = constraints.add_soft_sum_constraint(model, works[0], *bounds, '')
+                penalties = self.minimize(model, variables, coeffs)
+                scalar.append(penalties and sum(penalties))
+            self.assertEqual(batched.tolist(), scalar)
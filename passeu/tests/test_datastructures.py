@@ -29,6 +29,36 @@ class TestInterface(unittest.TestCase):
 
         print(shop_data.weekly_cover_demands)
 
+    def test_lookup(self):
+        shop_data = datastructures.ShopData()
+        employee_data = datastructures.EmployeeData()
+        employee_data.employee_lookup = {'Logan': 0, 'Dakota': 1, 'Robin': 2, 'robin': 3}
+        employee_data.index_names()
+
+        # Names in any case, except those only told apart by case, and shift aliases in any case
+        requests = employee_data.resolve_requests([('logan ', 'm', 0, 1), ('DAKOTA', 'close', 1, 2),
+                                                   ('robin', 'Off', 2, 3), (1, 2, 3, 4)], shop_data)
+        self.assertEqual(requests, [(0, 1, 0, 1), (1, 3, 1, 2), (3, 0, 2, 3), (1, 2, 3, 4)])
+        with self.assertRaises(KeyError):
+            employee_data.employee_id('ROBIN')
+
+        # Every unknown reference is reported at once
+        entries = [('Logan', 'Night', 0, 1), ('Turco', 'M', 1, 1), ('Turco', 'Noon', 2, 1), ('Dakota', 'A', 3, 1)]
+        with self.assertRaises(datastructures.UnknownReferenceError) as context:
+            employee_data.resolve_requests(entries, shop_data)
+        self.assertEqual([(reference['column'], reference['value'], reference['rows'])
+                          for reference in context.exception.references],
+                         [('Name', 'Turco', [1, 2]), ('Shift', 'Night', [0]), ('Shift', 'Noon', [2])])
+        self.assertIn("Requests Name 'Turco' in rows 3, 4", str(context.exception))
+
+        unknown = []
+        requests = employee_data.resolve_requests(entries, shop_data, unknown=unknown)
+        self.assertEqual(requests, [None, None, None, (1, 2, 3, 1)])
+        self.assertEqual(len(unknown), 3)
+
+        unavailable = employee_data.resolve_unavailable_shifts([('dakota', 'ALL', 4), ('Logan', 'c', 5)], shop_data)
+        self.assertEqual(unavailable, [[(1, 1, 4), (1, 2, 4), (1, 3, 4)], [(0, 3, 5)]])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import passeu.utils.decomposition as decomposition
+import passeu.utils.history as history
+import passeu.utils.objective as objective
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+def department_shop():
+    """
+    Small shop split in two departments, Logan to Curro (0 to 3) and Dass to Duque (4 to 6)
+    """
+    shop_data = small_shop()
+    for e, employee in enumerate(shop_data.employee_data.employees):
+        employee.department = int(e >= 4)
+    shop_data.department_cover_demands = {0: [(1, 1, 0)] * 7, 1: [(0, 0, 1)] * 7}
+    return shop_data
+
+
+class TestDecomposition(unittest.TestCase):
+
+    def test_components(self):
+        self.assertEqual(decomposition.components(small_shop()), [list(range(7))])
+        self.assertEqual(decomposition.components(department_shop()), [[0, 1, 2, 3], [4, 5, 6]])
+
+        # A role demanded across departments links them
+        shop_data = department_shop()
+        shop_data.employee_data.roles = ['keyholder']
+        shop_data.employee_data.qualifications = [(0, 0), (6, 0)]
+        shop_data.role_cover_demands = [(0, 3, 0, 1)]
+        self.assertEqual(decomposition.components(shop_data), [list(range(7))])
+
+    def test_solve_decomposed(self):
+        shop_data = department_shop()
+        roster_solution, statistics = decomposition.solve_decomposed(shop_data, params='max_time_in_seconds:10')
+
+        self.assertEqual(statistics['components'], 2)
+        self.assertEqual(roster_solution.shifts.shape, (7, 7))
+        self.assertEqual(roster_solution.shifts[3, 0], 0)  # Curro is fixed off on monday
+        for d in range(7):
+            self.assertIn(3, roster_solution.shifts[4:, d])
+            self.assertIn(1, roster_solution.shifts[:4, d])
+            self.assertIn(2, roster_solution.shifts[:4, d])
+        # Logan's request is attributed to him in the merged roster
+        requests = [record for record in roster_solution.bool_penalty_rows() if record['rule'] == 'request']
+        self.assertTrue(all(record['employee'] == 0 for record in requests))
+
+    def test_department_without_demands(self):
+        # Only the first department has demands, the employees of the second meet no cover
+        shop_data = department_shop()
+        shop_data.department_cover_demands = {0: [(1, 1, 0)] * 7}
+        self.assertEqual(decomposition.components(shop_data), [[0, 1, 2, 3], [4], [5], [6]])
+        self.assertEqual(decomposition.sub_shop(shop_data, [4]).cover_groups(), [])
+
+        params = 'max_time_in_seconds:10 num_workers:8'
+        decomposed, statistics = decomposition.solve_decomposed(shop_data, params=params)
+        roster_model = roster.RosterModel(shop_data)
+        full = solve(roster_model)
+        self.assertEqual(statistics['status'], 'OPTIMAL')
+        self.assertEqual(full.status_name, 'OPTIMAL')
+        self.assertEqual(decomposed.objective_value, full.objective_value)
+
+    def test_history_baseline(self):
+        # Only the first department closed last week: its closers are above the shop mean, not their own mean
+        shop_data = department_shop()
+        names = [employee.name for employee in shop_data.employee_data.employees]
+        aggregates = np.zeros((7, len(history.METRICS)), dtype=np.int64)
+        aggregates[:4, history.METRICS.index(history.CLOSE_SHIFTS)] = 4
+        fairness_history = history.FairnessHistory()
+        fairness_history.publish_week(names, aggregates)
+
+        roster_solution, statistics = decomposition.solve_decomposed(
+            shop_data, params='max_time_in_seconds:10 num_workers:2', max_workers=64, history=fairness_history)
+        self.assertEqual(statistics['components'], 2)
+        index = roster_solution.roster_model.objective.bool_index
+        penalised = index.column('employee')[index.column('rule') == objective.RULES.index(objective.HISTORY)]
+        self.assertEqual(set(penalised.tolist()), {0, 1, 2, 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import passeu.utils.diagnosis as diagnosis
+import passeu.utils.objective as objective
+from passeu.tests.shops import small_shop
+
+
+class TestDiagnosis(unittest.TestCase):
+
+    def test_feasible(self):
+        status, core = diagnosis.diagnose(small_shop())
+        self.assertNotEqual(status, 'INFEASIBLE')
+        self.assertEqual(core, [])
+
+    def test_contract_hours_core(self):
+        shop_data = small_shop()
+        shop_data.employee_data.employees[1].contract_weekly_hours = 29
+        status, core = diagnosis.diagnose(shop_data)
+        self.assertEqual(status, 'INFEASIBLE')
+        self.assertEqual([objective.describe(record) for record in core], ['contract_hours(employee=1)'])
+
+    def test_fixed_transition_core(self):
+        shop_data = small_shop()
+        shop_data.fixed_assignments = [(0, 3, 0), (0, 1, 1)]  # night to morning is forbidden
+        status, core = diagnosis.diagnose(shop_data)
+        self.assertEqual(status, 'INFEASIBLE')
+        self.assertIn({'rule': 'transition', 'employee': 0, 'shift': 1, 'previous_shift': 3}, core)
+        self.assertIn('transition(employee=0, shift=1, previous_shift=3)',
+                      [objective.describe(record) for record in core])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import passeu.utils.handoff as handoff
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+def solve_and_share(_):
+    roster_solution = solve(roster.RosterModel(small_shop()), time_limit=5.)
+    return handoff.share(roster_solution), roster_solution.shifts, list(roster_solution.penalty_by('rule').items())
+
+
+class TestHandoff(unittest.TestCase):
+
+    def test_process_handoff(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            descriptor, shifts, penalties = executor.submit(solve_and_share, 0).result()
+
+        self.assertTrue(os.path.exists(descriptor['path']))
+        roster_solution = handoff.receive(descriptor)
+        self.assertFalse(os.path.exists(descriptor['path']))
+        self.assertIsInstance(roster_solution.shifts.base, np.memmap)
+        np.testing.assert_array_equal(roster_solution.shifts, shifts)
+        self.assertEqual(list(roster_solution.penalty_by('rule').items()), penalties)
+        # The employees are handed over with the roster
+        employees = roster_solution.roster_model.shop_data.employee_data.employees
+        self.assertEqual([(employee.name, employee.contract_weekly_hours) for employee in employees],
+                         [(employee.name, employee.contract_weekly_hours)
+                          for employee in small_shop().employee_data.employees])
+
+    def test_receive_removes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'empty.roster')
+            open(path, 'wb').close()
+            with self.assertRaises(ValueError):
+                handoff.receive({'path': path, 'layout': []})
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import passeu.utils.history as history
+import passeu.utils.objective as objective
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop, solve
+
+
+class TestHistory(unittest.TestCase):
+
+    def test_rolling_aggregates(self):
+        fairness_history = history.FairnessHistory(num_weeks=2)
+        close = history.METRICS.index(history.CLOSE_SHIFTS)
+        for week in range(3):
+            aggregates = np.zeros((2, len(history.METRICS)), dtype=np.int64)
+            aggregates[:, close] = [week + 1, 1]
+            fairness_history.publish_week(['Logan', 'Dakota'], aggregates)
+
+        # Only the last two weeks are aggregated
+        totals = fairness_history.rolling(['Dakota', 'Logan', 'Turco'])
+        self.assertEqual(totals[:, close].tolist(), [2, 5, 0])
+
+        with tempfile.TemporaryDirectory() as directory:
+            history_file = os.path.join(directory, 'history.npz')
+            fairness_history.save(history_file)
+            loaded = history.FairnessHistory.load(history_file)
+        self.assertEqual(loaded.rolling(['Logan'])[0, close], 5)
+        loaded.publish_week(['Logan'], np.zeros((1, len(history.METRICS)), dtype=np.int64))
+        self.assertEqual(loaded.rolling(['Logan', 'Dakota'])[:, close].tolist(), [3, 1])
+
+    def test_history_penalties(self):
+        fairness_history = history.FairnessHistory()
+        fairness_history.publish([solve(roster.RosterModel(small_shop()))])
+        totals = fairness_history.rolling([employee.name for employee in small_shop().employee_data.employees])
+        closers = totals[:, history.METRICS.index(history.CLOSE_SHIFTS)]
+        self.assertGreaterEqual(closers.sum(), 7)
+
+        roster_model = roster.RosterModel(small_shop(), history=fairness_history)
+        roster_solution = solve(roster_model)
+        self.assertIn(objective.RULES.index(objective.HISTORY), roster_model.objective.bool_index.column('rule'))
+        # Employees who closed more than average close less in the next roster
+        repeated = (roster_solution.shifts == history.CLOSE_SHIFT).sum(axis=1)[closers > closers.mean()].sum()
+        self.assertLess(repeated, closers[closers > closers.mean()].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.lexicographic as lexicographic
+import passeu.utils.objective as objective
+import passeu.utils.roster_model as roster
+import passeu.utils.solution as solution
+from passeu.tests.shops import small_shop
+
+
+class TestLexicographic(unittest.TestCase):
+
+    params = 'max_time_in_seconds:10.0 num_workers:8'
+
+    def test_cover_stage_optimum_is_kept(self):
+        cover_model = roster.RosterModel(small_shop())
+        cover_model.build()
+        cover_model.minimize([objective.COVER])
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 10.0
+        status = solver.Solve(cover_model.model)
+        self.assertEqual(status, cp_model.OPTIMAL)
+        best_cover = solver.ObjectiveValue()
+
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build()
+        num_constraints = len(roster_model.model.Proto().constraints)
+        solver, status = lexicographic.solve_lexicographic(roster_model, params=self.params,
+                                                           stage_time_limits=[10.0, 5.0])
+        self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        # The stage upper bounds are removed from the model
+        self.assertEqual(len(roster_model.model.Proto().constraints), num_constraints)
+
+        roster_solution = solution.RosterSolution.from_solver(roster_model, solver, status)
+        cover_value = roster_solution.penalty_by('group').get(objective.COVER, 0)
+        self.assertEqual(cover_value, best_cover)
+        # The solver holds the last stage objective only, which leaves out the cover penalties
+        self.assertEqual(roster_solution.penalty_total(), sum(roster_solution.penalty_by('group').values()))
+        self.assertEqual(roster_solution.penalty_total() - cover_value, solver.ObjectiveValue())
+
+    def test_stage_time_limits_length(self):
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build()
+        with self.assertRaises(ValueError):
+            lexicographic.solve_lexicographic(roster_model, stage_time_limits=[1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.lns as lns
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop
+
+
+class TestLNS(unittest.TestCase):
+
+    def setUp(self):
+        self.roster_model = roster.RosterModel(small_shop())
+        self.roster_model.build()
+
+    def test_neighbourhoods(self):
+        roster_lns = lns.RosterLNS(self.roster_model, num_employees_free=2, num_days_free=3)
+        self.assertEqual(set(roster_lns.scores), {lns.EMPLOYEES, lns.DAYS, lns.LEVEL})
+
+        self.assertEqual(len(roster_lns.free_pairs(lns.EMPLOYEES)), 2 * 7)
+        self.assertEqual(len(roster_lns.free_pairs(lns.DAYS)), 7 * 3)
+
+    def test_solve(self):
+        roster_lns = lns.RosterLNS(self.roster_model, params='num_workers:8', neighbourhood_time_limit=0.2)
+        solver, status = roster_lns.solve(time_limit=3., initial_time_limit=0.5)
+
+        self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.assertEqual(solver.ObjectiveValue(), roster_lns.best_objective)
+        # The first solution and each improvement, in order
+        self.assertEqual(len(roster_lns.timeline), roster_lns.improvements + 1)
+        self.assertEqual(roster_lns.timeline[-1][1], roster_lns.best_objective)
+        self.assertEqual([t for t, _, _ in roster_lns.timeline], sorted(t for t, _, _ in roster_lns.timeline))
+        for e in range(7):
+            for d in range(7):
+                self.assertEqual(sum(solver.Value(self.roster_model.work[e, s, d]) for s in range(4)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import passeu.utils.archive as archive
+import passeu.utils.benchmark as benchmark
+
+
+def run_main(*args):
+    # passeu.main defines flags clashing with those of other test modules, it is run in its own process
+    return subprocess.run([sys.executable, '-m', 'passeu.main'] + list(args), capture_output=True, text=True)
+
+
+class TestEntryPoint(unittest.TestCase):
+
+    def test_batch(self):
+        input_file = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+        with tempfile.TemporaryDirectory() as directory:
+            telemetry_dir = os.path.join(directory, 'telemetry')
+            result = run_main('--input', f'{input_file},{input_file}', '--output_dir', directory,
+                              '--output_formats', 'jsonl', '--params', 'max_time_in_seconds:1',
+                              '--telemetry_dir', telemetry_dir)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertEqual(sorted(os.listdir(directory)), ['input_data.jsonl', 'telemetry'])
+            self.assertEqual(sorted(os.listdir(telemetry_dir)), ['input_data_telemetry.json', 'input_data_timeline.csv',
+                                                                 'telemetry.csv', 'telemetry.json'])
+
+    def test_processes(self):
+        input_file = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+        with tempfile.TemporaryDirectory() as directory:
+            history_file = os.path.join(directory, 'history.npz')
+            archive_dir = os.path.join(directory, 'archive')
+            result = run_main('--input', f'{input_file},{input_file}', '--processes', '2',
+                              '--params', 'max_time_in_seconds:1', '--history_file', history_file, '--publish',
+                              '--archive_dir', archive_dir, '--week', '5')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('Publishing 2 rosters', result.stdout)
+            self.assertIn('Archiving 2 rosters', result.stdout)
+            self.assertTrue(os.path.exists(history_file))
+            self.assertEqual(archive.RosterArchive(archive_dir).weeks('input_data')[0], 5)
+
+    def test_tuned_profile(self):
+        input_file = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+        with tempfile.TemporaryDirectory() as directory:
+            profiles_file = os.path.join(directory, 'profiles.json')
+            with open(profiles_file, 'w') as f:
+                json.dump({f'tuned-{size}': 'max_time_in_seconds:1 num_workers:1' for size in benchmark.SIZE_CLASSES},
+                          f)
+            result = run_main('--input', input_file, '--profiles_file', profiles_file)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn('Solving with the tuned-', result.stdout)
+            # An explicit profile wins over the tuned ones
+            result = run_main('--input', input_file, '--profiles_file', profiles_file, '--profile', 'fast-feasible',
+                              '--params', 'max_time_in_seconds:1')
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertNotIn('Solving with the tuned-', result.stdout)
+
+    def test_exit_codes(self):
+        self.assertEqual(run_main().returncode, 1)
+        self.assertEqual(run_main('--input', 'missing.xls').returncode, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
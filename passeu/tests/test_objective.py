@@ -0,0 +1,47 @@
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.objective as objective
+
+
+class TestObjective(unittest.TestCase):
+
+    def test_penalty_index(self):
+        model = cp_model.CpModel()
+        terms = objective.ObjectiveTerms()
+        literals = [model.NewBoolVar('') for _ in range(3)]
+        terms.add_bool_terms(literals, [1, 2, 3], objective.FAIRNESS, objective.TRANSITION,
+                             employee=4, day=[0, 1, 2])
+
+        self.assertEqual(terms.bool_index.record(1),
+                         {'group': objective.FAIRNESS, 'rule': objective.TRANSITION, 'employee': 4, 'day': 1})
+        self.assertEqual(terms.bool_index.describe(2), 'transition(employee=4, day=2)')
+        self.assertEqual(terms.bool_index.column('week').tolist(), [-1, -1, -1])
+
+    def test_linear_terms(self):
+        model = cp_model.CpModel()
+        terms = objective.ObjectiveTerms()
+        x, y = model.NewBoolVar(''), model.NewBoolVar('')
+        terms.add_bool_terms([x, y.Not()], [2, 3], objective.FAIRNESS, objective.TRANSITION)
+        terms.add_bool_terms([x], [1], objective.REQUESTS, objective.REQUEST)
+
+        variables, coefficients, offset = terms.linear_terms()
+        self.assertEqual((variables.tolist(), coefficients.tolist(), offset), ([x.Index(), y.Index()], [3, -3], 3))
+        variables, coefficients, offset = terms.linear_terms([objective.REQUESTS])
+        self.assertEqual((variables.tolist(), coefficients.tolist(), offset), ([x.Index()], [1], 0))
+
+        terms.set_objective(model)
+        model.Add(x == 1)
+        solver = cp_model.CpSolver()
+        solver.Solve(model)
+        self.assertEqual(solver.ObjectiveValue(), 3)
+
+    def test_invalid_attribution(self):
+        terms = objective.ObjectiveTerms()
+        with self.assertRaises(ValueError):
+            terms.add_int_terms([], [], objective.COVER, objective.EXCESS_COVER, day=[1])
+        with self.assertRaises(KeyError):
+            terms.add_int_terms([], [], objective.COVER, objective.EXCESS_COVER, store=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
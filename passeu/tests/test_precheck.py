@@ -0,0 +1,48 @@
+import time
+import unittest
+import passeu.utils.benchmark as benchmark
+import passeu.utils.precheck as precheck
+from passeu.tests.shops import small_shop
+
+
+class TestPrecheck(unittest.TestCase):
+
+    def test_feasible_shop(self):
+        self.assertEqual(precheck.precheck(small_shop()), [])
+
+    def test_contract_hours(self):
+        shop_data = small_shop()
+        shop_data.employee_data.employees[1].contract_weekly_hours = 29  # not a sum of 6 and 8 hour days
+        shop_data.employee_data.employees[2].contract_weekly_hours = 48  # more than 5 days of 8 hours
+        issues = precheck.precheck(shop_data)
+        self.assertEqual([(issue['check'], issue['employee']) for issue in issues],
+                         [(precheck.CONTRACT_HOURS, 1), (precheck.CONTRACT_HOURS, 2)])
+
+    def test_cover(self):
+        shop_data = small_shop()
+        shop_data.weekly_cover_demands = [(1, 1, 1)] * 6 + [(3, 3, 2)]
+        shop_data.employee_data.unavailable_shifts = [(e, 3, 0) for e in range(7)]
+        issues = precheck.precheck(shop_data)
+        self.assertEqual([(issue['check'], issue['day'], issue.get('shift')) for issue in issues],
+                         [(precheck.COVER, 0, 3), (precheck.COVER, 6, None)])
+
+    def test_fixed_assignments(self):
+        shop_data = small_shop()
+        shop_data.fixed_assignments = [(0, 1, 0), (0, 2, 0), (1, 3, 2), (1, 1, 3), (9, 0, 0)]
+        issues = precheck.precheck(shop_data)
+        self.assertEqual([issue['check'] for issue in issues], [precheck.INDEX_RANGE])
+
+        shop_data.fixed_assignments.pop()
+        shop_data.employee_data.unavailable_shifts = [(1, 3, 2)]
+        issues = precheck.precheck(shop_data)
+        self.assertEqual([issue['check'] for issue in issues], [precheck.FIXED_ASSIGNMENTS] * 3)
+
+    def test_large_shop_is_fast(self):
+        shop_data = benchmark.benchmark_shop(1000)
+        start = time.perf_counter()
+        precheck.precheck(shop_data)
+        self.assertLess(time.perf_counter() - start, 1.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from ortools.sat import sat_parameters_pb2
+from google.protobuf import text_format
+import passeu.utils.benchmark as benchmark
+import passeu.utils.profiles as profiles
+
+
+class TestProfiles(unittest.TestCase):
+
+    def test_resolve(self):
+        parameters = sat_parameters_pb2.SatParameters()
+        text_format.Parse(profiles.resolve('balanced', 'max_time_in_seconds:2.0'), parameters)
+
+        self.assertEqual(parameters.max_time_in_seconds, 2.0)
+        self.assertEqual(parameters.num_workers, 8)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(KeyError):
+            profiles.resolve('unknown')
+
+    def test_deterministic(self):
+        parameters = sat_parameters_pb2.SatParameters()
+        text_format.Parse(profiles.deterministic(profiles.resolve('balanced'), random_seed=3, deterministic_time=2.),
+                          parameters)
+
+        self.assertFalse(parameters.HasField('max_time_in_seconds'))
+        self.assertEqual(parameters.max_deterministic_time, 2.)
+        self.assertEqual(parameters.random_seed, 3)
+        self.assertEqual(parameters.num_workers, 8)
+        self.assertTrue(parameters.interleave_search)
+
+    def test_size_class(self):
+        self.assertEqual(benchmark.size_class(5), 'small')
+        self.assertEqual(benchmark.size_class(30), 'medium')
+        self.assertEqual(benchmark.size_class(10000), 'large')
+
+
+if __name__ == '__main__':
+    unittest.main()
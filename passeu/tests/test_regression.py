@@ -0,0 +1,27 @@
+import unittest
+import passeu.utils.benchmark as benchmark
+import passeu.utils.profiles as profiles
+import passeu.utils.regression as regression
+
+
+class TestRegression(unittest.TestCase):
+
+    def test_reproducible(self):
+        params = profiles.deterministic('num_workers:1', deterministic_time=1.)
+        shop_data = benchmark.benchmark_shop(10)
+        runs = [regression.run(shop_data, params) for _ in range(2)]
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(set(runs[0]), set(regression.METRICS))
+
+    def test_compare(self):
+        baseline = {'a': {'status': 'OPTIMAL', 'objective_value': 100., 'deterministic_time': 1.},
+                    'b': {'status': 'FEASIBLE', 'objective_value': 50., 'deterministic_time': 1.},
+                    'c': {'status': 'OPTIMAL', 'objective_value': 10., 'deterministic_time': 1.}}
+        results = {'a': {'status': 'OPTIMAL', 'objective_value': 104., 'deterministic_time': 1.04},
+                   'b': {'status': 'UNKNOWN', 'objective_value': 0., 'deterministic_time': 2.}}
+        self.assertEqual(regression.compare(results, baseline, tolerance=0.05),
+                         ['b: status FEASIBLE -> UNKNOWN', 'b: deterministic time 1.000 -> 2.000', 'c: missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
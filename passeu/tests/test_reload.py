@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import passeu.interface.interface as interface
+import passeu.utils.datastructures as datastructures
+import passeu.utils.reload as reload
+
+
+class TestReload(unittest.TestCase):
+    input_file_xls = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, 'shop.xlsx')
+        self.sheets = interface.read_sheets(self.input_file_xls)
+        self.sheets['Requests'] = pd.DataFrame({'Name': ['Logan', 'Dakota', 'Turco'], 'Shift': ['Off', 'Close', 'M'],
+                                                'Day': [0, 1, 2], 'Weight': [-2, 3, 1]})
+        self.sheets['Availability'] = pd.DataFrame({'Name': ['Logan'], 'Shift': ['All'], 'Day': [4]})
+        self.write()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self):
+        with pd.ExcelWriter(self.input_file) as writer:
+            for name, df in self.sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+        # Saves within the resolution of the file time still count as modifications
+        stat = os.stat(self.input_file)
+        os.utime(self.input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def assertSameShopData(self, shop_data):
+        expected = reload.ShopReloader(self.input_file).load()
+        for attribute in ('requests', 'unavailable_shifts', 'roles', 'qualifications'):
+            self.assertEqual(getattr(shop_data.employee_data, attribute),
+                             getattr(expected.employee_data, attribute), attribute)
+        self.assertEqual(shop_data.weekly_cover_demands, expected.weekly_cover_demands)
+        self.assertEqual([e.name for e in shop_data.employee_data.employees],
+                         [e.name for e in expected.employee_data.employees])
+
+    def test_reload(self):
+        reloader = reload.ShopReloader(self.input_file)
+        self.assertTrue(reloader.reload().employees_changed)
+        shop_data = reloader.shop_data
+        self.assertEqual(len(shop_data.employee_data.requests), 3)
+        self.assertEqual(len(shop_data.employee_data.unavailable_shifts), shop_data.num_shifts - 1)
+
+        # Not modified
+        self.assertFalse(reloader.reload())
+        self.write()
+        self.assertFalse(reloader.reload())
+
+        # An edited request row is the only one resolved again
+        self.sheets['Requests'].loc[1, 'Weight'] = 5
+        self.write()
+        delta = reloader.reload()
+        self.assertEqual(delta.sheets, {'Requests': (1, 1)})
+        self.assertFalse(delta.employees_changed)
+        self.assertIs(reloader.shop_data, shop_data)
+        self.assertEqual(shop_data.employee_data.requests[1][3], 5)
+        self.assertSameShopData(shop_data)
+
+        # Unknown names of every changed sheet are reported at once, and read again once fixed
+        self.sheets['Requests'].loc[0, 'Name'] = 'Lgan'
+        self.sheets['Availability'].loc[0, 'Shift'] = 'Night'
+        self.write()
+        with self.assertRaises(datastructures.UnknownReferenceError) as context:
+            reloader.reload()
+        self.assertEqual([(reference['sheet'], reference['value']) for reference in context.exception.references],
+                         [('Requests', 'Lgan'), ('Availability', 'Night')])
+        self.sheets['Requests'].loc[0, 'Name'] = 'logan'
+        self.sheets['Availability'].loc[0, 'Shift'] = 'All'
+        self.write()
+        # Rebuilt from the whole file, after the failed reload
+        self.assertTrue(reloader.reload().employees_changed)
+        self.assertSameShopData(reloader.shop_data)
+        shop_data = reloader.shop_data
+
+        # Demands and availability
+        self.sheets['ShopDemands'].loc[0, 'Morning'] += 1
+        self.sheets['Availability'] = pd.DataFrame({'Name': ['Logan', 'Dakota'], 'Shift': ['All', 'Close'],
+                                                    'Day': [4, 5]})
+        self.write()
+        self.assertEqual(reloader.reload().sheets, {'ShopDemands': (1, 1), 'Availability': (1, 0)})
+        self.assertSameShopData(shop_data)
+
+        # A new employee rebuilds the shop data
+        self.sheets['Employees'] = pd.concat([self.sheets['Employees'],
+                                              pd.DataFrame({'Name': ['Robin'], 'Hours': [20]})], ignore_index=True)
+        self.write()
+        delta = reloader.reload()
+        self.assertTrue(delta.employees_changed)
+        self.assertIsNot(reloader.shop_data, shop_data)
+        self.assertEqual(reloader.shop_data.employee_data.employees[-1].name, 'Robin')
+        self.assertSameShopData(reloader.shop_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.memory as memory
+import passeu.utils.objective as objective
+import passeu.utils.roster_model as roster
+from passeu.tests.shops import small_shop
+import passeu.utils.solution as solution
+
+
+class TestRosterModel(unittest.TestCase):
+
+    def test_debug_names(self):
+        anonymous_model = roster.RosterModel(small_shop())
+        anonymous_model.build()
+        named_model = roster.RosterModel(small_shop(), debug_names=True)
+        named_model.build()
+
+        self.assertTrue(all(not variable.name for variable in anonymous_model.model.Proto().variables))
+        self.assertEqual(named_model.work[0, 1, 2].Name(), 'work0_1_2')
+        self.assertEqual(len(anonymous_model.model.Proto().variables), len(named_model.model.Proto().variables))
+        self.assertLess(anonymous_model.model.Proto().ByteSize(), named_model.model.Proto().ByteSize())
+
+    def test_transition_attribution(self):
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build()
+        index = roster_model.objective.bool_index
+        transitions = index.column('rule') == objective.RULES.index(objective.TRANSITION)
+        # Afternoon to night is the only penalised transition
+        self.assertTrue(transitions.any())
+        self.assertEqual(set(index.column('previous_shift')[transitions].tolist()), {2})
+        self.assertEqual(set(index.column('shift')[transitions].tolist()), {3})
+        self.assertTrue((index.column('previous_shift')[~transitions] == -1).all())
+
+    def test_weekly_sum_violations(self):
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build()
+        solver = cp_model.CpSolver()
+        solver.parameters.stop_after_first_solution = True
+        solver.parameters.num_workers = 1
+        status = solver.Solve(roster_model.model)
+        roster_solution = solution.RosterSolution.from_solver(roster_model, solver, status)
+
+        # Violations are counted from the roster, whatever the slack left by the solve
+        index = roster_model.objective.int_index
+        rules = {rule[0]: rule for rule in roster.DEFAULT_RULES['weekly_sum_constraints']}
+        for term, bound, side in roster_model.weekly_sum_terms:
+            e, w, s = index.column('employee')[term], index.column('week')[term], index.column('shift')[term]
+            total = int((roster_solution.shifts[e, w * 7:(w + 1) * 7] == s).sum())
+            # (shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost)
+            self.assertEqual(bound, rules[s][2] if side < 0 else rules[s][4])
+            self.assertEqual(roster_solution.int_penalty_values[term], max(0, side * (total - bound)))
+            self.assertLessEqual(roster_solution.int_penalty_values[term],
+                                 solver.Value(roster_model.model.GetIntVarFromProtoIndex(
+                                     int(roster_model.objective.int_indices[term]))))
+
+    def test_availability(self):
+        shop_data = small_shop()
+        # Curro (3) is fixed off on monday and Logan (0) cannot close on tuesday
+        shop_data.employee_data.unavailable_shifts = [(0, 3, 1)]
+        roster_model = roster.RosterModel(shop_data)
+        roster_model.build()
+
+        available_model = roster.RosterModel(small_shop())
+        available_model.build()
+        self.assertLess(len(roster_model.model.Proto().variables), len(available_model.model.Proto().variables))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 10.
+        status = solver.Solve(roster_model.model)
+        roster_solution = solution.RosterSolution.from_solver(roster_model, solver, status)
+        self.assertEqual(roster_solution.shifts[3, 0], 0)
+        self.assertNotEqual(roster_solution.shifts[0, 1], 3)
+
+    def test_roles(self):
+        shop_data = small_shop()
+        employee_data = shop_data.employee_data
+        employee_data.roles = ['cashier', 'keyholder']
+        employee_data.qualifications = [(0, 1), (4, 1), (4, 0), (5, 0)]
+        shop_data.role_cover_demands = [(1, 3, d, 1) for d in range(7)]  # a keyholder closes every day
+        roster_model = roster.RosterModel(shop_data)
+        roster_model.build()
+        self.assertEqual(len(roster_model.role_work), 14)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = 10.
+        status = solver.Solve(roster_model.model)
+        roster_solution = solution.RosterSolution.from_solver(roster_model, solver, status)
+        for d in range(7):
+            keyholders = [e for e in range(employee_data.num_employees) if roster_solution.roles[e, d] == 1]
+            self.assertGreaterEqual(len(keyholders), 1)
+            for e in keyholders:
+                self.assertIn(e, (0, 4))
+                self.assertEqual(roster_solution.shifts[e, d], 3)
+
+    def test_memory_profile(self):
+        profile = memory.MemoryProfile()
+        roster_model = roster.RosterModel(small_shop())
+        roster_model.build(profile)
+
+        self.assertEqual([phase['name'] for phase in profile.phases],
+                         ['variables', 'employee_rules', 'weekly_rules', 'cover', 'objective'])
+        self.assertGreater(profile.peak(), 0)
+        # Only the proto indices of the variables are kept
+        self.assertEqual(roster_model.work.indices.shape, (7, 4, 7))
+        self.assertEqual(roster_model.work[1, 2, 3].Index(), roster_model.work.indices[1, 2, 3])
+        self.assertEqual(len(list(roster_model.work_hours.items())), 7 * 7)
+
+    def test_load_rules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            rules_file = os.path.join(directory, 'rules.json')
+            with open(rules_file, 'w') as f:
+                json.dump({'excess_cover_penalties': [3, 3, 6]}, f)
+            rules = roster.load_rules(rules_file)
+            self.assertEqual(rules['excess_cover_penalties'], [3, 3, 6])
+            self.assertEqual(rules['penalized_transitions'], roster.DEFAULT_RULES['penalized_transitions'])
+
+            with open(rules_file, 'w') as f:
+                json.dump({'unknown_rule': []}, f)
+            with self.assertRaises(KeyError):
+                roster.load_rules(rules_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_main_import_is_light(self):
+        # Run in a fresh interpreter, the test process has already imported the solver
+        code = ('import sys, passeu.main; '
+                'print(sorted({m.split(".")[0] for m in sys.modules} & {"ortools", "pandas", "numpy", "google"}))')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def loads_solver(self, *args):
+        # Whether a run of passeu.main loaded the solver, i.e. missed the cache
+        code = ('import sys; from absl import app; import passeu.main; sys.argv[1:] = {args}\n'
+                'try:\n    app.run(passeu.main.main)\n'
+                'except SystemExit:\n    print("ortools.sat.python.cp_model" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code.format(args=list(args))], capture_output=True, text=True,
+                                check=True).stdout
+        return output.splitlines()[-1] == 'True'
+
+    def test_cached_solve_skips_solver(self):
+        input_file = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+        with tempfile.TemporaryDirectory() as directory:
+            args = ['--input', input_file, '--cache_dir', directory, '--params', 'max_time_in_seconds:1']
+            outputs = [self.loads_solver(*args) for _ in range(2)]
+        # The first solve fills the cache, the second one is read from it
+        self.assertEqual(outputs, [True, False])
+
+    def test_solve_options_change_cache_key(self):
+        input_file = os.path.join(os.path.dirname(__file__), 'interface', 'input_data.xls')
+        with tempfile.TemporaryDirectory() as directory:
+            args = ['--input', input_file, '--cache_dir', directory, '--params', 'max_time_in_seconds:1',
+                    '--lns_time_limit', '1']
+            self.assertTrue(self.loads_solver(*args, '--lns_neighbourhood_time_limit', '0.5'))
+            self.assertTrue(self.loads_solver(*args, '--lns_neighbourhood_time_limit', '0.25'))
+            self.assertFalse(self.loads_solver(*args, '--lns_neighbourhood_time_limit', '0.25'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from ortools.sat.python import cp_model
+import passeu.utils.benchmark as benchmark
+import passeu.utils.callbacks as callbacks
+import passeu.utils.roster_model as roster
+import passeu.utils.telemetry as telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.roster_model = roster.RosterModel(benchmark.benchmark_shop(10))
+        self.roster_model.build()
+        self.solver = cp_model.CpSolver()
+        self.solver.parameters.max_time_in_seconds = 2.
+        self.timeline = callbacks.ObjectiveTimeline(verbose=False)
+        self.status = self.solver.Solve(self.roster_model.model, self.timeline)
+
+    def test_record(self):
+        batch = telemetry.BatchTelemetry()
+        run = batch.record('shop', model=self.roster_model.model, solver=self.solver, status=self.status,
+                           timeline=self.timeline.timeline)
+        batch.record('cached', statistics={'status': 'OPTIMAL', 'conflicts': 5, 'branches': 7, 'wall_time': 0.},
+                     note='cached solve')
+
+        proto = self.roster_model.model.Proto()
+        self.assertEqual(run.model['variables'], len(proto.variables))
+        self.assertEqual(sum(run.model['constraint_types'].values()), len(proto.constraints))
+        summary = run.summary()
+        self.assertEqual(summary['solutions'], len(self.timeline.timeline))
+        self.assertEqual(summary['objective_value'], self.solver.ObjectiveValue())
+        self.assertEqual(summary['num_conflicts'], self.solver.NumConflicts())
+
+        aggregate = batch.aggregate()
+        self.assertEqual(aggregate['runs'], 2)
+        self.assertEqual(aggregate['total_conflicts'], self.solver.NumConflicts() + 5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            batch.write(directory)
+            with open(os.path.join(directory, 'shop_timeline.csv')) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([float(row['objective']) for row in rows],
+                             [objective for _, objective, _ in self.timeline.timeline])
+            with open(os.path.join(directory, 'telemetry.json')) as f:
+                self.assertEqual([run['name'] for run in json.load(f)['runs']], ['shop', 'cached'])
+            with open(os.path.join(directory, 'cached_telemetry.json')) as f:
+                self.assertEqual(json.load(f)['note'], 'cached solve')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from ortools.sat import sat_parameters_pb2
+from google.protobuf import text_format
+import passeu.utils.profiles as profiles
+
+
+class TestTuning(unittest.TestCase):
+
+    def test_tuned_profile(self):
+        # passeu.tuning defines flags clashing with those of other test modules, it is run in its own process
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'profiles.json')
+            args = ['--size_classes', 'small', '--num_shops', '1', '--search', 'grid', '--time_limit', '1',
+                    '--output', output]
+            code = ('import sys; from absl import app; import passeu.tuning as tuning; sys.argv[1:] = {args}\n'
+                    'tuning.SEARCH_SPACE = {{"num_workers": [1], "linearization_level": [0, 1]}}\n'
+                    'app.run(tuning.main)')
+            result = subprocess.run([sys.executable, '-c', code.format(args=args)], capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+            with open(output) as f:
+                tuned_profiles = json.load(f)
+
+        # The named profiles and the two grid candidates are ranked, the first one is written with the time limit
+        ranking = [line.split('\t')[-1] for line in result.stdout.splitlines() if line.startswith('  ')][1:]
+        self.assertEqual(len(ranking), 5)
+        self.assertIn('num_workers:1 linearization_level:0', ranking)
+        winner = profiles.PROFILES.get(ranking[0], ranking[0])
+        self.assertEqual(tuned_profiles, {'tuned-small': profiles.resolve(params=winner + ' max_time_in_seconds:1.0')})
+        parameters = sat_parameters_pb2.SatParameters()
+        text_format.Parse(tuned_profiles['tuned-small'], parameters)
+        self.assertEqual(parameters.max_time_in_seconds, 1.)
+
+
+if __name__ == '__main__':
+    unittest.main()
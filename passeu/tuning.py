@@ -0,0 +1,135 @@
+import itertools
+import random
+from absl import app
+from absl import flags
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+import passeu.utils.benchmark as benchmark
+import passeu.utils.callbacks as callbacks
+import passeu.utils.profiles as profiles
+import passeu.utils.roster_model as roster
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list('size_classes', list(benchmark.SIZE_CLASSES),
+                  'Benchmark shop size classes to tune.')
+flags.DEFINE_integer('num_shops', 2,
+                     'Number of benchmark shops per size class.')
+flags.DEFINE_enum('search', 'random', ['grid', 'random'],
+                  'Search over the parameter space.')
+flags.DEFINE_integer('num_candidates', 8,
+                     'Number of parameter sets drawn in a random search.')
+flags.DEFINE_float('time_limit', 10.,
+                   'Time limit in seconds of each benchmark solve.')
+flags.DEFINE_float('target_gap', 0.01,
+                   'Relative gap to the best known objective at which the target is reached.')
+flags.DEFINE_integer('seed', 0,
+                     'Seed of the random search.')
+flags.DEFINE_string('output', 'tuned_profiles.json',
+                    'Output file the winning profile of each size class is written to.')
+
+# CpSolver parameters explored by the tuning
+SEARCH_SPACE = {
+    'num_workers': [1, 4, 8],
+    'linearization_level': [0, 1, 2],
+    'search_branching': ['AUTOMATIC_SEARCH', 'FIXED_SEARCH', 'PORTFOLIO_SEARCH', 'LP_SEARCH'],
+    'cp_model_presolve': ['true', 'false'],
+}
+
+
+def candidate_params(search, num_candidates=8, seed=0):
+    """
+    Parameter sets to evaluate, the named profiles followed by a grid or random search over ``SEARCH_SPACE``
+
+    Returns:
+        dict: {name: params} with params in text format. Their time limit is overridden by the tuning one
+    """
+    keys = list(SEARCH_SPACE)
+    combinations = list(itertools.product(*[SEARCH_SPACE[key] for key in keys]))
+    if search == 'random':
+        combinations = random.Random(seed).sample(combinations, min(num_candidates, len(combinations)))
+
+    candidates = {}
+    for name, params in profiles.PROFILES.items():
+        candidates[name] = profiles.resolve(params=params)
+    for values in combinations:
+        params = ' '.join(f'{key}:{value}' for key, value in zip(keys, values))
+        candidates[params] = params
+    return candidates
+
+
+def run(shop_data, params, time_limit):
+    """
+    Solves a shop with the given parameters
+
+    Returns:
+        passeu.utils.callbacks.ObjectiveTimeline: Solutions found
+    """
+    roster_model = roster.RosterModel(shop_data)
+    roster_model.build()
+
+    solver = cp_model.CpSolver()
+    text_format.Parse(params, solver.parameters)
+    solver.parameters.max_time_in_seconds = time_limit
+    timeline = callbacks.ObjectiveTimeline(verbose=False)
+    solver.Solve(roster_model.model, timeline)
+    return timeline
+
+
+def tune_size_class(size, candidates, num_shops, time_limit, target_gap):
+    """
+    Evaluates every candidate on the benchmark shops of a size class
+
+    The target of each shop is the best objective found by any candidate, within ``target_gap``. Candidates are
+    ranked by their mean time to target, a shop where the target is never reached counting as ``time_limit``. A shop
+    no candidate solved has no target, it counts as ``time_limit`` for every candidate.
+
+    Returns:
+        list(tuple): (mean_time_to_target, shops_reached, name) sorted from best to worst
+    """
+    timelines = {name: [run(shop_data, params, time_limit) for shop_data in benchmark.benchmark_shops(size, num_shops)]
+                 for name, params in candidates.items()}
+
+    targets = []
+    for i_shop in range(num_shops):
+        objectives = [timeline[i_shop].timeline[-1][1] for timeline in timelines.values() if timeline[i_shop].timeline]
+        if not objectives:
+            print(f'No candidate solved shop {i_shop} of size class {size}, its target is unreachable')
+            targets.append(None)
+            continue
+        best = min(objectives)
+        targets.append(best + abs(best) * target_gap)
+
+    ranking = []
+    for name, shop_timelines in timelines.items():
+        times = [None if target is None else timeline.time_to_target(target)
+                 for timeline, target in zip(shop_timelines, targets)]
+        reached = sum(t is not None for t in times)
+        mean_time = sum(time_limit if t is None else t for t in times) / num_shops
+        ranking.append((mean_time, reached, name))
+    ranking.sort(key=lambda entry: (entry[0], -entry[1]))
+    return ranking
+
+
+def main(_):
+    candidates = candidate_params(FLAGS.search, FLAGS.num_candidates, FLAGS.seed)
+
+    tuned_profiles = {}
+    for size in FLAGS.size_classes:
+        ranking = tune_size_class(size, candidates, FLAGS.num_shops, FLAGS.time_limit, FLAGS.target_gap)
+
+        print(f'Size class {size} ({benchmark.SIZE_CLASSES[size]} employees)')
+        print('  time to target (s)\treached\tparams')
+        for mean_time, reached, name in ranking:
+            print(f'  {mean_time:0.3f}\t\t{reached}/{FLAGS.num_shops}\t{name}')
+        print()
+
+        winner = candidates[ranking[0][2]] + f' max_time_in_seconds:{FLAGS.time_limit}'
+        tuned_profiles[f'tuned-{size}'] = profiles.resolve(params=winner)
+
+    print('Writing tuned profiles to %s' % FLAGS.output)
+    profiles.save_profiles(FLAGS.output, tuned_profiles)
+
+
+if __name__ == '__main__':
+    app.run(main)
@@ -0,0 +1,181 @@
+import json
+import os
+import numpy as np
+import passeu.utils.history as history
+
+# Fixed width record of an employee over a week of a published roster. Shifts, hours and roles of the 7 days are
+# stored inline, employees as ids into the archive name table, -1 roles when no role was filled
+ROW_DTYPE = np.dtype([('employee', '<i4'), ('contract_hours', '<i2'), ('shifts', 'i1', 7), ('hours', 'i1', 7),
+                      ('roles', '<i2', 7)])
+
+# Index entry of the rows of a shop in a week, ``start`` and ``count`` in rows of ``ROW_DTYPE``
+INDEX_DTYPE = np.dtype([('shop', '<i4'), ('week', '<i4'), ('start', '<i8'), ('count', '<i4')])
+
+ROWS_FILE = 'rows.bin'
+INDEX_FILE = 'index.bin'
+NAMES_FILE = 'names.json'
+
+
+class RosterArchive:
+    """
+    Append-only archive of published rosters, one record of fixed width rows per shop and week.
+
+    Rows and index are flat binary files read through memory maps, so opening an archive reads nothing but the name
+    tables and a week is looked up and read in place, without parsing. Weeks are numbered by the caller, e.g.
+    ISO weeks counted from a fixed date. Archiving a shop week again supersedes the earlier record.
+
+    Args:
+        directory (str): Archive directory, created if it does not exist
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.shops = []
+        self.employees = []
+        names_path = os.path.join(directory, NAMES_FILE)
+        if os.path.exists(names_path):
+            with open(names_path, 'r') as f:
+                names = json.load(f)
+            self.shops = names['shops']
+            self.employees = names['employees']
+        self._shop_ids = {name: i for i, name in enumerate(self.shops)}
+        self._employee_ids = {name: i for i, name in enumerate(self.employees)}
+        self._rows = None
+        self._index = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _map(self, name, dtype):
+        path = self._path(name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = self._map(ROWS_FILE, ROW_DTYPE)
+        return self._rows
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._map(INDEX_FILE, INDEX_DTYPE)
+        return self._index
+
+    @staticmethod
+    def _intern(names, ids, name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def append(self, shop, first_week, roster_solution):
+        """
+        Archives every week of a solved roster
+
+        Args:
+            shop (str): Shop name
+            first_week (int): Number of the first week of the roster
+            roster_solution (passeu.utils.solution.RosterSolution): Solved roster
+        """
+        shop_data = roster_solution.roster_model.shop_data
+        employees = shop_data.employee_data.employees
+        shop_id = self._intern(self.shops, self._shop_ids, shop)
+        employee_ids = [self._intern(self.employees, self._employee_ids, employee.name) for employee in employees]
+
+        start = os.path.getsize(self._path(ROWS_FILE)) // ROW_DTYPE.itemsize \
+            if os.path.exists(self._path(ROWS_FILE)) else 0
+        rows = np.zeros(len(employees) * shop_data.num_weeks, dtype=ROW_DTYPE)
+        index = np.zeros(shop_data.num_weeks, dtype=INDEX_DTYPE)
+        for w in range(shop_data.num_weeks):
+            week_rows = rows[w * len(employees):(w + 1) * len(employees)]
+            week_rows['employee'] = employee_ids
+            week_rows['contract_hours'] = [employee.contract_weekly_hours for employee in employees]
+            week_rows['shifts'] = roster_solution.shifts[:, w * 7:(w + 1) * 7]
+            week_rows['hours'] = roster_solution.hours[:, w * 7:(w + 1) * 7]
+            week_rows['roles'] = roster_solution.roles[:, w * 7:(w + 1) * 7]
+            index[w] = (shop_id, first_week + w, start + w * len(employees), len(employees))
+
+        # Names first, so that the rows never refer to a name missing from the table
+        with open(self._path(NAMES_FILE), 'w') as f:
+            json.dump({'shops': self.shops, 'employees': self.employees}, f)
+        with open(self._path(ROWS_FILE), 'ab') as f:
+            rows.tofile(f)
+        with open(self._path(INDEX_FILE), 'ab') as f:
+            index.tofile(f)
+        self._rows = None
+        self._index = None
+
+    def weeks(self, shop=None):
+        """
+        Numbers of the archived weeks, of a shop or of any shop
+
+        Returns:
+            list(int): Sorted week numbers
+        """
+        index = self.index
+        if shop is not None:
+            if shop not in self._shop_ids:
+                return []
+            index = index[index['shop'] == self._shop_ids[shop]]
+        return np.unique(index['week']).tolist()
+
+    def _records(self, week, shop=None):
+        """
+        Index entries of a week, the latest one of each shop
+        """
+        index = self.index
+        selected = index['week'] == week
+        if shop is not None:
+            selected &= index['shop'] == self._shop_ids.get(shop, -1)
+        latest = {}
+        for position in np.flatnonzero(selected).tolist():
+            latest[int(index['shop'][position])] = index[position]
+        return list(latest.values())
+
+    def week(self, shop, week):
+        """
+        Roster of a shop in a week, read in place
+
+        Returns:
+            tuple: (names, shifts, hours, roles) with the employee names and arrays of shape (num_employees, 7).
+              ``None`` if the week of the shop is not archived
+        """
+        records = self._records(week, shop)
+        if not records:
+            return None
+        start, count = int(records[0]['start']), int(records[0]['count'])
+        rows = self.rows[start:start + count]
+        return [self.employees[e] for e in rows['employee'].tolist()], rows['shifts'], rows['hours'], rows['roles']
+
+    def week_rows(self, week):
+        """
+        Rows of every shop in a week
+
+        Returns:
+            np.ndarray: Rows of ``ROW_DTYPE``
+        """
+        records = self._records(week)
+        if not records:
+            return np.zeros(0, dtype=ROW_DTYPE)
+        return np.concatenate([self.rows[int(record['start']):int(record['start']) + int(record['count'])]
+                               for record in records])
+
+    def fairness_history(self, last_week, num_weeks=8):
+        """
+        Fairness aggregates of the archived rosters of every shop over ``num_weeks`` weeks up to ``last_week``
+
+        Returns:
+            passeu.utils.history.FairnessHistory: History with a week published for each of these weeks, empty if
+              none of them is archived
+        """
+        fairness_history = history.FairnessHistory(num_weeks=num_weeks)
+        for week in range(last_week - num_weeks + 1, last_week + 1):
+            rows = self.week_rows(week)
+            fairness_history.publish_week([self.employees[e] for e in rows['employee'].tolist()],
+                                          history.aggregate_week(rows['shifts'], rows['hours'],
+                                                                 rows['contract_hours'].astype(np.int64)))
+        return fairness_history
@@ -0,0 +1,65 @@
+import random
+from passeu.utils.datastructures import Employee, ShopData, EmployeeData
+
+# Number of employees of the benchmark shops of each size class
+SIZE_CLASSES = {
+    'small': 7,
+    'medium': 30,
+    'large': 120,
+}
+
+
+def size_class(num_employees):
+    """
+    Smallest size class fitting ``num_employees``, or the largest one if none does
+    """
+    for name, size in sorted(SIZE_CLASSES.items(), key=lambda item: item[1]):
+        if num_employees <= size:
+            return name
+    return max(SIZE_CLASSES, key=SIZE_CLASSES.get)
+
+
+def benchmark_shop(num_employees, seed=0):
+    """
+    Generates a reproducible single week shop
+
+    Contract hours, levels and requests are drawn at random and the cover demand is set to about 80% of the
+    headcount available each day, spread over the three working shifts.
+
+    Args:
+        num_employees (int): Number of employees
+        seed (int): Random seed
+
+    Returns:
+        passeu.utils.datastructures.ShopData: Shop data
+    """
+    rng = random.Random(seed)
+    shop_data = ShopData()
+
+    employee_data = EmployeeData()
+    employee_data.employees = []
+    worked_days = 0
+    for e in range(num_employees):
+        contract_weekly_hours = rng.choice([40, 40, 32, 24])
+        worked_days += contract_weekly_hours / 8
+        employee_data.employees.append(Employee(f'employee{e}', contract_weekly_hours, level=rng.randrange(3)))
+    employee_data.levels = {employee.level for employee in employee_data.employees}
+
+    employee_data.requests = []
+    for e in range(num_employees):
+        if rng.random() < 0.3:
+            employee_data.requests.append((e, 0, rng.randrange(shop_data.num_days), -2))
+    shop_data.employee_data = employee_data
+
+    demand = max(1, int(0.8 * worked_days / shop_data.num_days / 3))
+    shop_data.weekly_cover_demands = [(demand, demand, demand)] * shop_data.num_days
+    shop_data.fixed_assignments = []
+
+    return shop_data
+
+
+def benchmark_shops(size, num_shops=3):
+    """
+    Benchmark shops of a size class, seeded 0 to ``num_shops - 1``
+    """
+    return [benchmark_shop(SIZE_CLASSES[size], seed=seed) for seed in range(num_shops)]
@@ -0,0 +1,171 @@
+import collections
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from passeu.utils.solution import RosterSolution, SolutionModel, objective_arrays, objective_from_arrays
+
+
+def canonical_shop_data(shop_data):
+    """
+    Shop data as plain, order independent lists, the input of the model fingerprint
+    """
+    employee_data = shop_data.employee_data
+    return {
+        'shifts': list(shop_data.shifts),
+        'num_days': shop_data.num_days,
+        'employees': [[employee.name, employee.contract_weekly_hours, employee.level, employee.maximum_overtime,
+                       employee.department] for employee in employee_data.employees],
+        'requests': sorted(list(request) for request in employee_data.requests),
+        'unavailable_shifts': sorted(list(shift) for shift in employee_data.unavailable_shifts),
+        'roles': list(employee_data.roles),
+        'qualifications': sorted(list(qualification) for qualification in employee_data.qualifications),
+        'role_cover_demands': sorted(list(demand) for demand in shop_data.role_cover_demands),
+        'weekly_cover_demands': [list(demand) for demand in shop_data.weekly_cover_demands],
+        'department_cover_demands': sorted([department, [list(demand) for demand in demands]]
+                                           for department, demands in shop_data.department_cover_demands.items()),
+        'fixed_assignments': sorted(list(assignment) for assignment in shop_data.fixed_assignments),
+    }
+
+
+def _digest(data):
+    text = json.dumps(data, sort_keys=True, separators=(',', ':'), default=int)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def fingerprint(shop_data, rules, solve_options):
+    """
+    Fingerprint of a solve
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        rules (dict): Scheduling rules, see ``passeu.utils.rules.DEFAULT_RULES``
+        solve_options: Sat solver parameters and any other json serialisable option changing the solve outcome
+
+    Returns:
+        str: Hexadecimal digest
+    """
+    return _digest({'shop': canonical_shop_data(shop_data), 'rules': rules, 'solve_options': solve_options})
+
+
+def shape_key(shop_data):
+    """
+    Key shared by shops with the same employees and horizon, whose rosters can hint each other
+    """
+    shop = canonical_shop_data(shop_data)
+    return _digest({'shifts': shop['shifts'], 'num_days': shop['num_days'], 'employees': shop['employees']})[:16]
+
+
+class ResultCache:
+    """
+    Cache of solved rosters keyed by the solve ``fingerprint``
+
+    Entries are kept in memory up to ``max_entries``, least recently used evicted first. If a directory is given
+    they are also written to disk, one ``<shape_key>_<fingerprint>.npz`` file each, with the same eviction policy
+    applied to ``max_disk_entries``. Only the roster, the objective terms that are not zero and the statistics are
+    stored, not the model.
+
+    Args:
+        directory (str): Disk backing directory. Memory only if ``None``
+        max_entries (int): Maximum number of entries in memory
+        max_disk_entries (int): Maximum number of entries on disk
+    """
+
+    def __init__(self, directory=None, max_entries=32, max_disk_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = collections.OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, shop_data, key):
+        return os.path.join(self.directory, f'{shape_key(shop_data)}_{key}.npz')
+
+    @staticmethod
+    def _entry(roster_solution, shape):
+        arrays = objective_arrays(roster_solution.roster_model.objective)
+        entry = {'shifts': roster_solution.shifts, 'hours': roster_solution.hours, 'roles': roster_solution.roles}
+        # Only the objective terms that are not zero are kept
+        for prefix, values in (('bool_', roster_solution.bool_penalty_values),
+                               ('int_', roster_solution.int_penalty_values)):
+            nonzero = np.flatnonzero(values)
+            entry[prefix + 'values'] = values[nonzero]
+            for name, array in arrays.items():
+                if name.startswith(prefix):
+                    entry[name] = array[nonzero]
+        entry['metadata'] = np.array(json.dumps({'shape_key': shape,
+                                                 'status': int(roster_solution.status),
+                                                 'objective_value': roster_solution.objective_value,
+                                                 'statistics': roster_solution.statistics}))
+        return entry
+
+    @staticmethod
+    def _solution(shop_data, entry):
+        metadata = json.loads(str(entry['metadata']))
+        roster_solution = RosterSolution(SolutionModel(shop_data, objective_from_arrays(entry)), metadata['status'],
+                                         metadata['objective_value'], entry['shifts'], entry['hours'],
+                                         entry['bool_values'], entry['int_values'], entry.get('roles'))
+        roster_solution.statistics = dict(metadata['statistics'], cached=True)
+        return roster_solution
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, shop_data, rules, solve_options):
+        """
+        Cached solution of a solve, see ``fingerprint`` for the arguments
+
+        Returns:
+            passeu.utils.solution.RosterSolution: Cached solution, ``None`` if not in the cache
+        """
+        key = fingerprint(shop_data, rules, solve_options)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.directory is not None and os.path.exists(self._path(shop_data, key)):
+            path = self._path(shop_data, key)
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+            os.utime(path)
+            self._remember(key, entry)
+        else:
+            return None
+        return self._solution(shop_data, entry)
+
+    def put(self, shop_data, rules, solve_options, roster_solution):
+        """
+        Adds the solution of a solve to the cache
+        """
+        key = fingerprint(shop_data, rules, solve_options)
+        entry = self._entry(roster_solution, shape_key(shop_data))
+        self._remember(key, entry)
+
+        if self.directory is not None:
+            np.savez(self._path(shop_data, key), **entry)
+            paths = sorted(glob.glob(os.path.join(self.directory, '*.npz')), key=os.path.getmtime)
+            for path in paths[:max(0, len(paths) - self.max_disk_entries)]:
+                os.remove(path)
+
+    def hint(self, shop_data):
+        """
+        Roster of the most recently used entry with the same employees and horizon as ``shop_data``
+
+        Returns:
+            tuple: (shifts, hours) arrays, ``None`` if there is no such entry
+        """
+        shape = shape_key(shop_data)
+        for entry in reversed(self._entries.values()):
+            if json.loads(str(entry['metadata']))['shape_key'] == shape:
+                return entry['shifts'], entry['hours']
+
+        if self.directory is not None:
+            paths = glob.glob(os.path.join(self.directory, f'{shape}_*.npz'))
+            if paths:
+                with np.load(max(paths, key=os.path.getmtime)) as data:
+                    return data['shifts'], data['hours']
+        return None
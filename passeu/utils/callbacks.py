@@ -0,0 +1,110 @@
+import threading
+from ortools.sat.python import cp_model
+from passeu.utils.solution import relative_gap
+
+
+class ObjectiveTimeline(cp_model.CpSolverSolutionCallback):
+    """
+    Prints the objective of each improving solution, as ``cp_model.ObjectiveSolutionPrinter``, and records it
+
+    Attributes:
+        timeline (list(tuple)): (wall_time, objective, best_bound) of each solution found
+    """
+
+    def __init__(self, verbose=True):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.verbose = verbose
+        self.timeline = []
+
+    def on_solution_callback(self):
+        wall_time = self.WallTime()
+        objective = self.ObjectiveValue()
+        best_bound = self.BestObjectiveBound()
+        self.timeline.append((wall_time, objective, best_bound))
+        if self.verbose:
+            print('Solution %i, time = %0.2f s, objective = %i' % (len(self.timeline) - 1, wall_time, objective),
+                  flush=True)
+
+    def time_to_target(self, target):
+        """
+        Wall time at which the first solution with an objective not above ``target`` was found, ``None`` if never
+        """
+        for wall_time, objective, _ in self.timeline:
+            if objective <= target:
+                return wall_time
+        return None
+
+
+class EarlyStopping(ObjectiveTimeline):
+    """
+    Stops the search once the solution is good enough, rather than waiting for the time limit or a proof of
+    optimality.
+
+    The search is stopped when the relative gap between the objective and the best bound falls below
+    ``relative_gap_limit``, or when no improving solution has been found for ``stall_time_limit`` seconds. The
+    stall is timed from the start of the solve, then from the last solution found: ``start_timer`` must be called
+    before the solve and ``stop_timer`` once it returns.
+
+    Args:
+        relative_gap_limit (float): Relative gap below which the search stops. Disabled if 0
+        stall_time_limit (float): Seconds without improvement after which the search stops. Disabled if 0
+        verbose (bool): Print every solution found
+
+    Attributes:
+        stop_reason (str): Reason the search was stopped, ``None`` if it was not stopped by the callback
+    """
+
+    def __init__(self, relative_gap_limit=0., stall_time_limit=0., verbose=True):
+        ObjectiveTimeline.__init__(self, verbose=verbose)
+        self.relative_gap_limit = relative_gap_limit
+        self.stall_time_limit = stall_time_limit
+        self.stop_reason = None
+        self._timer = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def on_solution_callback(self):
+        ObjectiveTimeline.on_solution_callback(self)
+        wall_time, objective, best_bound = self.timeline[-1]
+
+        if self.relative_gap_limit > 0:
+            gap = relative_gap(objective, best_bound)
+            if gap <= self.relative_gap_limit:
+                self.stop(f'relative gap {gap:0.4f} below limit {self.relative_gap_limit} at {wall_time:0.2f} s')
+                return
+
+        self._restart_timer(f'no improvement in {self.stall_time_limit} s after objective {objective}')
+
+    def _restart_timer(self, reason):
+        if self.stall_time_limit <= 0:
+            return
+        with self._lock:
+            if self._finished:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.stall_time_limit, self.stop, args=(reason,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def start_timer(self):
+        """
+        Starts timing the stall as the solve starts, so that a search finding no solution is stopped as well
+        """
+        self._restart_timer(f'no solution in {self.stall_time_limit} s')
+
+    def stop(self, reason):
+        with self._lock:
+            if self._finished or self.stop_reason is not None:
+                return
+            self.stop_reason = reason
+        print(f'Stopping search: {reason}', flush=True)
+        self.StopSearch()
+
+    def stop_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # The solve has returned, a late stall timer must not stop it
+            self._finished = True
@@ -1,3 +1,7 @@
+import numpy as np
+from ortools.sat.python import cp_model
+
+
 def negated_bounded_span(works, start, length):
     """Filters an isolated sub-sequence of variables assined to True.
 
@@ -28,7 +32,7 @@ def negated_bounded_span(works, start, length):
 
 
 def add_soft_sequence_constraint(model, works, hard_min, soft_min, min_cost,
-                                 soft_max, hard_max, max_cost, prefix):
+                                 soft_max, hard_max, max_cost, prefix, enforcement=None):
     """Sequence constraint on true variables with soft and hard bounds.
 
   This constraint look at every maximal contiguous sequence of variables
@@ -50,7 +54,10 @@ def add_soft_sequence_constraint(model, works, hard_min, soft_min, min_cost,
       hard_max.
     max_cost: the coefficient of the linear penalty if the length is more than
       soft_max.
-    prefix: a base name for penalty literals.
+    prefix: a base name for penalty literals. If empty, the literals are left
+      unnamed.
+    enforcement: if given, a list of literals the hard bounds are only
+      enforced for.
 
   Returns:
     a tuple (variables_list, coefficient_list) containing the different
@@ -59,18 +66,23 @@ def add_soft_sequence_constraint(model, works, hard_min, soft_min, min_cost,
     cost_literals = []
     cost_coefficients = []
 
+    def add_hard_clause(clause):
+        constraint = model.AddBoolOr(clause)
+        if enforcement:
+            constraint.OnlyEnforceIf(enforcement)
+
     # Forbid sequences that are too short.
     for length in range(1, hard_min):
         for start in range(len(works) - length + 1):
-            model.AddBoolOr(negated_bounded_span(works, start, length))
+            add_hard_clause(negated_bounded_span(works, start, length))
 
     # Penalize sequences that are below the soft limit.
     if min_cost > 0:
         for length in range(hard_min, soft_min):
             for start in range(len(works) - length + 1):
                 span = negated_bounded_span(works, start, length)
-                name = ': under_span(start=%i, length=%i)' % (start, length)
-                lit = model.NewBoolVar(prefix + name)
+                name = prefix + ': under_span(start=%i, length=%i)' % (start, length) if prefix else ''
+                lit = model.NewBoolVar(name)
                 span.append(lit)
                 model.AddBoolOr(span)
                 cost_literals.append(lit)
@@ -83,8 +95,8 @@ def add_soft_sequence_constraint(model, works, hard_min, soft_min, min_cost,
         for length in range(soft_max + 1, hard_max + 1):
             for start in range(len(works) - length + 1):
                 span = negated_bounded_span(works, start, length)
-                name = ': over_span(start=%i, length=%i)' % (start, length)
-                lit = model.NewBoolVar(prefix + name)
+                name = prefix + ': over_span(start=%i, length=%i)' % (start, length) if prefix else ''
+                lit = model.NewBoolVar(name)
                 span.append(lit)
                 model.AddBoolOr(span)
                 cost_literals.append(lit)
@@ -93,13 +105,13 @@ def add_soft_sequence_constraint(model, works, hard_min, soft_min, min_cost,
 
     # Just forbid any sequence of true variables with length hard_max + 1
     for start in range(len(works) - hard_max):
-        model.AddBoolOr(
+        add_hard_clause(
             [works[i].Not() for i in range(start, start + hard_max + 1)])
     return cost_literals, cost_coefficients
 
 
 def add_soft_sum_constraint(model, works, hard_min, soft_min, min_cost,
-                            soft_max, hard_max, max_cost, prefix):
+                            soft_max, hard_max, max_cost, prefix, enforcement=None):
     """Sum constraint with soft and hard bounds.
 
   This constraint counts the variables assigned to true from works.
@@ -121,7 +133,10 @@ def add_soft_sum_constraint(model, works, hard_min, soft_min, min_cost,
       hard_max.
     max_cost: the coefficient of the linear penalty if the sum is more than
       soft_max.
-    prefix: a base name for penalty variables.
+    prefix: a base name for penalty variables. If empty, the variables are left
+      unnamed.
+    enforcement: if given, a list of literals the hard bounds are only
+      enforced for.
 
   Returns:
     a tuple (variables_list, coefficient_list) containing the different
@@ -129,25 +144,29 @@ def add_soft_sum_constraint(model, works, hard_min, soft_min, min_cost,
   """
     cost_variables = []
     cost_coefficients = []
-    sum_var = model.NewIntVar(hard_min, hard_max, '')
+    if not enforcement:
+        sum_var = model.NewIntVar(hard_min, hard_max, '')
+    else:
+        sum_var = model.NewIntVar(0, len(works), '')
+        model.AddLinearConstraint(sum_var, hard_min, hard_max).OnlyEnforceIf(enforcement)
     # This adds the hard constraints on the sum.
     model.Add(sum_var == sum(works))
 
     # Penalize sums below the soft_min target.
     if soft_min > hard_min and min_cost > 0:
-        delta = model.NewIntVar(-len(works), len(works), '')
+        delta = model.NewIntVar(soft_min - len(works), soft_min, '')
         model.Add(delta == soft_min - sum_var)
         # TODO(user): Compare efficiency with only excess >= soft_min - sum_var.
-        excess = model.NewIntVar(0, 7, prefix + ': under_sum')
+        excess = model.NewIntVar(0, soft_min, prefix + ': under_sum' if prefix else '')
         model.AddMaxEquality(excess, [delta, 0])
         cost_variables.append(excess)
         cost_coefficients.append(min_cost)
 
     # Penalize sums above the soft_max target.
     if soft_max < hard_max and max_cost > 0:
-        delta = model.NewIntVar(-7, 7, '')
+        delta = model.NewIntVar(-soft_max, len(works) - soft_max, '')
         model.Add(delta == sum_var - soft_max)
-        excess = model.NewIntVar(0, 7, prefix + ': over_sum')
+        excess = model.NewIntVar(0, max(0, len(works) - soft_max), prefix + ': over_sum' if prefix else '')
         model.AddMaxEquality(excess, [delta, 0])
         cost_variables.append(excess)
         cost_coefficients.append(max_cost)
@@ -155,6 +174,108 @@ def add_soft_sum_constraint(model, works, hard_min, soft_min, min_cost,
     return cost_variables, cost_coefficients
 
 
+def add_soft_sum_constraints(model, works, hard_min, soft_min, min_cost,
+                             soft_max, hard_max, max_cost, prefixes=None,
+                             enforcements=None):
+    """Batch of sum constraints with soft and hard bounds.
+
+  Each row of works is constrained as in add_soft_sum_constraint, with the
+  minimal encoding: no sum variable, hard bounds only when they cut the range
+  of the sum, and one sided penalties (excess >= soft_min - sum) with domains
+  sized from the bounds. One sided penalties are exact as long as they are
+  minimised with a positive cost, which is how the objective uses them, but
+  only at the optimum: a feasible solution may leave an excess above the
+  violation. The returned soft bounds give the exact violation of a solution
+  from the sums of its rows.
+
+  The bounds of all the rows are worked out at once from their arrays, and
+  the penalty variables and constraints are appended straight to the model
+  proto, without creating a Python variable object for each of them.
+
+  Args:
+    model: the sum constraints are built on this model.
+    works: the Boolean variables summed by each row, as a 2-D list of
+      variables or a 2-D array of their proto indices, negative for negated
+      literals (see passeu.utils.solution.variable_indices).
+    hard_min, soft_min, min_cost, soft_max, hard_max, max_cost: bounds and
+      costs as in add_soft_sum_constraint, either a single value shared by all
+      the rows or a sequence with one value per row.
+    prefixes: a base name for the penalty variables of each row. If None, the
+      variables are left unnamed.
+    enforcements: if given, a list of literals per row its hard bounds are
+      only enforced for.
+
+  Returns:
+    a tuple (variables, coefficients, rows, bounds) of arrays holding the
+    proto indices of the penalties created, their costs, the row of works
+    each of them relates to and the (soft bound, side) it penalises the sum
+    beyond, side being -1 below soft_min and 1 above soft_max.
+  """
+    if not isinstance(works, np.ndarray):
+        works = np.array([[var.Index() for var in row] for row in works], dtype=np.int64)
+    works = works.reshape(len(works), -1)
+    num_rows, length = works.shape
+    hard_min, soft_min, min_cost, soft_max, hard_max, max_cost = (
+        np.broadcast_to(np.asarray(value, dtype=np.int64), (num_rows,))
+        for value in (hard_min, soft_min, min_cost, soft_max, hard_max, max_cost))
+
+    # The sum of a row over positive references: not(x) counts as 1 - x
+    negated = works < 0
+    variables = np.where(negated, -works - 1, works).tolist()
+    coefficients = np.where(negated, -1, 1).tolist()
+    offsets = negated.sum(axis=1)
+
+    # Range of the sums, the hard bounds do not hold on rows that are not enforced
+    enforced = np.array([bool(enforcement) for enforcement in enforcements] if enforcements
+                        else [False] * num_rows, dtype=bool)
+    lowest = np.where(enforced, 0, hard_min)
+    highest = np.where(enforced, length, np.minimum(hard_max, length))
+
+    hard = (hard_min > 0) | (hard_max < length)
+    under = (soft_min > hard_min) & (min_cost > 0)
+    over = (soft_max < hard_max) & (max_cost > 0)
+
+    # Penalties in row order, under before over
+    rows = np.concatenate([np.flatnonzero(under), np.flatnonzero(over)])
+    sides = np.concatenate([np.full(under.sum(), -1), np.full(over.sum(), 1)])
+    order = np.lexsort((sides, rows))
+    rows, sides = rows[order], sides[order]
+    costs = np.where(sides < 0, min_cost[rows], max_cost[rows])
+    bounds = np.where(sides < 0, soft_min[rows], soft_max[rows])
+    excess_max = np.where(sides < 0, soft_min[rows] - lowest[rows], np.maximum(0, highest[rows] - soft_max[rows]))
+
+    proto = model.Proto()
+    first_variable = len(proto.variables)
+    for row, side, upper in zip(rows.tolist(), sides.tolist(), excess_max.tolist()):
+        variable = proto.variables.add()
+        variable.domain.extend([0, upper])
+        if prefixes:
+            variable.name = prefixes[row] + (': under_sum' if side < 0 else ': over_sum')
+    excess = np.arange(first_variable, first_variable + len(rows), dtype=np.int64)
+
+    for row in np.flatnonzero(hard).tolist():
+        constraint = proto.constraints.add()
+        if enforced[row]:
+            constraint.enforcement_literal.extend(var.Index() for var in enforcements[row])
+        constraint.linear.vars.extend(variables[row])
+        constraint.linear.coeffs.extend(coefficients[row])
+        constraint.linear.domain.extend([int(hard_min[row] - offsets[row]), int(hard_max[row] - offsets[row])])
+
+    # sum + excess >= soft_min and sum - excess <= soft_max
+    for row, side, bound, var in zip(rows.tolist(), sides.tolist(), bounds.tolist(), excess.tolist()):
+        linear = proto.constraints.add().linear
+        linear.vars.extend(variables[row])
+        linear.vars.append(var)
+        linear.coeffs.extend(coefficients[row])
+        linear.coeffs.append(-side)
+        if side < 0:
+            linear.domain.extend([bound - int(offsets[row]), cp_model.INT_MAX])
+        else:
+            linear.domain.extend([cp_model.INT_MIN, bound - int(offsets[row])])
+
+    return excess, costs, rows, np.stack([bounds, sides], axis=1)
+
+
 def add_soft_sum_int_constraint(model, work_hours, hard_min, soft_min, min_cost,
                                 soft_max, hard_max, max_cost, prefix):
     """
@@ -171,7 +292,7 @@ def add_soft_sum_int_constraint(model, work_hours, hard_min, soft_min, min_cost,
         soft_max (int): Soft maximum
         hard_max (int): Hard maximum
         max_cost (int): Maximum cost to apply if sum is hard_max
-        prefix (str): String prefix for variable name
+        prefix (str): String prefix for variable name. If empty, the variables are left unnamed
 
     Returns:
         tuple: (variables, coefficients) to be added to model minimisation function
@@ -192,7 +313,7 @@ def add_soft_sum_int_constraint(model, work_hours, hard_min, soft_min, min_cost,
 
         # if delta < 0, the variable is above soft_min -> no penalty
         # therefore excess (which is the penalty applied) is [0, max(delta)]
-        excess = model.NewIntVar(0, soft_min - hard_min, prefix + ': under_sum')
+        excess = model.NewIntVar(0, soft_min - hard_min, prefix + ': under_sum' if prefix else '')
         model.AddMaxEquality(excess, [delta, 0])  # if delta < 0, then the variable is above soft_min and no need for penalty
         cost_variables.append(excess)
         cost_coefficients.append(min_cost)
@@ -202,7 +323,7 @@ def add_soft_sum_int_constraint(model, work_hours, hard_min, soft_min, min_cost,
         model.Add(delta == sum_var - soft_max)
 
         # if delta < 0, then sum_var < soft_max -> no need por penalty
-        excess = model.NewIntVar(0, hard_max - soft_max, prefix + ': over_sum')
+        excess = model.NewIntVar(0, hard_max - soft_max, prefix + ': over_sum' if prefix else '')
         model.AddMaxEquality(excess, [delta, 0])
         cost_variables.append(excess)
         cost_coefficients.append(max_cost)
@@ -1,5 +1,75 @@
+import collections
+import numpy as np
 import passeu.interface.interface as interface
 
+ALL_SHIFTS = 'all'  # shift of an Availability row making every working shift of the day unavailable
+
+
+def fold(name):
+    """
+    Case-folded form of a name, under which employee names and shift aliases are looked up
+    """
+    return name.strip().casefold()
+
+
+def resolve_column(values, resolve):
+    """
+    Resolves a column of references, each distinct value once
+
+    Returns:
+        list: Resolved value of each entry, ``None`` where unknown
+    """
+    resolved = {}
+    ids = []
+    for value in values:
+        if value not in resolved:
+            resolved[value] = resolve(value)
+        ids.append(resolved[value])
+    return ids
+
+
+def unknown_references(sheet, column, values, ids, rows):
+    """
+    Unknown references of a resolved column, one record per distinct value with ``sheet``, ``column``, ``value`` and
+    the ``rows`` it is in
+    """
+    unknown = {}
+    for value, resolved, row in zip(values, ids, rows):
+        if resolved is None:
+            unknown.setdefault(value, []).append(row)
+    return [dict(sheet=sheet, column=column, value=value, rows=value_rows) for value, value_rows in unknown.items()]
+
+
+def check_references(unknown):
+    """
+    Raises:
+        UnknownReferenceError: If any reference is unknown
+    """
+    if unknown:
+        raise UnknownReferenceError(unknown)
+
+
+class UnknownReferenceError(KeyError):
+    """
+    Unknown employee or shift names of the input sheets, all reported at once
+
+    Attributes:
+        references (list(dict)): Unknown references, see ``unknown_references``. Rows are counted from 0, the first
+          row under the header
+    """
+
+    def __init__(self, references):
+        super().__init__(references)
+        self.references = references
+
+    def __str__(self):
+        lines = [f'{len(self.references)} unknown references in the input:']
+        for reference in self.references:
+            # Spreadsheet row numbers, below the header row
+            rows = ', '.join(str(row + 2) for row in reference['rows'])
+            lines.append(f'  {reference["sheet"]} {reference["column"]} {reference["value"]!r} in rows {rows}')
+        return '\n'.join(lines)
+
 
 class EmployeeData:
 
@@ -9,9 +79,14 @@ class EmployeeData:
 
         self.employees = None  # list(Employee)
         self.employee_lookup = None  # dict name:id
+        self.folded_lookup = None  # dict case-folded name:id, without the names only told apart by case
         self.levels = set()
 
         self.requests = []
+        self.unavailable_shifts = []  # list of (employee_id, shift, day)
+
+        self.roles = []  # list of role names, indexed by role id
+        self.qualifications = []  # list of (employee_id, role_id), the roles each employee can fill
 
     @property
     def num_employees(self):
@@ -19,54 +94,178 @@ class EmployeeData:
 
     def create_employee_data(self):
         employees_raw_data, self.employee_lookup = interface.create_employee_data(self.input_file_xls)
+        self.index_names()
 
         self.employees = []
         for entry in employees_raw_data:
             self.employees.append(Employee(entry['name'],
                                            contract_weekly_hours=entry['contract_weekly_hours'],
-                                           level=entry.get('level', 0)))
+                                           level=entry.get('level', 0),
+                                           department=entry.get('department', 0)))
             self.levels.add(entry.get('level', 0))
 
-    def create_requests(self, shop_data):
+    def index_names(self):
+        """
+        Builds the case-folded lookup of the employee names from ``employee_lookup``
+        """
+        names = [name for name in self.employee_lookup if type(name) is str]
+        counts = collections.Counter(fold(name) for name in names)
+        self.folded_lookup = {fold(name): self.employee_lookup[name] for name in names if counts[fold(name)] == 1}
+
+    def lookup_employee(self, employee):
+        """
+        Id of an employee given by id or name, the name matched exactly or else in any case. ``None`` if unknown
+        """
+        if type(employee) is int:
+            return employee
+        if type(employee) is not str:
+            return None
+        employee_id = self.employee_lookup.get(employee)
+        if employee_id is None:
+            employee_id = self.folded_lookup.get(fold(employee))
+        return employee_id
+
+    def employee_id(self, employee):
+        # employee name or id
+        if type(employee) is not str and type(employee) is not int:
+            raise TypeError('Employee must be either id or name')
+        employee_id = self.lookup_employee(employee)
+        if employee_id is None:
+            raise KeyError(f'Unable to find employee {employee} in list of employees:'
+                           f'\n{list(self.employee_lookup)}')
+        return employee_id
+
+    def create_requests(self, shop_data, unknown=None):
         # employee_name/id; shift; day; weight (negative is desire; positive is penalty)
-        raw_requests = interface.create_request_list(self.input_file_xls)
-        for entry in raw_requests:
-            if type(entry[0]) is str:
-                try:
-                    employee_id = self.employee_lookup[entry[0]]
-                except KeyError:
-                    raise KeyError(f'Unable to find employee {entry[0]} in list of employees:'
-                                   f'\n{self.employee_lookup.values()}')
-
-            elif type(entry[0]) is int:
-                employee_id = entry[0]
-            else:
-                raise TypeError('Employee must be either id or name')
-
-            shift = shop_data.shift_mapping(entry[1])
-
-            if type(entry[2]) is int:
-                day = entry[2]
+        requests = self.resolve_requests(interface.create_request_list(self.input_file_xls), shop_data,
+                                         unknown=unknown)
+        self.requests.extend(request for request in requests if request is not None)
+
+    def resolve_requests(self, entries, shop_data, rows=None, unknown=None):
+        """
+        Requests of ``Requests`` rows. Employee and shift names are resolved a column at a time, each distinct name
+        once, and all the unknown ones reported together
+
+        Args:
+            entries (list(tuple)): (employee, shift, day, weight) rows, see ``interface.create_request_list``
+            shop_data (ShopData): Shop data
+            rows (list(int)): Sheet row of each entry, for the report of unknown references. Defaults to their order
+            unknown (list): Collects the unknown references, see ``unknown_references``, instead of raising them
+
+        Returns:
+            list(tuple): (employee_id, shift, day, weight) of each entry, ``None`` for those with unknown references
+
+        Raises:
+            UnknownReferenceError: If any name is unknown and ``unknown`` does not collect it
+        """
+        if not entries:
+            return []
+        employees, shifts, days, weights = zip(*entries)
+        for column, values in (('Day', days), ('Weight', weights)):
+            for value in values:
+                if type(value) is not int:
+                    raise TypeError(f'{column} should be an integer and is {type(value)}')
+
+        rows = range(len(entries)) if rows is None else rows
+        employee_ids = resolve_column(employees, self.lookup_employee)
+        shift_ids = resolve_column(shifts, shop_data.shift_id)
+        references = (unknown_references('Requests', 'Name', employees, employee_ids, rows)
+                      + unknown_references('Requests', 'Shift', shifts, shift_ids, rows))
+        if unknown is None:
+            check_references(references)
+        else:
+            unknown.extend(references)
+        return [None if e is None or s is None else (e, s, d, w)
+                for e, s, d, w in zip(employee_ids, shift_ids, days, weights)]
+
+    def create_unavailable_shifts(self, shop_data, unknown=None):
+        # employee_name/id; shift or All; day
+        for shifts in self.resolve_unavailable_shifts(interface.create_unavailability_list(self.input_file_xls),
+                                                      shop_data, unknown=unknown):
+            if shifts is not None:
+                self.unavailable_shifts.extend(shifts)
+
+    def resolve_unavailable_shifts(self, entries, shop_data, rows=None, unknown=None):
+        """
+        Unavailable shifts of ``Availability`` rows, resolved as in ``resolve_requests``
+
+        Args:
+            entries (list(tuple)): (employee, shift, day) rows, see ``interface.create_unavailability_list``
+
+        Returns:
+            list(list): (employee_id, shift, day) unavailable shifts of each entry, ``None`` for those with unknown
+              references
+        """
+        if not entries:
+            return []
+        employees, shifts, days = zip(*entries)
+
+        def shift_id(shift):
+            if type(shift) is str and fold(shift) == ALL_SHIFTS:
+                return ALL_SHIFTS
+            return shop_data.shift_id(shift)
+
+        rows = range(len(entries)) if rows is None else rows
+        employee_ids = resolve_column(employees, self.lookup_employee)
+        shift_ids = resolve_column(shifts, shift_id)
+        references = (unknown_references('Availability', 'Name', employees, employee_ids, rows)
+                      + unknown_references('Availability', 'Shift', shifts, shift_ids, rows))
+        if unknown is None:
+            check_references(references)
+        else:
+            unknown.extend(references)
+
+        unavailable = []
+        for e, s, d in zip(employee_ids, shift_ids, days):
+            if e is None or s is None:
+                unavailable.append(None)
+            elif s == ALL_SHIFTS:
+                unavailable.append([(e, shift, d) for shift in range(1, shop_data.num_shifts)])
             else:
-                raise TypeError(f'Day should be an integer and is {type(entry[2])}')
+                unavailable.append([(e, s, d)])
+        return unavailable
+
+    def role_id(self, role):
+        # role name, added to the roles if new
+        if role not in self.roles:
+            self.roles.append(role)
+        return self.roles.index(role)
+
+    def create_qualifications(self, unknown=None):
+        # employee_name/id; role
+        entries = interface.create_role_list(self.input_file_xls)
+        if not entries:
+            return
+        employees, roles = zip(*entries)
+        employee_ids = resolve_column(employees, self.lookup_employee)
+        references = unknown_references('Roles', 'Name', employees, employee_ids, range(len(entries)))
+        if unknown is None:
+            check_references(references)
+        else:
+            unknown.extend(references)
+        self.qualifications.extend((e, self.role_id(role)) for e, role in zip(employee_ids, roles) if e is not None)
 
-            if type(entry[3]) is int:
-                weight = entry[3]
-            else:
-                raise TypeError(f'Day should be an integer and is {type(entry[3])}')
+    def employees_by_role(self):
+        """
+        Sparse eligibility of the employees for each role
 
-            self.requests.append((employee_id, shift, day, weight))
+        Returns:
+            list(np.ndarray): Sorted ids of the employees qualified for each role, indexed by role id
+        """
+        qualifications = np.array(self.qualifications, dtype=np.int64).reshape(-1, 2)
+        return [np.unique(qualifications[qualifications[:, 1] == r, 0]) for r in range(len(self.roles))]
 
 
 class Employee:
     num_employees = 0  # class counter
 
-    def __init__(self, name, contract_weekly_hours, level=0, maximum_overtime=0):
+    def __init__(self, name, contract_weekly_hours, level=0, maximum_overtime=0, department=0):
         self.name = name
         self.id = Employee.num_employees
         self.contract_weekly_hours = contract_weekly_hours
         self.maximum_overtime = maximum_overtime
         self.level = level
+        self.department = department
 
         Employee.num_employees += 1  # update counter
 
@@ -82,6 +281,9 @@ class ShopData:
     shift_full_name = ['Off', 'Morning', 'Afternoon', 'Close']
     shifts = [sn[0] for sn in shift_full_name]  # Off, Morning, Afternoon, Closing
     days = ['M', 'T', 'W', 'Th', 'F', 'St', 'Sn']
+    # Shift ids by case-folded full name and abbreviation
+    shift_lookup = {fold(name): shift_id for shift_id, names in enumerate(zip(shift_full_name, shifts))
+                    for name in names}
 
     def __init__(self, input_data_xls=None):
         self.input_data_xls = input_data_xls
@@ -115,6 +317,48 @@ class ShopData:
             (3, 0, 0)
         ]
 
+        # Daily demands of each department {department: weekly_cover_demands}. If empty, the shop wide
+        # weekly_cover_demands are met by all employees, unless shop_cover is False
+        self.department_cover_demands = {}
+        self.shop_cover = True
+
+        # Minimum number of employees filling a role on a working shift for each day of the week
+        # (role_id, shift, day, demand). Roles without demands on a shift are not staffed on it
+        self.role_cover_demands = []
+
+    def cover_groups(self):
+        """
+        Employees sharing cover constraints, and the daily demands they meet
+
+        Returns:
+            list(tuple): (employee ids, weekly_cover_demands) of each group. Empty if there are no department demands
+              and the shop wide demands do not apply, see ``shop_cover``
+        """
+        employees = self.employee_data.employees
+        if not self.department_cover_demands:
+            if not self.shop_cover:
+                return []
+            return [(list(range(len(employees))), self.weekly_cover_demands)]
+        return [([e for e in range(len(employees)) if employees[e].department == department], demands)
+                for department, demands in sorted(self.department_cover_demands.items())]
+
+    def availability(self):
+        """
+        Availability calendar of the employees, combining their unavailable shifts and the fixed assignments
+
+        Returns:
+            np.ndarray: Whether each employee can work each shift on each day, of shape
+              (num_employees, num_shifts, num_days)
+        """
+        employee_data = self.employee_data
+        available = np.ones((employee_data.num_employees, self.num_shifts, self.num_days), dtype=bool)
+        for e, s, d in employee_data.unavailable_shifts:
+            available[e, s, d] = False
+        for e, s, d in self.fixed_assignments:
+            available[e, :, d] = False
+            available[e, s, d] = True
+        return available
+
     @property
     def num_days(self):
         # In case we need it later
@@ -130,27 +374,53 @@ class ShopData:
 
     def load_weekly_headcount_demand(self):
         self.weekly_cover_demands = interface.create_shop_headcount_demand(self.input_data_xls)
+        self.department_cover_demands = interface.create_department_headcount_demand(self.input_data_xls)
 
     def load_employees(self):
         self.employee_data = EmployeeData(self.input_data_xls)
         self.employee_data.create_employee_data()
-        self.employee_data.create_requests(ShopData)
+        # The unknown names of every sheet are reported together
+        unknown = []
+        self.employee_data.create_requests(self, unknown)
+        self.employee_data.create_unavailable_shifts(self, unknown)
+        self.employee_data.create_qualifications(unknown)
+        check_references(unknown)
+
+    def load_role_demands(self, unknown=None):
+        entries = interface.create_role_demand_list(self.input_data_xls)
+        if not entries:
+            return
+        roles, shifts, days, demands = zip(*entries)
+        shift_ids = resolve_column(shifts, self.shift_id)
+        references = unknown_references('RoleDemands', 'Shift', shifts, shift_ids, range(len(entries)))
+        if unknown is None:
+            check_references(references)
+        else:
+            unknown.extend(references)
+        self.role_cover_demands.extend((self.employee_data.role_id(role), s, day, demand)
+                                       for role, s, day, demand in zip(roles, shift_ids, days, demands)
+                                       if s is not None)
+
+    @classmethod
+    def shift_id(cls, shift):
+        """
+        Id of a shift given by id, full name or abbreviation, in any case. ``None`` if unknown
+        """
+        if type(shift) is int:
+            return shift
+        if type(shift) is not str:
+            return None
+        return cls.shift_lookup.get(fold(shift))
 
     @classmethod
     def shift_mapping(cls, input_str):
         # return integer
-        if type(input_str) is int:
-            return input_str
-        elif type(input_str) is str:
-            pass
-        else:
+        if type(input_str) is not int and type(input_str) is not str:
             raise TypeError(f'Unrecognised type {type(input_str)}')
-        input_str = input_str.lower()
-
-        for shift_id in range(len(cls.shifts)):
-            if input_str == cls.shift_full_name[shift_id].lower() or input_str == cls.shifts[shift_id]:
-                return shift_id
-        raise NameError(f'Unrecognised shift name pattern {input_str}')
+        shift_id = cls.shift_id(input_str)
+        if shift_id is None:
+            raise NameError(f'Unrecognised shift name pattern {input_str}')
+        return shift_id
 
 if __name__ == '__main__':
     import pdb; pdb.set_trace()
@@ -0,0 +1,190 @@
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+from ortools.sat import sat_parameters_pb2 as sat_parameters
+import passeu.utils.objective as objective
+import passeu.utils.roster_model as roster
+from passeu.utils.solution import RosterSolution, SolutionModel, objective_arrays, objective_from_arrays
+
+# Solver statuses from best to worst, the status of a decomposed solve is the worst of its components
+STATUS_ORDER = (cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.UNKNOWN, cp_model.INFEASIBLE, cp_model.MODEL_INVALID)
+
+
+def components(shop_data):
+    """
+    Independent groups of employees, which share no constraint with the employees of other groups.
+
+    Constraints on single employees (shift sequences, weekly sums, transitions, hours) never link employees. They
+    are linked by the hyperedges of the cover groups (see ``ShopData.cover_groups``) and of the roles with cover
+    demands, whose qualified employees all share the same constraints.
+
+    Returns:
+        list(list(int)): Sorted employee ids of each component, in order of their first employee
+    """
+    employee_data = shop_data.employee_data
+    parent = list(range(employee_data.num_employees))
+
+    def find(e):
+        while parent[e] != e:
+            parent[e] = parent[parent[e]]
+            e = parent[e]
+        return e
+
+    def link(employees):
+        for e in employees[1:]:
+            parent[find(e)] = find(employees[0])
+
+    for group_employees, _ in shop_data.cover_groups():
+        link(group_employees)
+    employees_by_role = employee_data.employees_by_role()
+    for r in sorted({demand[0] for demand in shop_data.role_cover_demands}):
+        link(employees_by_role[r].tolist())
+
+    groups = {}
+    for e in range(employee_data.num_employees):
+        groups.setdefault(find(e), []).append(e)
+    return list(groups.values())
+
+
+def sub_shop(shop_data, employees):
+    """
+    Shop data restricted to some employees, renumbered in the order of ``employees``.
+
+    Department and role demands are kept if the component has an employee of the department or qualified for the
+    role. Demands nobody can meet are kept in every component, so that they remain infeasible.
+    """
+    employee_data = shop_data.employee_data
+    index = {e: i for i, e in enumerate(employees)}
+
+    sub_employee_data = copy.copy(employee_data)
+    sub_employee_data.employees = [employee_data.employees[e] for e in employees]
+    sub_employee_data.levels = {employee.level for employee in sub_employee_data.employees}
+    sub_employee_data.employee_lookup = None
+    sub_employee_data.folded_lookup = None
+    sub_employee_data.requests = [(index[e], s, d, w) for e, s, d, w in employee_data.requests if e in index]
+    sub_employee_data.unavailable_shifts = [(index[e], s, d) for e, s, d in employee_data.unavailable_shifts
+                                            if e in index]
+    sub_employee_data.qualifications = [(index[e], r) for e, r in employee_data.qualifications if e in index]
+
+    sub = copy.copy(shop_data)
+    sub.employee_data = sub_employee_data
+    sub.fixed_assignments = [(index[e], s, d) for e, s, d in shop_data.fixed_assignments if e in index]
+
+    departments = {employee.department for employee in employee_data.employees}
+    sub_departments = {employee.department for employee in sub_employee_data.employees}
+    sub.department_cover_demands = {department: demands
+                                    for department, demands in shop_data.department_cover_demands.items()
+                                    if department in sub_departments or department not in departments}
+    # Employees of departments without demands meet no cover, rather than the shop wide one
+    sub.shop_cover = shop_data.shop_cover and not shop_data.department_cover_demands
+
+    roles = {r for e, r in employee_data.qualifications}
+    sub_roles = {r for e, r in sub_employee_data.qualifications}
+    sub.role_cover_demands = [demand for demand in shop_data.role_cover_demands
+                              if demand[0] in sub_roles or demand[0] not in roles]
+    return sub
+
+
+def solve_decomposed(shop_data, rules=None, params='', max_workers=None, debug_names=False, history=None):
+    """
+    Solves the roster of each independent component of a shop as its own model, in parallel, and merges them
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        rules (dict): Scheduling rules, see ``passeu.utils.rules.DEFAULT_RULES``
+        params (str): Sat solver parameters applied to every component. Their ``num_workers``, by default the number
+          of cores, are shared between the components solved at the same time
+        max_workers (int): Number of components solved at the same time. Defaults to one per component, at most the
+          number of cores
+        debug_names (bool): Name the model variables
+        history (passeu.utils.history.FairnessHistory): Rosters published in past weeks
+
+    Returns:
+        tuple: (roster_solution, statistics). The solution is ``None`` if a component has no solution. The statistics
+          add up the conflicts and branches of the components, the wall time is the longest one
+    """
+    groups = components(shop_data)
+    print(f'Solving {len(groups)} independent components of {shop_data.employee_data.num_employees} employees')
+
+    # The history penalties of every component are relative to the same shop wide baseline
+    baseline = None
+    if history is not None:
+        baseline = history.baseline([employee.name for employee in shop_data.employee_data.employees])
+    roster_models = []
+    for employees in groups:
+        roster_model = roster.RosterModel(sub_shop(shop_data, employees), rules=rules, debug_names=debug_names,
+                                          history=history, history_baseline=baseline)
+        roster_model.build()
+        roster_models.append(roster_model)
+
+    cpu_count = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers or len(groups), len(groups), cpu_count))
+    parameters = sat_parameters.SatParameters()
+    if params:
+        text_format.Parse(params, parameters)
+    num_workers = max(1, (parameters.num_workers or cpu_count) // max_workers)
+
+    def solve(roster_model):
+        solver = cp_model.CpSolver()
+        solver.parameters.CopyFrom(parameters)
+        solver.parameters.num_workers = num_workers
+        return solver, solver.Solve(roster_model.model)
+
+    # CP-SAT releases the GIL while solving, so threads solve the components concurrently
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(solve, roster_models))
+
+    status = max((status for solver, status in results), key=STATUS_ORDER.index)
+    statistics = {'status': cp_model.CpSolver().StatusName(status),
+                  'conflicts': sum(solver.NumConflicts() for solver, _ in results),
+                  'branches': sum(solver.NumBranches() for solver, _ in results),
+                  'wall_time': max(solver.WallTime() for solver, _ in results),
+                  'deterministic_time': max(solver.ResponseProto().deterministic_time for solver, _ in results),
+                  'components': len(groups)}
+    if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+        return None, statistics
+
+    solutions = [RosterSolution.from_solver(roster_model, solver, component_status)
+                 for roster_model, (solver, component_status) in zip(roster_models, results)]
+    return merge(shop_data, groups, solutions, status), statistics
+
+
+def merge(shop_data, groups, solutions, status):
+    """
+    Roster of the full shop from the solutions of its components
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        groups (list(list(int))): Employee ids of each component, see ``components``
+        solutions (list(passeu.utils.solution.RosterSolution)): Solution of each component
+        status (int): Solver status of the merged solution
+
+    Returns:
+        passeu.utils.solution.RosterSolution: Merged solution
+    """
+    shape = (shop_data.employee_data.num_employees, shop_data.num_days)
+    shifts = np.zeros(shape, dtype=np.int64)
+    hours = np.zeros(shape, dtype=np.int64)
+    roles = np.full(shape, -1, dtype=np.int64)
+    # Objective terms of all the components, attributed to the employee ids of the full shop
+    arrays = {name: [array] for name, array in objective_arrays(objective.ObjectiveTerms()).items()}
+    for employees, roster_solution in zip(groups, solutions):
+        for name, array in objective_arrays(roster_solution.roster_model.objective).items():
+            if name in ('bool_employee', 'int_employee'):
+                array = np.where(array >= 0, np.asarray(employees)[np.maximum(array, 0)], -1)
+            arrays[name].append(array)
+    objective_terms = objective_from_arrays({name: np.concatenate(array) for name, array in arrays.items()})
+
+    for employees, roster_solution in zip(groups, solutions):
+        shifts[employees] = roster_solution.shifts
+        hours[employees] = roster_solution.hours
+        roles[employees] = roster_solution.roles
+
+    return RosterSolution(SolutionModel(shop_data, objective_terms), status,
+                          sum(roster_solution.objective_value for roster_solution in solutions), shifts, hours,
+                          np.concatenate([roster_solution.bool_penalty_values for roster_solution in solutions]),
+                          np.concatenate([roster_solution.int_penalty_values for roster_solution in solutions]),
+                          roles)
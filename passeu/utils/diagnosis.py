@@ -0,0 +1,40 @@
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+import passeu.utils.roster_model as roster
+
+
+def diagnose(shop_data, rules=None, params='', time_limit=10.):
+    """
+    Finds a set of hard rules that together make a shop infeasible.
+
+    The model is built with every hard rule family guarded by assumption literals, see
+    ``passeu.utils.roster_model.RosterModel.guard``, and solved once for feasibility only. If it is infeasible,
+    CP-SAT reports assumptions sufficient for the infeasibility, which are mapped back to the rules they guard.
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        rules (dict): Scheduling rules, see ``passeu.utils.rules.DEFAULT_RULES``
+        params (str): Sat solver parameters
+        time_limit (float): Time limit in seconds of the diagnosis solve
+
+    Returns:
+        tuple: (status, core) with the solver status name and the attribution records of the rules in the
+          infeasibility core, see ``passeu.utils.objective.describe``. The core is empty unless the status is ``INFEASIBLE``
+    """
+    roster_model = roster.RosterModel(shop_data, rules=rules, diagnose=True)
+    roster_model.build()
+    model = roster_model.model
+    model.Proto().ClearField('objective')
+
+    solver = cp_model.CpSolver()
+    if params:
+        text_format.Parse(params, solver.parameters)
+    solver.parameters.max_time_in_seconds = time_limit
+    # Infeasibility cores are only reported by a single worker
+    solver.parameters.num_workers = 1
+    status = solver.Solve(model)
+    if status != cp_model.INFEASIBLE:
+        return solver.StatusName(status), []
+
+    core = solver.ResponseProto().sufficient_assumptions_for_infeasibility
+    return solver.StatusName(status), [roster_model.guards[index] for index in core]
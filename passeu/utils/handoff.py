@@ -0,0 +1,111 @@
+import os
+import tempfile
+import uuid
+import numpy as np
+from passeu.utils.datastructures import Employee, EmployeeData, ShopData
+from passeu.utils.solution import RosterSolution, SolutionModel, objective_arrays, objective_from_arrays
+
+# Solutions are handed over from a worker process to its parent through a memory-mapped file, on the tmpfs of
+# /dev/shm where there is one. The worker writes the solution arrays into it once and the parent maps them without
+# copying, so only a small descriptor is pickled between the processes.
+SHARED_DIRECTORY = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+# Arrays are aligned to 8 bytes in the shared file, so that they can be viewed in place
+ALIGNMENT = 8
+
+
+def solution_arrays(roster_solution):
+    """
+    Arrays of a solution: roster, penalty values, objective coefficients and the attribution columns of the terms
+    """
+    arrays = {'shifts': roster_solution.shifts, 'hours': roster_solution.hours, 'roles': roster_solution.roles,
+              'bool_values': roster_solution.bool_penalty_values, 'int_values': roster_solution.int_penalty_values}
+    arrays.update(objective_arrays(roster_solution.roster_model.objective))
+    return arrays
+
+
+def share(roster_solution, directory=None):
+    """
+    Writes a solution to a new shared memory-mapped file, to hand it over to another process with ``receive``
+
+    Args:
+        roster_solution (passeu.utils.solution.RosterSolution): Solution
+        directory (str): Directory of the shared file. Defaults to ``SHARED_DIRECTORY``
+
+    Returns:
+        dict: Descriptor of the solution, with the path of the file, the dtype, shape and offset of each array in it,
+          the status, objective value and statistics of the solution and its employees, see ``shared_shop_data``
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in solution_arrays(roster_solution).items()}
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+
+    path = os.path.join(directory or SHARED_DIRECTORY, f'passeu-{uuid.uuid4().hex}.roster')
+    try:
+        with open(path, 'wb') as f:
+            f.truncate(max(offset, 1))
+            for name, dtype, shape, array_offset in layout:
+                f.seek(array_offset)
+                arrays[name].tofile(f)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return {'path': path,
+            'layout': layout,
+            'status': int(roster_solution.status),
+            'objective_value': roster_solution.objective_value,
+            'statistics': roster_solution.statistics,
+            'employees': [[employee.name, employee.contract_weekly_hours, employee.level, employee.maximum_overtime,
+                           employee.department]
+                          for employee in roster_solution.roster_model.shop_data.employee_data.employees]}
+
+
+def shared_shop_data(employees):
+    """
+    Shop data of a handed over solution, holding its employees only: the solution is received without reading the
+    input file again
+    """
+    shop_data = ShopData()
+    employee_data = EmployeeData()
+    employee_data.employees = [Employee(name, contract_weekly_hours, level=level, maximum_overtime=maximum_overtime,
+                                        department=department)
+                               for name, contract_weekly_hours, level, maximum_overtime, department in employees]
+    employee_data.levels = {employee.level for employee in employee_data.employees}
+    shop_data.employee_data = employee_data
+    return shop_data
+
+
+def receive(descriptor):
+    """
+    Maps a solution handed over with ``share``. The arrays are copy-on-write views of the shared file, which is
+    removed at once, even if it cannot be mapped: its memory is released when the arrays are no longer used
+
+    Args:
+        descriptor (dict): Descriptor returned by ``share``
+
+    Returns:
+        passeu.utils.solution.RosterSolution: Solution, with the shop data of ``shared_shop_data``
+    """
+    path = descriptor['path']
+    try:
+        buffer = np.memmap(path, dtype=np.uint8, mode='c')
+    finally:
+        os.remove(path)
+
+    arrays = {}
+    for name, dtype, shape, offset in descriptor['layout']:
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        arrays[name] = buffer[offset:offset + size].view(dtype).reshape(shape)
+
+    shop_data = shared_shop_data(descriptor['employees'])
+    roster_solution = RosterSolution(SolutionModel(shop_data, objective_from_arrays(arrays)), descriptor['status'],
+                                     descriptor['objective_value'], arrays['shifts'], arrays['hours'],
+                                     arrays['bool_values'], arrays['int_values'], arrays['roles'])
+    roster_solution.statistics = descriptor['statistics']
+    return roster_solution
@@ -0,0 +1,137 @@
+import numpy as np
+
+# Aggregates kept for each employee and week
+CLOSE_SHIFTS = 'close_shifts'  # number of close shifts worked
+WEEKENDS_WORKED = 'weekends_worked'  # 1 if any weekend day was worked
+OVERTIME_HOURS = 'overtime_hours'  # hours worked over the contract hours
+
+METRICS = (CLOSE_SHIFTS, WEEKENDS_WORKED, OVERTIME_HOURS)
+
+CLOSE_SHIFT = 3  # ShopData.shifts index of the close shift
+WEEKEND_DAYS = (5, 6)  # Saturday and Sunday
+
+
+def weekly_aggregates(roster_solution, week):
+    """
+    ``METRICS`` of each employee of a solved roster over one of its weeks
+
+    Returns:
+        np.ndarray: Aggregates of shape (num_employees, len(METRICS))
+    """
+    employees = roster_solution.roster_model.shop_data.employee_data.employees
+    contract_hours = np.array([employee.contract_weekly_hours for employee in employees], dtype=np.int64)
+    return aggregate_week(roster_solution.shifts[:, week * 7:(week + 1) * 7],
+                          roster_solution.hours[:, week * 7:(week + 1) * 7], contract_hours)
+
+
+def aggregate_week(shifts, hours, contract_hours):
+    """
+    ``METRICS`` of each employee from their shifts and hours over a week, of shape (num_employees, 7), and their
+    contract hours
+
+    Returns:
+        np.ndarray: Aggregates of shape (num_employees, len(METRICS))
+    """
+    aggregates = np.zeros((len(shifts), len(METRICS)), dtype=np.int64)
+    aggregates[:, METRICS.index(CLOSE_SHIFTS)] = (shifts == CLOSE_SHIFT).sum(axis=1)
+    aggregates[:, METRICS.index(WEEKENDS_WORKED)] = (shifts[:, list(WEEKEND_DAYS)] != 0).any(axis=1)
+    aggregates[:, METRICS.index(OVERTIME_HOURS)] = np.maximum(0, hours.sum(axis=1) - contract_hours)
+    return aggregates
+
+
+class FairnessHistory:
+    """
+    Rolling aggregates of the rosters published over the last ``num_weeks`` weeks, by employee name.
+
+    Only the weekly ``METRICS`` of each employee are kept, in a ring buffer of ``num_weeks`` slots, together with
+    their running totals. Publishing a week replaces the oldest slot and updates the totals with the difference, so
+    neither past rosters nor the whole buffer are scanned again.
+
+    Args:
+        num_weeks (int): Number of past weeks aggregated
+    """
+
+    def __init__(self, num_weeks=8):
+        self.num_weeks = num_weeks
+        self.names = []
+        self.lookup = {}  # dict name: row
+        self.weeks = np.zeros((num_weeks, 0, len(METRICS)), dtype=np.int64)
+        self.totals = np.zeros((0, len(METRICS)), dtype=np.int64)
+        self.position = 0  # slot of the next published week
+        self.num_published = 0
+
+    def _rows(self, names):
+        new_names = [name for name in dict.fromkeys(names) if name not in self.lookup]
+        if new_names:
+            for name in new_names:
+                self.lookup[name] = len(self.names)
+                self.names.append(name)
+            self.weeks = np.concatenate(
+                [self.weeks, np.zeros((self.num_weeks, len(new_names), len(METRICS)), dtype=np.int64)], axis=1)
+            self.totals = np.concatenate(
+                [self.totals, np.zeros((len(new_names), len(METRICS)), dtype=np.int64)])
+        return np.array([self.lookup[name] for name in names], dtype=np.int64)
+
+    def publish_week(self, names, aggregates):
+        """
+        Adds the aggregates of a week, see ``weekly_aggregates``. Employees not in ``names`` count as idle that week
+        """
+        rows = self._rows(names)
+        slot = self.weeks[self.position]
+        self.totals -= slot
+        slot[:] = 0
+        slot[rows] = aggregates
+        self.totals += slot
+        self.position = (self.position + 1) % self.num_weeks
+        self.num_published += 1
+
+    def publish(self, roster_solutions):
+        """
+        Adds every week of the rosters published together, e.g. those of the shops of a batch. They must span the same
+        weeks
+        """
+        names = [employee.name for roster_solution in roster_solutions
+                 for employee in roster_solution.roster_model.shop_data.employee_data.employees]
+        num_weeks = roster_solutions[0].roster_model.shop_data.num_weeks
+        for w in range(num_weeks):
+            self.publish_week(names, np.concatenate([weekly_aggregates(roster_solution, w)
+                                                     for roster_solution in roster_solutions]))
+
+    def rolling(self, names):
+        """
+        Totals of ``METRICS`` over the last ``num_weeks`` weeks, zero for employees without history
+
+        Returns:
+            np.ndarray: Totals of shape (len(names), len(METRICS))
+        """
+        totals = np.zeros((len(names), len(METRICS)), dtype=np.int64)
+        for i, name in enumerate(names):
+            if name in self.lookup:
+                totals[i] = self.totals[self.lookup[name]]
+        return totals
+
+    def baseline(self, names):
+        """
+        Mean totals of ``METRICS`` over the employees ``names``, from which their excess is penalised
+
+        Returns:
+            np.ndarray: Mean totals of shape (len(METRICS),)
+        """
+        return self.rolling(names).mean(axis=0)
+
+    def save(self, history_file):
+        with open(history_file, 'wb') as f:
+            np.savez(f, names=np.array(self.names, dtype=str), weeks=self.weeks, totals=self.totals,
+                     position=self.position, num_published=self.num_published)
+
+    @classmethod
+    def load(cls, history_file):
+        with np.load(history_file) as data:
+            history = cls(num_weeks=data['weeks'].shape[0])
+            history.names = data['names'].tolist()
+            history.lookup = {name: row for row, name in enumerate(history.names)}
+            history.weeks = data['weeks']
+            history.totals = data['totals']
+            history.position = int(data['position'])
+            history.num_published = int(data['num_published'])
+        return history
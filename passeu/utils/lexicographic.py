@@ -0,0 +1,75 @@
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+import passeu.utils.objective as objective
+
+# Default stages: meet the shop cover first, then employee requests and fairness
+DEFAULT_STAGES = [
+    (objective.COVER,),
+    (objective.REQUESTS, objective.FAIRNESS),
+]
+
+
+def solve_lexicographic(roster_model, stages=None, params='', stage_time_limits=None, tolerances=None):
+    """
+    Solves the roster model one objective stage at a time.
+
+    Each stage minimises the penalty terms of its objective groups only. Once solved, the stage objective is
+    constrained to stay within ``tolerance`` of the best value found and the solution is passed as a hint to the
+    next stage. The stage constraints are removed once solved, leaving the model as built.
+
+    Args:
+        roster_model (passeu.utils.roster_model.RosterModel): Built roster model
+        stages (list(tuple(str))): Objective groups minimised at each stage, in order of priority.
+          Defaults to ``DEFAULT_STAGES``
+        params (str): Sat solver parameters applied to every stage
+        stage_time_limits (list(float)): Time limit in seconds of each stage. Overrides the time limit in ``params``
+        tolerances (list(int)): Objective value each stage is allowed to degrade by in subsequent stages.
+          Defaults to 0 (stage optimum is kept)
+
+    Returns:
+        tuple: (solver, status) of the last stage solved. If a stage fails to find a solution, the search
+          stops at that stage. The solver objective value is that of the last stage only, see
+          ``passeu.utils.solution.RosterSolution.penalty_total`` for the full objective of the solution
+    """
+    if stages is None:
+        stages = DEFAULT_STAGES
+    if stage_time_limits is not None and len(stage_time_limits) != len(stages):
+        raise ValueError(f'Expected {len(stages)} stage time limits and got {len(stage_time_limits)}')
+    if tolerances is None:
+        tolerances = [0] * len(stages)
+    elif len(tolerances) != len(stages):
+        raise ValueError(f'Expected {len(stages)} stage tolerances and got {len(tolerances)}')
+
+    model = roster_model.model
+    num_constraints = len(model.Proto().constraints)
+    solver = None
+    status = cp_model.UNKNOWN
+    stage_values = []
+    for i_stage, groups in enumerate(stages):
+        roster_model.minimize(groups)
+
+        solver = cp_model.CpSolver()
+        if params:
+            text_format.Parse(params, solver.parameters)
+        if stage_time_limits is not None:
+            solver.parameters.max_time_in_seconds = float(stage_time_limits[i_stage])
+
+        print(f'Stage {i_stage} ({", ".join(groups)})')
+        status = solver.Solve(model, cp_model.ObjectiveSolutionPrinter())
+        print(f'  - status          : {solver.StatusName(status)}')
+        print(f'  - objective       : {solver.ObjectiveValue()}')
+
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            break
+        stage_values.append(solver.ObjectiveValue())
+
+        if i_stage < len(stages) - 1:
+            best_value = int(round(solver.ObjectiveValue()))
+            roster_model.objective.add_upper_bound(model, best_value + tolerances[i_stage], groups)
+            roster_model.add_solution_hints(solver)
+
+    print(f'Stage objectives: {stage_values}')
+    # The model minimises every group again without the stage bounds, as built
+    del model.Proto().constraints[num_constraints:]
+    roster_model.minimize()
+    return solver, status
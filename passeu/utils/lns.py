@@ -0,0 +1,196 @@
+import random
+import time
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+
+# Neighbourhoods freeing part of the roster for re-optimisation
+EMPLOYEES = 'employees'  # a few employees, all days
+DAYS = 'days'  # a window of consecutive days, all employees
+LEVEL = 'level'  # all employees of one level
+WEEK = 'week'  # all employees, one week
+
+NEIGHBOURHOODS = (EMPLOYEES, DAYS, LEVEL, WEEK)
+
+
+class RosterLNS:
+    """
+    Large neighbourhood search over the ``work`` and ``work_hours`` variables of a roster model.
+
+    Starting from a first solution, each iteration fixes the roster of every (employee, day) outside a
+    neighbourhood to the best solution found so far, hints the free part with it and re-optimises with a short
+    time limit. Neighbourhoods are chosen at random with a probability proportional to their recent success, and
+    their size grows when they are solved to optimality without improvement and shrinks when they time out.
+
+    Args:
+        roster_model (passeu.utils.roster_model.RosterModel): Built roster model
+        params (str): Sat solver parameters applied to every solve
+        neighbourhood_time_limit (float): Time limit in seconds of each neighbourhood solve
+        num_employees_free (int): Initial number of employees freed by the ``employees`` neighbourhood
+        num_days_free (int): Initial number of days freed by the ``days`` neighbourhood
+        seed (int): Seed of the neighbourhood selection
+
+    Attributes:
+        timeline (list(tuple)): (wall_time, objective, best_bound) of the first solution and of each improvement,
+          timed from the start of the search. The bound is that of the first solve, neighbourhood bounds only hold
+          for their neighbourhood
+    """
+
+    decay = 0.3  # weight of the last outcome in the neighbourhood score
+    min_score = 0.05
+
+    def __init__(self, roster_model, params='', neighbourhood_time_limit=1.0, num_employees_free=5,
+                 num_days_free=2, seed=0):
+        self.roster_model = roster_model
+        self.params = params
+        self.neighbourhood_time_limit = neighbourhood_time_limit
+        self.random = random.Random(seed)
+
+        shop_data = roster_model.shop_data
+        self.num_employees = shop_data.employee_data.num_employees
+        self.num_days = shop_data.num_days
+        self.num_weeks = shop_data.num_weeks
+
+        employees = shop_data.employee_data.employees
+        self.level_groups = {}
+        for e in range(self.num_employees):
+            self.level_groups.setdefault(employees[e].level, []).append(e)
+
+        self.sizes = {EMPLOYEES: min(num_employees_free, self.num_employees),
+                      DAYS: min(num_days_free, self.num_days)}
+        self.scores = {name: 1. for name in self.available_neighbourhoods()}
+
+        self.best_solver = None
+        self.best_objective = None
+        self.iterations = 0
+        self.improvements = 0
+        self.timeline = []
+
+    def available_neighbourhoods(self):
+        neighbourhoods = [EMPLOYEES, DAYS]
+        if len(self.level_groups) > 1:
+            neighbourhoods.append(LEVEL)
+        if self.num_weeks > 1:
+            neighbourhoods.append(WEEK)
+        return neighbourhoods
+
+    def new_solver(self, time_limit):
+        solver = cp_model.CpSolver()
+        if self.params:
+            text_format.Parse(self.params, solver.parameters)
+        solver.parameters.max_time_in_seconds = float(time_limit)
+        return solver
+
+    def select_neighbourhood(self):
+        names = list(self.scores)
+        return self.random.choices(names, weights=[self.scores[name] for name in names])[0]
+
+    def free_pairs(self, neighbourhood):
+        """
+        Returns the set of (employee, day) left free by the neighbourhood
+        """
+        if neighbourhood == EMPLOYEES:
+            employees = self.random.sample(range(self.num_employees), self.sizes[EMPLOYEES])
+            return {(e, d) for e in employees for d in range(self.num_days)}
+        elif neighbourhood == DAYS:
+            start = self.random.randrange(self.num_days - self.sizes[DAYS] + 1)
+            return {(e, d) for e in range(self.num_employees) for d in range(start, start + self.sizes[DAYS])}
+        elif neighbourhood == LEVEL:
+            employees = self.level_groups[self.random.choice(list(self.level_groups))]
+            return {(e, d) for e in employees for d in range(self.num_days)}
+        elif neighbourhood == WEEK:
+            w = self.random.randrange(self.num_weeks)
+            return {(e, d) for e in range(self.num_employees) for d in range(w * 7, (w + 1) * 7)}
+        raise NameError(f'Unrecognised neighbourhood {neighbourhood}')
+
+    def neighbourhood_model(self, free):
+        """
+        Copy of the model with the roster outside ``free`` fixed to, and all of it hinted with, the best solution
+        """
+        model = self.roster_model.model
+        neighbour = cp_model.CpModel()
+        neighbour.Proto().CopyFrom(model.Proto())
+        proto = neighbour.Proto()
+        proto.ClearField('solution_hint')
+
+        solver = self.best_solver
+        for (e, s, d), var in self.roster_model.work.items():
+            if not self.roster_model.available[e, s, d]:
+                continue
+            value = int(solver.BooleanValue(var))
+            proto.solution_hint.vars.append(var.Index())
+            proto.solution_hint.values.append(value)
+            if (e, d) not in free:
+                proto.variables[var.Index()].domain[:] = [value, value]
+        for (e, d), var in self.roster_model.work_hours.items():
+            value = solver.Value(var)
+            proto.solution_hint.vars.append(var.Index())
+            proto.solution_hint.values.append(value)
+            if (e, d) not in free:
+                proto.variables[var.Index()].domain[:] = [value, value]
+        return neighbour
+
+    def update(self, neighbourhood, improved, status):
+        reward = 1. if improved else 0.
+        self.scores[neighbourhood] = max(self.min_score,
+                                         (1 - self.decay) * self.scores[neighbourhood] + self.decay * reward)
+
+        if neighbourhood not in self.sizes:
+            return
+        limit = self.num_employees if neighbourhood == EMPLOYEES else self.num_days
+        if status == cp_model.OPTIMAL and not improved:
+            self.sizes[neighbourhood] = min(limit, self.sizes[neighbourhood] + 1)
+        elif status != cp_model.OPTIMAL:
+            self.sizes[neighbourhood] = max(1, self.sizes[neighbourhood] - 1)
+
+    def solve(self, time_limit, initial_time_limit=None):
+        """
+        Runs the large neighbourhood search
+
+        Args:
+            time_limit (float): Total time limit in seconds, including the first solution
+            initial_time_limit (float): Time limit in seconds of the first solution search.
+              Defaults to the neighbourhood time limit
+
+        Returns:
+            tuple: (solver, status) where solver holds the best solution found. The status is ``OPTIMAL`` only if
+              the first solve proved optimality.
+        """
+        start_time = time.time()
+        if initial_time_limit is None:
+            initial_time_limit = self.neighbourhood_time_limit
+
+        solver = self.new_solver(initial_time_limit)
+        status = solver.Solve(self.roster_model.model)
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            return solver, status
+        self.best_solver = solver
+        self.best_objective = solver.ObjectiveValue()
+        best_bound = solver.BestObjectiveBound()
+        self.timeline.append((time.time() - start_time, self.best_objective, best_bound))
+        print(f'LNS initial solution, objective {self.best_objective}')
+        if status == cp_model.OPTIMAL:
+            return solver, status
+
+        while True:
+            remaining_time = time_limit - (time.time() - start_time)
+            if remaining_time <= 0:
+                break
+
+            neighbourhood = self.select_neighbourhood()
+            neighbour = self.neighbourhood_model(self.free_pairs(neighbourhood))
+
+            solver = self.new_solver(min(self.neighbourhood_time_limit, remaining_time))
+            neighbour_status = solver.Solve(neighbour)
+            improved = ((neighbour_status == cp_model.OPTIMAL or neighbour_status == cp_model.FEASIBLE)
+                        and solver.ObjectiveValue() < self.best_objective)
+            if improved:
+                self.best_solver = solver
+                self.best_objective = solver.ObjectiveValue()
+                self.improvements += 1
+                self.timeline.append((time.time() - start_time, self.best_objective, best_bound))
+                print(f'LNS iteration {self.iterations} ({neighbourhood}), objective {self.best_objective}')
+
+            self.update(neighbourhood, improved, neighbour_status)
+            self.iterations += 1
+
+        return self.best_solver, cp_model.FEASIBLE
@@ -0,0 +1,94 @@
+import re
+import resource
+import sys
+import time
+
+# Memory use is read from /proc on Linux. Elsewhere only the peak of the whole process is known, from getrusage
+
+
+def _proc_status(field):
+    try:
+        with open('/proc/self/status', 'r') as f:
+            match = re.search(rf'^{field}:\s+(\d+) kB', f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 if match else None
+
+
+def rss():
+    """
+    Resident set size of the process in bytes, ``None`` if unknown
+    """
+    return _proc_status('VmRSS')
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process in bytes, since the last ``reset_peak_rss`` if it succeeded
+    """
+    peak = _proc_status('VmHWM')
+    if peak is None:
+        # Kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return peak
+
+
+def reset_peak_rss():
+    """
+    Resets the peak resident set size to the current one, so that the peak of a phase can be measured
+
+    Returns:
+        bool: Whether the peak was reset, which needs Linux
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+class MemoryProfile:
+    """
+    Wall time and memory use of the consecutive phases of a computation, e.g. of ``RosterModel.build``
+
+    A phase ends, and the next one starts, at each ``checkpoint``. The peak resident set size of a phase is its own
+    where the peak can be reset, and that of the process so far otherwise.
+
+    Attributes:
+        phases (list(dict)): ``name``, ``seconds``, ``rss`` at the end, ``rss_delta`` and ``peak_rss`` of each phase,
+          memory in bytes
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.per_phase_peak = reset_peak_rss()
+        self._start = time.perf_counter()
+        self._rss = rss()
+
+    def checkpoint(self, name):
+        now = time.perf_counter()
+        current = rss()
+        self.phases.append({'name': name,
+                            'seconds': now - self._start,
+                            'rss': current,
+                            'rss_delta': None if current is None or self._rss is None else current - self._rss,
+                            'peak_rss': peak_rss()})
+        if self.per_phase_peak:
+            reset_peak_rss()
+        self._start = time.perf_counter()
+        self._rss = rss()
+
+    def peak(self):
+        """
+        Highest peak resident set size over the phases, in bytes
+        """
+        return max((phase['peak_rss'] for phase in self.phases), default=None)
+
+    def report(self):
+        print('Memory per phase (MB)' + ('' if self.per_phase_peak else ', peaks since the process start'))
+        print('  phase                 seconds      rss    delta     peak')
+        megabyte = 2 ** 20
+        for phase in self.phases:
+            print(f'  {phase["name"]:20s} {phase["seconds"]:8.2f} {(phase["rss"] or 0) / megabyte:8.1f} '
+                  f'{(phase["rss_delta"] or 0) / megabyte:8.1f} {phase["peak_rss"] / megabyte:8.1f}')
@@ -0,0 +1,223 @@
+from array import array
+import numpy as np
+
+
+# Objective groups. Every penalty term added to the model belongs to one of these
+COVER = 'cover'  # shop headcount and experience demands
+REQUESTS = 'requests'  # employee shift requests
+FAIRNESS = 'fairness'  # sequences, weekly sums, transitions and overtime
+
+GROUPS = (COVER, REQUESTS, FAIRNESS)
+
+# Rules penalty terms are attributed to
+REQUEST = 'request'
+SHIFT_SEQUENCE = 'shift_sequence'
+WEEKLY_SUM = 'weekly_sum'
+TRANSITION = 'transition'
+EXCESS_COVER = 'excess_cover'
+DAILY_EXPERIENCE = 'daily_experience'
+SHIFT_EXPERIENCE = 'shift_experience'
+OVERTIME = 'overtime'
+HISTORY = 'history'  # close shifts and weekends of employees who did more than their share in past weeks
+
+RULES = (REQUEST, SHIFT_SEQUENCE, WEEKLY_SUM, TRANSITION, EXCESS_COVER, DAILY_EXPERIENCE, SHIFT_EXPERIENCE, OVERTIME,
+         HISTORY)
+
+# Attribution fields of a penalty term, -1 when a term does not relate to a given field. ``shift`` is the shift
+# penalised, and ``previous_shift`` the shift worked the day before for transitions
+FIELDS = ('employee', 'day', 'week', 'shift', 'level', 'previous_shift')
+
+# Fields of the hard rule guards besides ``FIELDS``, see ``passeu.utils.roster_model.RosterModel.guard``
+GUARD_FIELDS = ('role',)
+
+
+class PenaltyIndex:
+    """
+    Compact attribution of penalty terms: group, rule and ``FIELDS`` of each term stored as integer arrays
+
+    Fields can be given for each batch of terms either as a single value shared by all terms or as a sequence with
+    one value per term.
+    """
+
+    def __init__(self):
+        self.group = array('i')
+        self.rule = array('i')
+        self.fields = {field: array('i') for field in FIELDS}
+
+    def __len__(self):
+        return len(self.rule)
+
+    @staticmethod
+    def _extend(column, value, num_terms):
+        if isinstance(value, int):
+            column.extend([value] * num_terms)
+        else:
+            if len(value) != num_terms:
+                raise ValueError(f'Expected {num_terms} attribution values and got {len(value)}')
+            column.extend(value)
+
+    def append(self, num_terms, group, rule, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise KeyError(f'Unknown attribution fields {unknown}')
+
+        self.group.extend([GROUPS.index(group)] * num_terms)
+        self.rule.extend([RULES.index(rule)] * num_terms)
+        for field in FIELDS:
+            self._extend(self.fields[field], fields.get(field, -1), num_terms)
+
+    def column(self, field):
+        """
+        Attribution column as an integer array. ``field`` is one of ``FIELDS``, ``'group'`` or ``'rule'``
+        """
+        if field == 'group':
+            column = self.group
+        elif field == 'rule':
+            column = self.rule
+        else:
+            column = self.fields[field]
+        return np.frombuffer(column, dtype=np.int32) if len(column) else np.zeros(0, dtype=np.int32)
+
+    def columns(self):
+        """
+        All attribution columns as a dictionary of integer arrays, see ``from_columns``
+        """
+        return {field: self.column(field) for field in ('group', 'rule') + FIELDS}
+
+    @classmethod
+    def from_columns(cls, columns):
+        index = cls()
+        index.group.frombytes(np.ascontiguousarray(columns['group'], dtype=np.int32).tobytes())
+        index.rule.frombytes(np.ascontiguousarray(columns['rule'], dtype=np.int32).tobytes())
+        for field in FIELDS:
+            index.fields[field].frombytes(np.ascontiguousarray(columns[field], dtype=np.int32).tobytes())
+        return index
+
+    def record(self, i):
+        """
+        Attribution of term ``i`` as a dictionary, with the group and rule names and only the fields that apply
+        """
+        record = {'group': GROUPS[self.group[i]], 'rule': RULES[self.rule[i]]}
+        for field in FIELDS:
+            if self.fields[field][i] >= 0:
+                record[field] = self.fields[field][i]
+        return record
+
+    def describe(self, i):
+        return describe(self.record(i))
+
+
+def describe(record):
+    """
+    Human readable description of a penalty term attribution record, e.g. ``weekly_sum(employee=1, week=0)``, or of
+    a guarded hard rule record, e.g. ``role_cover(day=2, shift=1, role=0)``
+    """
+    details = ', '.join(f'{field}={record[field]}' for field in FIELDS + GUARD_FIELDS if field in record)
+    return f'{record["rule"]}({details})'
+
+
+class ObjectiveTerms:
+    """
+    Linear terms of the objective in a minimisation context, attributed to the group, rule, employee, day, week,
+    shift and level they penalise.
+
+    Boolean and integer terms are kept in separate lists as they are reported differently once solved. Only the proto
+    indices of their variables are kept, negative for negated literals, and the objective is written straight into
+    the model proto, so that no Python variable object outlives the constraint it was created for.
+    """
+
+    def __init__(self):
+        self.bool_indices = array('q')
+        self.bool_coeffs = []
+        self.bool_index = PenaltyIndex()
+
+        self.int_indices = array('q')
+        self.int_coeffs = []
+        self.int_index = PenaltyIndex()
+
+    def __len__(self):
+        return len(self.bool_indices) + len(self.int_indices)
+
+    def add_bool_terms(self, variables, coefficients, group, rule, **fields):
+        """
+        Adds Boolean penalty terms
+
+        Args:
+            variables (list): Literals
+            coefficients (list(int)): Penalty of each literal assigned to true
+            group (str): Objective group, one of ``GROUPS``
+            rule (str): Rule the terms are attributed to, one of ``RULES``
+
+        Keyword Args:
+            employee, day, week, shift, level (int or list(int)): Attribution of the terms
+        """
+        self.bool_indices.extend(var.Index() for var in variables)
+        self.bool_coeffs.extend(coefficients)
+        self.bool_index.append(len(variables), group, rule, **fields)
+
+    def add_int_terms(self, variables, coefficients, group, rule, **fields):
+        """
+        Adds integer penalty terms. See ``add_bool_terms``, ``variables`` may also be an array of proto indices
+        """
+        if isinstance(variables, np.ndarray):
+            self.int_indices.extend(variables.tolist())
+        else:
+            self.int_indices.extend(var.Index() for var in variables)
+        self.int_coeffs.extend(coefficients)
+        self.int_index.append(len(variables), group, rule, **fields)
+
+    def linear_terms(self, groups=None):
+        """
+        Weighted sum of the objective terms over positive variable references: a negated literal ``not(x)`` with
+        coefficient ``c`` is rewritten ``c - c * x``, and the coefficients of a variable in several terms are added up
+
+        Args:
+            groups (iterable(str)): Objective groups to include. If ``None`` all terms are included.
+
+        Returns:
+            tuple: (variables, coefficients, offset) with the proto indices and coefficients as integer arrays
+        """
+        indices = np.concatenate([np.array(self.bool_indices, dtype=np.int64),
+                                  np.array(self.int_indices, dtype=np.int64)])
+        coefficients = np.concatenate([np.array(self.bool_coeffs, dtype=np.int64),
+                                       np.array(self.int_coeffs, dtype=np.int64)])
+        if groups is not None:
+            group_ids = [GROUPS.index(group) for group in groups]
+            selected = np.isin(np.concatenate([self.bool_index.column('group'), self.int_index.column('group')]),
+                               group_ids)
+            indices = indices[selected]
+            coefficients = coefficients[selected]
+
+        negated = indices < 0
+        offset = int(coefficients[negated].sum())
+        indices = np.where(negated, -indices - 1, indices)
+        coefficients = np.where(negated, -coefficients, coefficients)
+
+        variables, inverse = np.unique(indices, return_inverse=True)
+        summed = np.zeros(len(variables), dtype=np.int64)
+        np.add.at(summed, inverse, coefficients)
+        nonzero = summed != 0
+        return variables[nonzero], summed[nonzero], offset
+
+    def set_objective(self, model, groups=None):
+        """
+        Sets the objective of ``model`` to the minimisation of the terms in ``groups`` (all if ``None``)
+        """
+        variables, coefficients, offset = self.linear_terms(groups)
+        proto = model.Proto()
+        proto.ClearField('objective')
+        proto.objective.vars.extend(variables.tolist())
+        proto.objective.coeffs.extend(coefficients.tolist())
+        proto.objective.offset = offset
+
+    def add_upper_bound(self, model, upper_bound, groups=None):
+        """
+        Constrains the weighted sum of the terms in ``groups`` (all if ``None``) to at most ``upper_bound``
+        """
+        from ortools.sat.python import cp_model
+
+        variables, coefficients, offset = self.linear_terms(groups)
+        linear = model.Proto().constraints.add().linear
+        linear.vars.extend(variables.tolist())
+        linear.coeffs.extend(coefficients.tolist())
+        linear.domain.extend([cp_model.INT_MIN, int(upper_bound) - offset])
@@ -0,0 +1,174 @@
+import numpy as np
+import passeu.utils.roster_model as roster
+
+# Checks run on the shop data before a model is built. Each of them finds inputs the model cannot satisfy, they are
+# necessary conditions only: a shop passing them all can still be infeasible.
+INDEX_RANGE = 'index_range'  # employee, shift, day and role ids within the shop
+FIXED_ASSIGNMENTS = 'fixed_assignments'  # fixed assignments agree with each other and with availability
+CONTRACT_HOURS = 'contract_hours'  # contract hours are a sum of daily hours over the days an employee can work
+COVER = 'cover'  # enough available employees for the cover demands
+ROLE_COVER = 'role_cover'  # enough qualified, available employees for the role demands
+
+CHECKS = (INDEX_RANGE, FIXED_ASSIGNMENTS, CONTRACT_HOURS, COVER, ROLE_COVER)
+
+
+def issue(check, message, **fields):
+    """
+    Precheck issue record, with the ``check`` that failed, a human readable ``message`` and the employee, day, shift
+    or role it relates to
+    """
+    return dict(check=check, message=message, **fields)
+
+
+def precheck(shop_data, rules=None):
+    """
+    Fast capacity and consistency checks of a shop, to find obvious infeasibilities before solving
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        rules (dict): Scheduling rules, see ``passeu.utils.rules.DEFAULT_RULES``
+
+    Returns:
+        list(dict): Issues found, see ``issue``. Empty if all checks pass
+    """
+    if rules is None:
+        rules = roster.DEFAULT_RULES
+
+    issues = check_index_range(shop_data)
+    if issues:
+        # The other checks index arrays with these ids
+        return issues
+    issues.extend(check_fixed_assignments(shop_data, rules))
+    available = shop_data.availability()
+    issues.extend(check_contract_hours(shop_data, rules, available))
+    issues.extend(check_cover(shop_data, available))
+    issues.extend(check_role_cover(shop_data, available))
+    return issues
+
+
+def check_index_range(shop_data):
+    employee_data = shop_data.employee_data
+    num_employees = employee_data.num_employees
+    num_roles = len(employee_data.roles)
+
+    def out_of_range(entries, bounds):
+        return [entry for entry in entries
+                if any(not 0 <= value < bound for value, bound in zip(entry, bounds) if bound is not None)]
+
+    issues = []
+    for name, entries, bounds in (
+            ('fixed assignment', shop_data.fixed_assignments, (num_employees, shop_data.num_shifts, shop_data.num_days)),
+            ('request', employee_data.requests, (num_employees, shop_data.num_shifts, shop_data.num_days, None)),
+            ('unavailable shift', employee_data.unavailable_shifts,
+             (num_employees, shop_data.num_shifts, shop_data.num_days)),
+            ('qualification', employee_data.qualifications, (num_employees, num_roles)),
+            ('role demand', shop_data.role_cover_demands, (num_roles, shop_data.num_shifts, 7, None))):
+        for entry in out_of_range(entries, bounds):
+            issues.append(issue(INDEX_RANGE, f'{name} {tuple(entry)} is out of range'))
+    return issues
+
+
+def check_fixed_assignments(shop_data, rules):
+    employees = shop_data.employee_data.employees
+    issues = []
+
+    fixed = {}
+    for e, s, d in shop_data.fixed_assignments:
+        if fixed.get((e, d), s) != s:
+            issues.append(issue(FIXED_ASSIGNMENTS,
+                                f'{employees[e].name} is fixed to shifts {shop_data.shifts[fixed[e, d]]} and '
+                                f'{shop_data.shifts[s]} on day {d}', employee=e, day=d))
+        fixed[e, d] = s
+
+    unavailable = set(shop_data.employee_data.unavailable_shifts)
+    for (e, d), s in fixed.items():
+        if (e, s, d) in unavailable:
+            issues.append(issue(FIXED_ASSIGNMENTS,
+                                f'{employees[e].name} is fixed to shift {shop_data.shifts[s]} on day {d} but is not '
+                                f'available for it', employee=e, day=d, shift=s))
+
+    for previous_shift, next_shift, cost in rules['penalized_transitions']:
+        if cost != 0:
+            continue
+        for (e, d), s in fixed.items():
+            if s == previous_shift and fixed.get((e, d + 1)) == next_shift:
+                issues.append(issue(FIXED_ASSIGNMENTS,
+                                    f'{employees[e].name} is fixed to the forbidden transition from shift '
+                                    f'{shop_data.shifts[s]} on day {d} to shift {shop_data.shifts[next_shift]}',
+                                    employee=e, day=d))
+    return issues
+
+
+def reachable_hours(num_days):
+    """
+    Total hours reachable working exactly ``k`` days, for k from 0 to ``num_days``
+
+    Returns:
+        list(set(int)): Hours reachable with each number of working days
+    """
+    day_hours = [hours for hours in roster.DAILY_HOURS if hours > 0]
+    reachable = [{0}]
+    for k in range(num_days):
+        reachable.append({total + hours for total in reachable[-1] for hours in day_hours})
+    return reachable
+
+
+def check_contract_hours(shop_data, rules, available):
+    num_days = shop_data.num_days
+    # Off days allowed by the hard limits of the weekly sum of rest days
+    min_off, max_off = 0, num_days
+    for shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost in rules['weekly_sum_constraints']:
+        if shift == 0:
+            min_off = max(min_off, hard_min * shop_data.num_weeks)
+            max_off = min(max_off, hard_max * shop_data.num_weeks)
+
+    forced_off = (~available[:, 1:, :].any(axis=1)).sum(axis=1)
+    forced_work = (~available[:, 0, :]).sum(axis=1)
+    min_work = np.maximum(forced_work, num_days - max_off)
+    max_work = np.minimum(num_days - forced_off, num_days - min_off)
+
+    reachable = reachable_hours(num_days)
+    issues = []
+    for e, employee in enumerate(shop_data.employee_data.employees):
+        hours = employee.contract_weekly_hours
+        if not any(hours in reachable[k] for k in range(min_work[e], max_work[e] + 1)):
+            issues.append(issue(CONTRACT_HOURS,
+                                f'{employee.name} cannot work {hours} contract hours in {min_work[e]} to '
+                                f'{max_work[e]} days of {"/".join(map(str, roster.DAILY_HOURS[1:]))} hours',
+                                employee=e))
+    return issues
+
+
+def check_cover(shop_data, available):
+    issues = []
+    for employees, weekly_cover_demands in shop_data.cover_groups():
+        group_available = available[employees]
+        for d in range(shop_data.num_days):
+            demands = weekly_cover_demands[d % 7]
+            for s in range(1, shop_data.num_shifts):
+                supply = int(group_available[:, s, d].sum())
+                if supply < demands[s - 1]:
+                    issues.append(issue(COVER,
+                                        f'{demands[s - 1]} employees needed on shift {shop_data.shifts[s]} of day {d}, '
+                                        f'{supply} available', day=d, shift=s))
+            # Each employee works a single shift a day
+            supply = int(group_available[:, 1:, d].any(axis=1).sum())
+            if supply < sum(demands):
+                issues.append(issue(COVER,
+                                    f'{sum(demands)} employees needed on day {d}, {supply} available', day=d))
+    return issues
+
+
+def check_role_cover(shop_data, available):
+    employee_data = shop_data.employee_data
+    employees_by_role = employee_data.employees_by_role()
+    issues = []
+    for r, s, d, demand in shop_data.role_cover_demands:
+        for w in range(shop_data.num_weeks):
+            day = w * 7 + d
+            supply = int(available[employees_by_role[r], s, day].sum())
+            if supply < demand:
+                issues.append(issue(ROLE_COVER,
+                                    f'{demand} {employee_data.roles[r]} needed on shift {shop_data.shifts[s]} of day '
+                                    f'{day}, {supply} qualified and available', day=day, shift=s, role=r))
+    return issues
@@ -0,0 +1,76 @@
+import json
+from google.protobuf import text_format
+from ortools.sat import sat_parameters_pb2
+
+# Named Sat solver parameter profiles
+PROFILES = {
+    # Good solutions quickly, no effort spent on the bound
+    'fast-feasible': 'max_time_in_seconds:5.0 num_workers:8 linearization_level:0',
+    # Default trade-off
+    'balanced': 'max_time_in_seconds:10.0 num_workers:8',
+    # Long runs aiming at proving optimality
+    'prove-optimal': 'max_time_in_seconds:300.0 num_workers:8 linearization_level:2',
+}
+
+
+def resolve(profile=None, params=''):
+    """
+    Sat solver parameters of a profile, with ``params`` merged on top
+
+    Args:
+        profile (str): Name of the profile in ``PROFILES``. If ``None`` or empty, only ``params`` are used
+        params (str): Sat solver parameters in text format overriding those of the profile
+
+    Returns:
+        str: Sat solver parameters in text format
+    """
+    parameters = sat_parameters_pb2.SatParameters()
+    if profile:
+        try:
+            text_format.Merge(PROFILES[profile], parameters)
+        except KeyError:
+            raise KeyError(f'Unknown solver profile {profile}. Available profiles: {list(PROFILES)}')
+    if params:
+        text_format.Merge(params, parameters)
+    return text_format.MessageToString(parameters, as_one_line=True)
+
+
+def deterministic(params='', random_seed=0, deterministic_time=10.):
+    """
+    Sat solver parameters giving the same search on every run, for regression benchmarks
+
+    The random seed is fixed and the workers, if more than one, interleave their search in a deterministic order. The
+    wall time limit is replaced by a limit in deterministic time, which does not depend on the machine load.
+
+    Args:
+        params (str): Sat solver parameters in text format, e.g. resolved from a profile. Their number of workers is
+          kept, 8 if not set
+        random_seed (int): Random seed of the search
+        deterministic_time (float): Deterministic time limit, in the solver deterministic time units
+
+    Returns:
+        str: Sat solver parameters in text format
+    """
+    parameters = sat_parameters_pb2.SatParameters()
+    if params:
+        text_format.Merge(params, parameters)
+    parameters.ClearField('max_time_in_seconds')
+    parameters.max_deterministic_time = deterministic_time
+    parameters.random_seed = random_seed
+    if not parameters.num_workers:
+        parameters.num_workers = 8
+    parameters.interleave_search = parameters.num_workers > 1
+    return text_format.MessageToString(parameters, as_one_line=True)
+
+
+def load_profiles(profiles_file):
+    """
+    Adds the profiles stored in a json file of ``{name: params}`` to ``PROFILES``
+    """
+    with open(profiles_file, 'r') as f:
+        PROFILES.update(json.load(f))
+
+
+def save_profiles(profiles_file, profiles):
+    with open(profiles_file, 'w') as f:
+        json.dump(profiles, f, indent=2)
@@ -0,0 +1,90 @@
+import os
+from ortools.sat.python import cp_model
+from google.protobuf import text_format
+import passeu.utils.benchmark as benchmark
+import passeu.utils.roster_model as roster
+import passeu.utils.telemetry as telemetry
+from passeu.utils.datastructures import ShopData
+
+# Shop bundled with the tests, solved by every regression run
+INPUT_DATA_XLS = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'tests', 'interface',
+                              'input_data.xls')
+
+# Metrics of a solve compared between runs. All of them are reproducible with deterministic parameters, unlike the
+# wall time
+METRICS = ('status', 'objective_value', 'best_objective_bound', 'deterministic_time', 'num_conflicts', 'num_branches',
+           'variables', 'constraints')
+
+
+def regression_shops(size_classes=('small',), num_shops=1):
+    """
+    Shops of a regression run: the bundled ``input_data.xls`` and the benchmark shops of some size classes
+
+    Returns:
+        dict: {name: shop_data}
+    """
+    shop_data = ShopData(INPUT_DATA_XLS)
+    shop_data.load_weekly_headcount_demand()
+    shop_data.load_employees()
+    shop_data.load_role_demands()
+    shops = {'input_data': shop_data}
+    for size in size_classes:
+        for seed, benchmark_shop in enumerate(benchmark.benchmark_shops(size, num_shops)):
+            shops[f'{size}-{seed}'] = benchmark_shop
+    return shops
+
+
+def run(shop_data, params, rules=None):
+    """
+    Builds and solves a shop
+
+    Args:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data
+        params (str): Sat solver parameters, see ``passeu.utils.profiles.deterministic``
+        rules (dict): Scheduling rules, see ``passeu.utils.rules.DEFAULT_RULES``
+
+    Returns:
+        dict: ``METRICS`` of the solve
+    """
+    roster_model = roster.RosterModel(shop_data, rules=rules)
+    roster_model.build()
+
+    solver = cp_model.CpSolver()
+    text_format.Parse(params, solver.parameters)
+    status = solver.Solve(roster_model.model)
+
+    statistics = dict(telemetry.response_statistics(solver, status), **telemetry.model_statistics(roster_model.model))
+    return {metric: statistics[metric] for metric in METRICS}
+
+
+def compare(results, baseline, tolerance=0.05):
+    """
+    Regressions of a run from a baseline run, shop by shop
+
+    A shop regresses if it is missing, its status is worse, its objective is higher or its deterministic time longer
+    than the baseline one by more than ``tolerance``, relative to the baseline.
+
+    Args:
+        results (dict): {name: metrics} of the run, see ``run``
+        baseline (dict): {name: metrics} of the baseline run
+        tolerance (float): Relative change allowed
+
+    Returns:
+        list(str): Description of each regression
+    """
+    status_order = ('OPTIMAL', 'FEASIBLE', 'UNKNOWN', 'INFEASIBLE', 'MODEL_INVALID')
+    regressions = []
+    for name, expected in baseline.items():
+        if name not in results:
+            regressions.append(f'{name}: missing')
+            continue
+        metrics = results[name]
+        if status_order.index(metrics['status']) > status_order.index(expected['status']):
+            regressions.append(f'{name}: status {expected["status"]} -> {metrics["status"]}')
+        if metrics['status'] in ('OPTIMAL', 'FEASIBLE') and expected['status'] in ('OPTIMAL', 'FEASIBLE'):
+            if metrics['objective_value'] > expected['objective_value'] + tolerance * abs(expected['objective_value']):
+                regressions.append(f'{name}: objective {expected["objective_value"]} -> {metrics["objective_value"]}')
+        if metrics['deterministic_time'] > expected['deterministic_time'] * (1 + tolerance):
+            regressions.append(f'{name}: deterministic time {expected["deterministic_time"]:0.3f} -> '
+                               f'{metrics["deterministic_time"]:0.3f}')
+    return regressions
@@ -0,0 +1,199 @@
+import collections
+import os
+import numpy as np
+import passeu.interface.interface as interface
+import passeu.utils.datastructures as datastructures
+
+DEMAND_SHEETS = ('ShopDemands', 'DepartmentDemands')
+ROLE_SHEETS = ('Roles', 'RoleDemands')
+
+
+def sheet_signature(df):
+    """
+    Columns of a sheet and a hash of each of its rows, to find the rows changed between two reads
+
+    Returns:
+        tuple: (columns, hashes) with the column names and the uint64 hash of each row
+    """
+    import pandas as pd
+    return tuple(df.columns), pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class InputDelta:
+    """
+    Changes of an input file between two reads
+
+    Attributes:
+        sheets (dict): {sheet name: (added, removed)} numbers of rows added to and removed from each changed sheet, an
+          edited row counting as both. All the rows of a sheet added, removed or with other columns count
+        employees_changed (bool): Whether the employees changed. The whole shop data is then rebuilt and the employee
+          ids may differ
+    """
+
+    def __init__(self, sheets=None, employees_changed=False):
+        self.sheets = sheets or {}
+        self.employees_changed = employees_changed
+
+    def __bool__(self):
+        return bool(self.sheets)
+
+    def __repr__(self):
+        return ', '.join(f'{name}(+{added}, -{removed})' for name, (added, removed) in sorted(self.sheets.items()))
+
+
+class ShopReloader:
+    """
+    Shop data of an input file, kept up to date with the edits of the file.
+
+    A reload does nothing unless the file was modified. Otherwise every sheet is parsed at once and compared with
+    its previous read through the hashes of its rows, and only the shop data read from changed sheets is updated:
+    the new rows of the ``Requests`` and ``Availability`` sheets are resolved while the other rows keep their
+    entries, and the demands or roles are read again if their sheets changed. A change of the employees rebuilds
+    the whole shop data, as the employee ids follow their order.
+
+    Args:
+        input_xls_file (str): Input file
+
+    Attributes:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data of the last read, ``None`` before the first one
+    """
+
+    def __init__(self, input_xls_file):
+        self.input_xls_file = input_xls_file
+        self.shop_data = None
+        self.signatures = {}  # sheet name: (columns, row hashes)
+        self.resolved = {'Requests': {}, 'Availability': {}}  # row hash: resolved entries, of each sheet
+        self._stat = None
+
+    def _file_stat(self):
+        stat = os.stat(self.input_xls_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def modified(self):
+        return self._file_stat() != self._stat
+
+    def _resolve_rows(self, sheets, sheet, read, resolve, unknown):
+        """
+        Resolved entries of each row of a sheet, resolving only the rows not seen in the previous read
+
+        Args:
+            read (callable): Interface function reading the entries of the sheet
+            resolve (callable): ``EmployeeData`` method resolving the entries of rows to lists of shop data entries
+            unknown (list): Collects the unknown references of the rows
+        """
+        df = sheets.get(sheet)
+        hashes = sheet_signature(df)[1].tolist() if df is not None else []
+        previous = self.resolved[sheet]
+        resolved = {h: previous[h] for h in hashes if h in previous}
+        new_rows = [i for i, h in enumerate(hashes) if h not in resolved]
+        if new_rows:
+            entries = resolve(read({sheet: df.iloc[new_rows]}), self.shop_data, rows=new_rows, unknown=unknown)
+            for i, entry in zip(new_rows, entries):
+                # Rows with unknown references are resolved again on the next read
+                if entry is not None:
+                    resolved[hashes[i]] = entry
+        self.resolved[sheet] = resolved
+        return [entry for h in hashes if h in resolved for entry in resolved[h]]
+
+    def _update(self, sheets, changed):
+        shop_data = self.shop_data
+        employee_data = shop_data.employee_data
+        shop_data.input_data_xls = employee_data.input_file_xls = sheets
+        # The unknown names of every sheet are reported together
+        unknown = []
+
+        def resolve_requests(entries, data, **kwargs):
+            return [None if request is None else [request]
+                    for request in employee_data.resolve_requests(entries, data, **kwargs)]
+
+        try:
+            if changed & set(DEMAND_SHEETS):
+                shop_data.load_weekly_headcount_demand()
+            if 'Requests' in changed:
+                employee_data.requests = self._resolve_rows(
+                    sheets, 'Requests', interface.create_request_list, resolve_requests, unknown)
+            if 'Availability' in changed:
+                employee_data.unavailable_shifts = self._resolve_rows(
+                    sheets, 'Availability', interface.create_unavailability_list,
+                    employee_data.resolve_unavailable_shifts, unknown)
+            if changed & set(ROLE_SHEETS):
+                # Role ids follow the order the roles first appear in, over both sheets
+                employee_data.roles = []
+                employee_data.qualifications = []
+                shop_data.role_cover_demands = []
+                employee_data.create_qualifications(unknown)
+                shop_data.load_role_demands(unknown)
+        finally:
+            shop_data.input_data_xls = employee_data.input_file_xls = self.input_xls_file
+        datastructures.check_references(unknown)
+
+    def _build(self, sheets):
+        shop_data = datastructures.ShopData(sheets)
+        shop_data.employee_data = datastructures.EmployeeData(sheets)
+        shop_data.employee_data.create_employee_data()
+        self.shop_data = shop_data
+        self.resolved = {sheet: {} for sheet in self.resolved}
+        self._update(sheets, set(interface.SHEETS))
+
+    def load(self):
+        """
+        Reads the whole input file
+
+        Returns:
+            passeu.utils.datastructures.ShopData: Shop data
+
+        Raises:
+            passeu.utils.datastructures.UnknownReferenceError: Listing every unknown name of the input
+        """
+        self._stat = self._file_stat()
+        sheets = interface.read_sheets(self.input_xls_file)
+        self.signatures = {name: sheet_signature(df) for name, df in sheets.items()}
+        self._build(sheets)
+        return self.shop_data
+
+    def reload(self):
+        """
+        Updates the shop data with the changes of the input file since the last read
+
+        Returns:
+            InputDelta: Changes, empty if the file was not modified or its content is the same
+
+        Raises:
+            passeu.utils.datastructures.UnknownReferenceError: Listing every unknown name of the changed rows
+        """
+        if self.shop_data is None:
+            self.load()
+            return InputDelta({name: (len(hashes), 0) for name, (columns, hashes) in self.signatures.items()},
+                              employees_changed=True)
+        if not self.modified():
+            return InputDelta()
+
+        self._stat = self._file_stat()
+        sheets = interface.read_sheets(self.input_xls_file)
+        signatures = {name: sheet_signature(df) for name, df in sheets.items()}
+        empty = ((), np.zeros(0, dtype=np.uint64))
+        delta = InputDelta()
+        for name in set(signatures) | set(self.signatures):
+            old_columns, old_hashes = self.signatures.get(name, empty)
+            new_columns, new_hashes = signatures.get(name, empty)
+            if old_columns != new_columns:
+                delta.sheets[name] = (len(new_hashes), len(old_hashes))
+                if name in self.resolved:
+                    self.resolved[name] = {}
+            elif not np.array_equal(old_hashes, new_hashes):
+                # Reordered rows count as a change without added or removed rows
+                old, new = collections.Counter(old_hashes.tolist()), collections.Counter(new_hashes.tolist())
+                delta.sheets[name] = (sum((new - old).values()), sum((old - new).values()))
+        self.signatures = signatures
+
+        try:
+            if 'Employees' in delta.sheets:
+                delta.employees_changed = True
+                self._build(sheets)
+            elif delta:
+                self._update(sheets, set(delta.sheets))
+        except Exception:
+            # The shop data is only partly updated, every sheet is read again on the next modification
+            self.signatures = {}
+            raise
+        return delta
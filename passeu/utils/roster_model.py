@@ -0,0 +1,372 @@
+import collections
+import numpy as np
+from ortools.sat.python import cp_model
+import passeu.utils.constraints as constraints
+import passeu.utils.history as history
+import passeu.utils.objective as objective
+import passeu.utils.variable_array as variable_array
+from passeu.utils.rules import DEFAULT_RULES, load_rules
+from passeu.utils.solution import variable_indices
+
+
+# Hours an employee can work in a day, 0 on Off days
+DAILY_HOURS = [0, 6, 8]
+
+# Families of hard rules. When diagnosing an infeasible shop, the hard rules of each family are guarded by an
+# assumption literal per employee, day, shift, week or role they apply to
+AVAILABILITY = 'availability'
+FIXED_ASSIGNMENT = 'fixed_assignment'
+CONTRACT_HOURS = 'contract_hours'
+COVER = 'cover'
+ROLE_COVER = 'role_cover'
+
+GUARDED_RULES = (AVAILABILITY, FIXED_ASSIGNMENT, objective.SHIFT_SEQUENCE, CONTRACT_HOURS, objective.WEEKLY_SUM,
+                 objective.TRANSITION, COVER, ROLE_COVER)
+
+
+class RosterModel:
+    """
+    CP-SAT model of the shift scheduling problem for a given shop
+
+    Attributes:
+        shop_data (passeu.utils.datastructures.ShopData): Shop data the model is built from
+        rules (dict): Scheduling rules, with the keys and format of ``DEFAULT_RULES``
+        model (cp_model.CpModel): CP-SAT model
+        work (passeu.utils.variable_array.VariableArray): (employee, shift, day): BooleanVar, a false constant if the
+          employee is not available for the shift
+        available (np.ndarray): Availability calendar of the built model, see ``ShopData.availability``
+        work_hours (passeu.utils.variable_array.VariableArray): (employee, day): IntegerVar containing working hours per
+          day
+        role_work (dict): Sparse dictionary of (employee, shift, day, role): BooleanVar, only for the employees
+          qualified for a role and available for a shift it is demanded on
+        objective (passeu.utils.objective.ObjectiveTerms): Penalty terms of the objective
+        history (passeu.utils.history.FairnessHistory): Rosters published in past weeks, adding fairness penalties
+          if given
+        history_baseline (np.ndarray): Totals of ``passeu.utils.history.METRICS`` above which the history is
+          penalised, see ``FairnessHistory.baseline``. Defaults to the mean over the employees of the model
+        debug_names (bool): Name the model variables. Names are only needed to read the model proto, penalties are
+          reported through the objective attribution. Leaving them empty speeds up the build and shrinks the proto
+        diagnose (bool): Guard the hard rules with assumption literals, see ``guard``. Unavailable shifts and fixed
+          assignments become guarded constraints instead of eliminated variables, and excess cover is not penalised
+        guards (dict): Dictionary of assumption literal index: attribution record of the hard rules it guards
+        weekly_sum_terms (list(tuple)): (integer term, soft bound, side) of each weekly sum penalty, side -1 below the
+          soft minimum and 1 above the soft maximum, from which the exact violation of a solution is computed
+    """
+
+    def __init__(self, shop_data, rules=None, debug_names=False, history=None, diagnose=False, history_baseline=None):
+        self.shop_data = shop_data
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.history = history
+        self.history_baseline = history_baseline
+        self.debug_names = debug_names
+        self.diagnose = diagnose
+        self.guards = {}
+        self._guard_literals = {}
+        self.weekly_sum_terms = []
+
+        self.model = cp_model.CpModel()
+        self.work = None
+        self.available = None
+        self.work_hours = None
+        self.role_work = {}
+        self.objective = objective.ObjectiveTerms()
+
+    def build(self, profile=None):
+        """
+        Builds the model
+
+        Args:
+            profile (passeu.utils.memory.MemoryProfile): If given, the time and memory use of each phase of the build
+              are recorded to it
+        """
+        checkpoint = profile.checkpoint if profile is not None else lambda phase: None
+        shop_data = self.shop_data
+        model = self.model
+        role_work = self.role_work
+        obj = self.objective
+        debug_names = self.debug_names
+
+        num_employees = shop_data.employee_data.num_employees
+        requests = shop_data.employee_data.requests
+        employees = shop_data.employee_data.employees
+
+        # daily demands for work shifts (morning, afternoon, night) for each day
+        # of the week starting on Monday.  TODO: change to hours?? -> Add a total worked hours soft constraint too
+        weekly_cover_demands = shop_data.weekly_cover_demands
+
+        shift_constraints = self.rules['shift_constraints']
+        weekly_sum_constraints = self.rules['weekly_sum_constraints']
+        penalized_transitions = self.rules['penalized_transitions']
+        excess_cover_penalties = self.rules['excess_cover_penalties']
+
+        # now need to add as variable to Employee class whether they work or not. Shifts an employee is not
+        # available for all share a single false constant and are left out of the constraints below
+        if self.diagnose:
+            available = self.available = np.ones((num_employees, shop_data.num_shifts, shop_data.num_days), dtype=bool)
+        else:
+            available = self.available = shop_data.availability()
+        # Variables are appended straight to the proto and only their indices kept, see passeu.utils.variable_array
+        work_indices = np.full(available.shape, model.NewConstant(0).Index(), dtype=np.int64)
+        keys = np.argwhere(available)
+        work_indices[available] = variable_array.new_variables(
+            model, cp_model.Domain(0, 1),
+            [f'work{e}_{s}_{d}' for e, s, d in keys.tolist()] if debug_names else [''] * len(keys))
+        work = self.work = variable_array.VariableArray(model, work_indices)
+
+        # shift duration
+        work_hours = self.work_hours = variable_array.VariableArray(model, variable_array.new_variables(
+            model, cp_model.Domain.FromValues(DAILY_HOURS),
+            [f'workhours{e}_{d}' for e in range(num_employees) for d in range(shop_data.num_days)] if debug_names
+            else [''] * (num_employees * shop_data.num_days)).reshape(num_employees, shop_data.num_days))
+
+        checkpoint('variables')
+
+        # Exactly one shift per day.
+        for e in range(num_employees):
+            for d in range(shop_data.num_days):
+                model.Add(sum(work[e, s, d] for s in range(shop_data.num_shifts) if available[e, s, d]) == 1)
+
+        # Fixed assignments are the only shift available on their day, the constraint above assigns them
+        if self.diagnose:
+            for e, s, d in shop_data.employee_data.unavailable_shifts:
+                model.Add(work[e, s, d] == 0).OnlyEnforceIf(self.guard(AVAILABILITY, employee=e, day=d))
+            for e, s, d in shop_data.fixed_assignments:
+                model.Add(work[e, s, d] == 1).OnlyEnforceIf(self.guard(FIXED_ASSIGNMENT, employee=e, day=d))
+
+        # Employee requests. Requests for unavailable shifts cannot be granted and add nothing to the objective
+        for e, s, d, w in requests:
+            if not available[e, s, d]:
+                continue
+            obj.add_bool_terms([work[e, s, d]], [w], objective.REQUESTS, objective.REQUEST,
+                               employee=e, day=d, week=d // 7, shift=s, level=employees[e].level)
+
+        # Shift constraints
+        for ct in shift_constraints:
+            shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost = ct
+            for e in range(num_employees):
+                works = [work[e, shift, d] for d in range(shop_data.num_days)]
+                variables, coeffs = constraints.add_soft_sequence_constraint(
+                    model, works, hard_min, soft_min, min_cost, soft_max, hard_max,
+                    max_cost,
+                    'shift_constraint(employee %i, shift %i)' % (e, shift) if debug_names else '',
+                    self.guard(objective.SHIFT_SEQUENCE, employee=e, shift=shift))
+                obj.add_bool_terms(variables, coeffs, objective.FAIRNESS, objective.SHIFT_SEQUENCE,
+                                   employee=e, shift=shift, level=employees[e].level)
+
+        # Link off shifts and 0 hours
+        for e in range(num_employees):
+            for d in range(shop_data.num_days):
+                model.Add(work_hours[(e, d)] == 0).OnlyEnforceIf(work[(e, 0, d)])
+
+                # This one should not be needed once we add the summation of weekly hours constraints
+                model.Add(work_hours[(e, d)] > 0).OnlyEnforceIf(work[(e, 0, d)].Not())
+
+        # Max weekly working hours - currently a hard constraint to meet contract hours
+        # TODO: add soft_max (contract hours) and hard_max (overtime)
+        for e in range(num_employees):
+            weekly_hours = sum([work_hours[(e, d)] for d in range(shop_data.num_days)])
+            model.Add(weekly_hours == employees[e].contract_weekly_hours).OnlyEnforceIf(
+                self.guard(CONTRACT_HOURS, employee=e))
+
+        checkpoint('employee_rules')
+
+        # Weekly sum constraints, batched over the (employee, week) rows of each rule
+        rows = [(e, w) for e in range(num_employees) for w in range(shop_data.num_weeks)]
+        row_employees = np.repeat(np.arange(num_employees), shop_data.num_weeks)
+        row_weeks = np.tile(np.arange(shop_data.num_weeks), num_employees)
+        row_levels = np.array([employees[e].level for e in range(num_employees)])[row_employees]
+        row_days = row_weeks[:, None] * 7 + np.arange(7)
+        for ct in weekly_sum_constraints:
+            shift, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost = ct
+            works = work.indices[row_employees[:, None], shift, row_days]
+            prefixes = None
+            if debug_names:
+                prefixes = ['weekly_sum_constraint(employee %i, shift %i, week %i)' % (e, shift, w) for e, w in rows]
+            enforcements = None
+            if self.diagnose:
+                enforcements = [self.guard(objective.WEEKLY_SUM, employee=e, shift=shift, week=w) for e, w in rows]
+            variables, coeffs, term_rows, term_bounds = constraints.add_soft_sum_constraints(
+                model, works, hard_min, soft_min, min_cost, soft_max, hard_max, max_cost, prefixes, enforcements)
+            first_term = len(obj.int_indices)
+            self.weekly_sum_terms.extend((first_term + i, bound, side)
+                                         for i, (bound, side) in enumerate(term_bounds.tolist()))
+            obj.add_int_terms(variables, coeffs.tolist(), objective.FAIRNESS, objective.WEEKLY_SUM,
+                              employee=row_employees[term_rows].tolist(), week=row_weeks[term_rows].tolist(),
+                              shift=shift, level=row_levels[term_rows].tolist())
+
+        # Penalized transitions
+        for previous_shift, next_shift, cost in penalized_transitions:
+            for e in range(num_employees):
+                for d in range(shop_data.num_days - 1):
+                    if not (available[e, previous_shift, d] and available[e, next_shift, d + 1]):
+                        continue
+                    transition = [
+                        work[e, previous_shift, d].Not(), work[e, next_shift,
+                                                               d + 1].Not()
+                    ]
+                    if cost == 0:
+                        model.AddBoolOr(transition).OnlyEnforceIf(
+                            self.guard(objective.TRANSITION, employee=e, shift=next_shift,
+                                       previous_shift=previous_shift))
+                    else:
+                        trans_var = model.NewBoolVar(
+                            'transition (employee=%i, day=%i)' % (e, d) if debug_names else '')
+                        transition.append(trans_var)
+                        model.AddBoolOr(transition)
+                        obj.add_bool_terms([trans_var], [cost], objective.FAIRNESS, objective.TRANSITION,
+                                           employee=e, day=d, week=d // 7, shift=next_shift,
+                                           level=employees[e].level, previous_shift=previous_shift)
+
+        checkpoint('weekly_rules')
+
+        # Cover constraints, over the employees of each cover group
+        for group_employees, group_cover_demands in shop_data.cover_groups():
+            for s in range(1, shop_data.num_shifts):
+                for w in range(shop_data.num_weeks):
+                    for d in range(7):
+                        works = [work[e, s, w * 7 + d] for e in group_employees if available[e, s, w * 7 + d]]
+                        # Ignore Off shift.
+                        min_demand = group_cover_demands[d][s - 1]
+                        if self.diagnose:
+                            model.Add(cp_model.LinearExpr.Sum(works) >= min_demand).OnlyEnforceIf(
+                                self.guard(COVER, day=w * 7 + d, week=w, shift=s))
+                            continue
+                        worked = model.NewIntVar(min_demand, max(min_demand, len(works)), '')
+                        model.Add(worked == sum(works))
+                        over_penalty = excess_cover_penalties[s - 1]
+                        if over_penalty > 0:
+                            name = 'excess_demand(shift=%i, week=%i, day=%i)' % (s, w,
+                                                                                 d) if debug_names else ''
+                            excess = model.NewIntVar(0, max(0, len(works) - min_demand),
+                                                     name)
+                            model.Add(excess == worked - min_demand)
+                            obj.add_int_terms([excess], [over_penalty], objective.COVER, objective.EXCESS_COVER,
+                                              day=w * 7 + d, week=w, shift=s)
+
+        # Role cover constraints. Role variables are only created for the employees qualified for a role and
+        # available for a shift it is demanded on
+        employees_by_role = shop_data.employee_data.employees_by_role()
+        for r, s, d, demand in shop_data.role_cover_demands:
+            for w in range(shop_data.num_weeks):
+                day = w * 7 + d
+                works = []
+                for e in employees_by_role[r].tolist():
+                    if not available[e, s, day]:
+                        continue
+                    if (e, s, day, r) not in role_work:
+                        role_work[e, s, day, r] = model.NewBoolVar(f'role_work{e}_{s}_{day}_{r}' if debug_names else '')
+                    works.append(role_work[e, s, day, r])
+                if self.diagnose:
+                    model.Add(cp_model.LinearExpr.Sum(works) >= demand).OnlyEnforceIf(
+                        self.guard(ROLE_COVER, day=day, week=w, shift=s, role=r))
+                    continue
+                worked = model.NewIntVar(demand, max(demand, len(works)), '')
+                model.Add(worked == sum(works))
+
+        # An employee fills at most one role, and only on the shift they work
+        shift_roles = collections.defaultdict(list)
+        for (e, s, d, r), var in role_work.items():
+            shift_roles[e, s, d].append(var)
+        for (e, s, d), variables in shift_roles.items():
+            model.Add(sum(variables) <= work[e, s, d])
+
+        checkpoint('cover')
+
+        # Fairness over the past weeks: employees who closed or worked weekends more than their colleagues are
+        # penalised for doing it again
+        if self.history is not None:
+            close_penalty, weekend_penalty = self.rules.get('history_penalties', DEFAULT_RULES['history_penalties'])
+            totals = self.history.rolling([employee.name for employee in employees])
+            baseline = totals.mean(axis=0) if self.history_baseline is None else self.history_baseline
+            excess = np.maximum(0, totals - baseline).round().astype(int)
+            close_excess = excess[:, history.METRICS.index(history.CLOSE_SHIFTS)]
+            weekend_excess = excess[:, history.METRICS.index(history.WEEKENDS_WORKED)]
+            for e in range(num_employees):
+                if close_penalty * close_excess[e] > 0:
+                    days = [d for d in range(shop_data.num_days) if available[e, history.CLOSE_SHIFT, d]]
+                    obj.add_bool_terms([work[e, history.CLOSE_SHIFT, d] for d in days],
+                                       [int(close_penalty * close_excess[e])] * len(days),
+                                       objective.FAIRNESS, objective.HISTORY, employee=e, day=days,
+                                       week=[d // 7 for d in days], shift=history.CLOSE_SHIFT,
+                                       level=employees[e].level)
+                if weekend_penalty * weekend_excess[e] > 0:
+                    days = [w * 7 + d for w in range(shop_data.num_weeks) for d in history.WEEKEND_DAYS]
+                    obj.add_bool_terms([work[e, 0, d].Not() for d in days],
+                                       [int(weekend_penalty * weekend_excess[e])] * len(days),
+                                       objective.FAIRNESS, objective.HISTORY, employee=e, day=days,
+                                       week=[d // 7 for d in days], level=employees[e].level)
+
+        if self.diagnose:
+            model.AddAssumptions(list(self._guard_literals.values()))
+        self.minimize()
+        checkpoint('objective')
+
+    def guard(self, rule, **fields):
+        """
+        Assumption literal guarding the hard rules of a family for the given employee, day, shift, week or role, as
+        a list to pass to ``OnlyEnforceIf``. Empty, so that the rules are always enforced, unless diagnosing
+
+        Args:
+            rule (str): Hard rule family, one of ``GUARDED_RULES``
+
+        Returns:
+            list: The guarding literal, shared by the rules with the same family and fields
+        """
+        if not self.diagnose:
+            return []
+        key = (rule,) + tuple(sorted(fields.items()))
+        if key not in self._guard_literals:
+            literal = self.model.NewBoolVar(objective.describe(dict(fields, rule=rule)) if self.debug_names else '')
+            self._guard_literals[key] = literal
+            self.guards[literal.Index()] = dict(fields, rule=rule)
+        return [self._guard_literals[key]]
+
+    def layout(self):
+        """
+        Proto indices of the model variables, negative for negated literals
+
+        Returns:
+            dict: ``work`` indices of shape (num_employees, num_shifts, num_days), ``work_hours`` indices of shape
+              (num_employees, num_days), ``role_work`` indices with their (employee, shift, day, role) ``role_keys``,
+              ``bool_terms`` and ``int_terms`` indices of the objective terms, and the ``weekly_sum_terms`` as an
+              array of shape (num_terms, 3)
+        """
+        return {'work': self.work.indices,
+                'work_hours': self.work_hours.indices,
+                'role_work': variable_indices(list(self.role_work.values())),
+                'role_keys': np.array(list(self.role_work), dtype=np.int64).reshape(-1, 4),
+                'bool_terms': np.array(self.objective.bool_indices, dtype=np.int64),
+                'int_terms': np.array(self.objective.int_indices, dtype=np.int64),
+                'weekly_sum_terms': np.array(self.weekly_sum_terms, dtype=np.int64).reshape(-1, 3)}
+
+    def minimize(self, groups=None):
+        """
+        Sets the model objective to the weighted sum of the penalty terms in ``groups`` (all if ``None``)
+        """
+        self.objective.set_objective(self.model, groups)
+
+    def add_roster_hints(self, shifts, hours):
+        """
+        Hints the model with a roster, e.g. a cached solution of a similar shop
+
+        Args:
+            shifts (np.ndarray): Shift worked by each employee on each day, of shape (num_employees, num_days)
+            hours (np.ndarray): Hours worked by each employee on each day, of shape (num_employees, num_days)
+        """
+        self.model.ClearHints()
+        for (e, s, d), var in self.work.items():
+            if self.available[e, s, d]:
+                self.model.AddHint(var, int(shifts[e][d] == s))
+        for (e, d), var in self.work_hours.items():
+            self.model.AddHint(var, int(hours[e][d]))
+
+    def add_solution_hints(self, solver):
+        """
+        Hints the model with the ``work`` and ``work_hours`` values of the last solution found by ``solver``
+        """
+        self.model.ClearHints()
+        for (e, s, d), var in self.work.items():
+            if self.available[e, s, d]:
+                self.model.AddHint(var, solver.BooleanValue(var))
+        for var in self.work_hours.values():
+            self.model.AddHint(var, solver.Value(var))
@@ -0,0 +1,62 @@
+import json
+
+# Scheduling rules are kept apart from the model, so that they can be read, e.g. to look up a cached solve, without
+# loading the solver
+
+# START CONSTRAINTS
+DEFAULT_RULES = {
+    # Shift constraints on continuous sequence :
+    #     (shift, hard_min, soft_min, min_penalty,
+    #             soft_max, hard_max, max_penalty)
+    'shift_constraints': [
+        # One or two consecutive days of rest (shift 0), this is a hard constraint.
+        (0, 1, 1, 0, 3, 3, 0),  # changing to 3
+        # betweem 2 and 3 consecutive days of night shifts, 1 and 4 are
+        # possible but penalized.
+        (3, 1, 2, 20, 3, 4, 5),
+    ],
+
+    # Weekly sum constraints on shifts days:
+    #     (shift, hard_min, soft_min, min_penalty,
+    #             soft_max, hard_max, max_penalty)
+    'weekly_sum_constraints': [
+        # Constraints on rests per week.
+        (0, 2, 2, 7, 2, 3, 4),
+        # At least 1 night shift per week (penalized). At most 4 (hard).
+        (3, 0, 1, 3, 4, 4, 0),
+    ],
+
+    # Penalized transitions:
+    #     (previous_shift, next_shift, penalty (0 means forbidden))
+    'penalized_transitions': [
+        # Afternoon to night has a penalty of 4.
+        (2, 3, 4),
+        # Night to morning is forbidden.
+        (3, 1, 0),
+    ],
+
+    # Penalty for exceeding the cover constraint per shift type.
+    'excess_cover_penalties': (2, 2, 5),
+
+    # Fairness over the past weeks, see passeu.utils.history. Penalty per close shift and per weekend day worked,
+    # for each close shift and weekend an employee worked above the average of their colleagues.
+    #     (close_penalty, weekend_penalty)
+    'history_penalties': (1, 1),
+}
+# END CONSTRAINTS
+
+
+def load_rules(rules_file):
+    """
+    Scheduling rules stored in a json file with any of the keys of ``DEFAULT_RULES``, the missing ones taking their
+    default value
+
+    Raises:
+        KeyError: If the file holds an unknown rule
+    """
+    with open(rules_file, 'r') as f:
+        rules = json.load(f)
+    unknown = set(rules) - set(DEFAULT_RULES)
+    if unknown:
+        raise KeyError(f'Unknown scheduling rules {unknown} in {rules_file}')
+    return dict(DEFAULT_RULES, **rules)
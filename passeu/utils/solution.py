@@ -0,0 +1,279 @@
+import numpy as np
+import passeu.utils.objective as objective
+
+# ortools is only imported to read a solver, so that cached solutions can be loaded and reported without it
+
+# Names of the cp_model.CpSolverStatus values
+STATUS_NAMES = ('UNKNOWN', 'MODEL_INVALID', 'FEASIBLE', 'INFEASIBLE', 'OPTIMAL')
+
+
+def variable_indices(variables):
+    """
+    Proto indices of a list of literals or integer variables. Negated literals have a negative index
+    """
+    return np.array([var.Index() for var in variables], dtype=np.int64)
+
+
+def literal_values(values, indices):
+    """
+    Values of the variables at ``indices`` in a solution, where a negative index ``i`` refers to the negation of
+    the literal ``-i - 1``
+    """
+    negated = indices < 0
+    result = values[np.where(negated, -indices - 1, indices)]
+    result[negated] = 1 - result[negated]
+    return result
+
+
+def relative_gap(objective, best_bound):
+    """
+    Relative gap between an objective value and the best bound, relative to the objective if above 1
+    """
+    return abs(objective - best_bound) / max(1., abs(objective))
+
+
+def solver_statistics(solver, status):
+    """
+    Search statistics of the last solve of ``solver``
+    """
+    return {'status': solver.StatusName(status),
+            'conflicts': solver.NumConflicts(),
+            'branches': solver.NumBranches(),
+            'wall_time': solver.WallTime(),
+            'deterministic_time': solver.ResponseProto().deterministic_time}
+
+
+def weekly_sum_violations(index, weekly_sum_terms, shifts):
+    """
+    Exact violation of the weekly sum penalties in a roster. Their variables only bound the violation from above,
+    until the solve is optimal
+
+    Args:
+        index (passeu.utils.objective.PenaltyIndex): Attribution of the integer terms, with their employee, week and
+          shift
+        weekly_sum_terms (np.ndarray): (integer term, soft bound, side) of each weekly sum penalty, see
+          ``passeu.utils.roster_model.RosterModel.weekly_sum_terms``
+        shifts (np.ndarray): Shift worked by each employee on each day, of shape (num_employees, num_days)
+
+    Returns:
+        np.ndarray: Violation of each weekly sum penalty
+    """
+    terms, bounds, sides = weekly_sum_terms.T
+    employees = index.column('employee')[terms]
+    days = index.column('week')[terms][:, None] * 7 + np.arange(7)
+    sums = (shifts[employees[:, None], days] == index.column('shift')[terms][:, None]).sum(axis=1)
+    return np.maximum(0, sides * (sums - bounds))
+
+
+class SolutionModel:
+    """
+    Stand-in for the roster model of a solution rebuilt from arrays, e.g. cached, handed over by another process or
+    merged from components: the shop data and the objective terms, without the model itself
+    """
+
+    def __init__(self, shop_data, objective_terms):
+        self.shop_data = shop_data
+        self.objective = objective_terms
+
+
+def objective_arrays(objective_terms):
+    """
+    Objective terms as arrays: ``<prefix>coeffs`` and the attribution columns ``<prefix><field>`` of the Boolean
+    (``bool_``) and integer (``int_``) terms
+
+    Returns:
+        dict: {name: np.ndarray}, see ``objective_from_arrays``
+    """
+    arrays = {}
+    for prefix in ('bool_', 'int_'):
+        arrays[prefix + 'coeffs'] = np.asarray(getattr(objective_terms, prefix + 'coeffs'), dtype=np.int64)
+        for field, column in getattr(objective_terms, prefix + 'index').columns().items():
+            arrays[prefix + field] = column
+    return arrays
+
+
+def objective_from_arrays(arrays):
+    """
+    Objective terms holding the coefficients and attribution of ``objective_arrays``, without the variables. Fields
+    missing from arrays written before they were added are -1
+
+    Returns:
+        passeu.utils.objective.ObjectiveTerms: Objective terms
+    """
+    objective_terms = objective.ObjectiveTerms()
+    for prefix in ('bool_', 'int_'):
+        # Coefficients are python integers, as in a built model, so that the reported penalties serialise
+        setattr(objective_terms, prefix + 'coeffs', np.asarray(arrays[prefix + 'coeffs']).tolist())
+        columns = {field: arrays[prefix + field] if prefix + field in arrays
+                   else np.full(len(arrays[prefix + 'coeffs']), -1, dtype=np.int32)
+                   for field in ('group', 'rule') + objective.FIELDS}
+        setattr(objective_terms, prefix + 'index', objective.PenaltyIndex.from_columns(columns))
+    return objective_terms
+
+
+class RosterSolution:
+    """
+    Solution of a roster model extracted in bulk from the solver response into arrays
+
+    Attributes:
+        status (int): Solver status
+        status_name (str): Solver status name
+        objective_value (float): Objective value
+        shifts (np.ndarray): Shift worked by each employee on each day, of shape (num_employees, num_days)
+        hours (np.ndarray): Hours worked by each employee on each day, of shape (num_employees, num_days)
+        bool_penalty_values (np.ndarray): Value of each Boolean objective term
+        int_penalty_values (np.ndarray): Value of each integer objective term
+        roles (np.ndarray): Role filled by each employee on each day, -1 if none, of shape (num_employees, num_days)
+        statistics (dict): Search statistics, see ``solver_statistics``
+    """
+
+    def __init__(self, roster_model, status, objective_value, shifts, hours, bool_penalty_values,
+                 int_penalty_values, roles=None):
+        self.roster_model = roster_model
+        self.status = status
+        self.status_name = STATUS_NAMES[status]
+        self.objective_value = objective_value
+        self.shifts = shifts
+        self.hours = hours
+        self.bool_penalty_values = bool_penalty_values
+        self.int_penalty_values = int_penalty_values
+        self.roles = np.full(shifts.shape, -1, dtype=np.int64) if roles is None else roles
+        self.statistics = {}
+
+    @classmethod
+    def from_solver(cls, roster_model, solver, status):
+        """
+        Extracts the solution of the last solve of ``solver`` on the model of ``roster_model``
+
+        Args:
+            roster_model (passeu.utils.roster_model.RosterModel): Solved roster model
+            solver (cp_model.CpSolver): Solver holding a feasible solution
+            status (int): Status returned by the solve
+
+        Returns:
+            RosterSolution: Solution arrays
+        """
+        from ortools.sat.python import cp_model
+
+        if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+            raise ValueError(f'No solution to extract, solver status is {solver.StatusName(status)}')
+
+        values = np.array(solver.ResponseProto().solution, dtype=np.int64)
+        roster_solution = cls.from_values(roster_model, values, status, solver.ObjectiveValue())
+        roster_solution.statistics = solver_statistics(solver, status)
+        return roster_solution
+
+    @classmethod
+    def from_values(cls, roster_model, values, status, objective_value):
+        """
+        Extracts the solution from the values of all the model variables
+
+        Args:
+            roster_model: Roster model providing ``shop_data``, ``objective`` and the variable ``layout()``, such as
+              ``passeu.utils.roster_model.RosterModel``
+            values (np.ndarray): Value of each model variable, indexed as in the model proto
+            status (int): Solver status
+            objective_value (float): Objective value
+
+        Returns:
+            RosterSolution: Solution arrays
+        """
+        layout = roster_model.layout()
+        shifts = literal_values(values, layout['work']).argmax(axis=1)
+        hours = values[layout['work_hours']]
+        bool_penalty_values = literal_values(values, layout['bool_terms'])
+        int_penalty_values = values[layout['int_terms']]
+        weekly_sum_terms = layout.get('weekly_sum_terms')
+        if weekly_sum_terms is not None and len(weekly_sum_terms):
+            int_penalty_values[weekly_sum_terms[:, 0]] = weekly_sum_violations(roster_model.objective.int_index,
+                                                                               weekly_sum_terms, shifts)
+
+        roles = np.full(shifts.shape, -1, dtype=np.int64)
+        if len(layout.get('role_work', [])):
+            filled = layout['role_keys'][literal_values(values, layout['role_work']) == 1]
+            roles[filled[:, 0], filled[:, 2]] = filled[:, 3]
+
+        return cls(roster_model, status, objective_value, shifts, hours, bool_penalty_values, int_penalty_values,
+                   roles)
+
+    def employee_hours(self):
+        return self.hours.sum(axis=1)
+
+    def penalty_total(self):
+        """
+        Weighted sum of all the objective terms, the objective value of a solve minimising every objective group
+        """
+        obj = self.roster_model.objective
+        return (int(np.dot(self.bool_penalty_values, np.asarray(obj.bool_coeffs, dtype=np.int64)))
+                + int(np.dot(self.int_penalty_values, np.asarray(obj.int_coeffs, dtype=np.int64))))
+
+    def employee_rows(self):
+        """
+        Yields, employee by employee, (employee_id, employee, shifts, hours) with the shift ids and hours worked each
+        day
+        """
+        employees = self.roster_model.shop_data.employee_data.employees
+        for e in range(len(employees)):
+            yield e, employees[e], self.shifts[e].tolist(), self.hours[e].tolist()
+
+    @staticmethod
+    def _penalty_rows(index, values, coefficients):
+        for i in np.flatnonzero(values):
+            value = int(values[i])
+            record = index.record(i)
+            record['value'] = value
+            record['coefficient'] = coefficients[i]
+            record['penalty'] = value * coefficients[i]
+            yield record
+
+    def bool_penalty_rows(self):
+        """
+        Yields the attribution record of each Boolean objective term assigned to true, with its ``value``,
+        ``coefficient`` and ``penalty``
+        """
+        obj = self.roster_model.objective
+        yield from self._penalty_rows(obj.bool_index, self.bool_penalty_values, obj.bool_coeffs)
+
+    def int_penalty_rows(self):
+        """
+        Yields the attribution record of each integer objective term that is not zero, with its ``value``,
+        ``coefficient`` and ``penalty``
+        """
+        obj = self.roster_model.objective
+        yield from self._penalty_rows(obj.int_index, self.int_penalty_values, obj.int_coeffs)
+
+    def penalty_rows(self):
+        """
+        Yields the attribution record of each objective term that is not zero. See ``bool_penalty_rows``
+        """
+        yield from self.bool_penalty_rows()
+        yield from self.int_penalty_rows()
+
+    def penalty_by(self, field):
+        """
+        Total penalty aggregated by an attribution field
+
+        Args:
+            field (str): ``'group'``, ``'rule'`` or one of ``passeu.utils.objective.FIELDS``
+
+        Returns:
+            dict: {key: penalty} where key is the group or rule name, or the field value. Terms that are zero or do
+              not relate to the field are left out
+        """
+        obj = self.roster_model.objective
+        totals = {}
+        for index, values, coefficients in ((obj.bool_index, self.bool_penalty_values, obj.bool_coeffs),
+                                            (obj.int_index, self.int_penalty_values, obj.int_coeffs)):
+            column = index.column(field)
+            costs = values * np.asarray(coefficients, dtype=np.int64)
+            mask = (column >= 0) & (values != 0)
+            keys, inverse = np.unique(column[mask], return_inverse=True)
+            sums = np.bincount(inverse, weights=costs[mask], minlength=len(keys))
+            for key, total in zip(keys.tolist(), sums):
+                totals[key] = totals.get(key, 0) + int(total)
+
+        if field == 'group':
+            return {objective.GROUPS[key]: total for key, total in totals.items()}
+        elif field == 'rule':
+            return {objective.RULES[key]: total for key, total in totals.items()}
+        return totals
@@ -0,0 +1,187 @@
+import collections
+import csv
+import json
+import os
+from passeu.utils.solution import relative_gap
+
+# Fields of the CP-SAT response recorded after each solve
+RESPONSE_FIELDS = ('objective_value', 'best_objective_bound', 'num_booleans', 'num_conflicts', 'num_branches',
+                   'num_binary_propagations', 'num_integer_propagations', 'num_restarts', 'num_lp_iterations',
+                   'wall_time', 'user_time', 'deterministic_time', 'gap_integral')
+
+TIMELINE_HEADER = ['solution', 'wall_time', 'objective', 'best_bound', 'gap']
+SUMMARY_HEADER = ['name', 'status', 'variables', 'constraints', 'objective_terms', 'proto_bytes', 'solutions',
+                  'first_solution_time', 'gap'] + list(RESPONSE_FIELDS)
+
+
+def model_statistics(model):
+    """
+    Size of a cp_model.CpModel: number of variables, of constraints of each type and of objective terms, and size
+    of the serialised proto
+    """
+    proto = model.Proto()
+    constraint_types = collections.Counter(constraint.WhichOneof('constraint') for constraint in proto.constraints)
+    return {'variables': len(proto.variables),
+            'constraints': len(proto.constraints),
+            'constraint_types': dict(sorted(constraint_types.items())),
+            'objective_terms': len(proto.objective.vars),
+            'proto_bytes': proto.ByteSize()}
+
+
+def response_statistics(solver, status):
+    """
+    Search statistics of the last solve of ``solver``, ``RESPONSE_FIELDS`` of its response and the status name
+    """
+    response = solver.ResponseProto()
+    statistics = {'status': solver.StatusName(status)}
+    for field in RESPONSE_FIELDS:
+        statistics[field] = getattr(response, field)
+    return statistics
+
+
+class SolveTelemetry:
+    """
+    Telemetry of the solve of one shop
+
+    Attributes:
+        name (str): Name of the run, e.g. the input file name without extension
+        model (dict): Model size, see ``model_statistics``. Empty if the model was not built
+        response (dict): Final search statistics, see ``response_statistics``
+        timeline (list(tuple)): (wall_time, objective, best_bound) of each improving solution, as recorded by
+          ``passeu.utils.callbacks.ObjectiveTimeline``
+        note (str): Caveat on the recorded figures, e.g. why there is no timeline. ``None`` if there is none
+    """
+
+    def __init__(self, name, model=None, response=None, timeline=None, note=None):
+        self.name = name
+        self.model = model or {}
+        self.response = response or {}
+        self.timeline = list(timeline or [])
+        self.note = note
+
+    def timeline_rows(self):
+        for i, (wall_time, objective, best_bound) in enumerate(self.timeline):
+            yield [i, wall_time, objective, best_bound, relative_gap(objective, best_bound)]
+
+    def summary(self):
+        """
+        Flat record of the run, with the ``SUMMARY_HEADER`` fields
+        """
+        record = {'name': self.name, 'status': self.response.get('status')}
+        for field in ('variables', 'constraints', 'objective_terms', 'proto_bytes'):
+            record[field] = self.model.get(field)
+        record['solutions'] = len(self.timeline)
+        record['first_solution_time'] = self.timeline[0][0] if self.timeline else None
+        record['gap'] = None
+        if 'objective_value' in self.response and record['status'] in ('OPTIMAL', 'FEASIBLE'):
+            record['gap'] = relative_gap(self.response['objective_value'], self.response['best_objective_bound'])
+        for field in RESPONSE_FIELDS:
+            record[field] = self.response.get(field)
+        return record
+
+    def to_dict(self):
+        record = {'name': self.name, 'model': self.model, 'response': self.response,
+                  'timeline': [dict(zip(TIMELINE_HEADER, row)) for row in self.timeline_rows()]}
+        if self.note is not None:
+            record['note'] = self.note
+        return record
+
+    def write(self, directory):
+        """
+        Writes the run to ``<name>_telemetry.json`` and its timeline to ``<name>_timeline.csv`` in ``directory``
+
+        Returns:
+            list(str): Paths of the files written
+        """
+        json_path = os.path.join(directory, f'{self.name}_telemetry.json')
+        with open(json_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+        csv_path = os.path.join(directory, f'{self.name}_timeline.csv')
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(TIMELINE_HEADER)
+            writer.writerows(self.timeline_rows())
+        return [json_path, csv_path]
+
+
+class BatchTelemetry:
+    """
+    Telemetry of the solves of a batch of shops, written per run and aggregated over the batch
+
+    Attributes:
+        runs (list(SolveTelemetry)): Runs in the order they were recorded
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def record(self, name, model=None, solver=None, status=None, timeline=None, statistics=None, note=None):
+        """
+        Records a run
+
+        Args:
+            name (str): Name of the run
+            model (cp_model.CpModel): Solved model, if it was built
+            solver (cp_model.CpSolver): Solver of the final solve, if the model was solved
+            status (int): Status of the final solve
+            timeline (list(tuple)): Improving solutions, see ``SolveTelemetry``
+            statistics (dict): Search statistics used when there is no solver, e.g. of a cached or decomposed solve
+            note (str): Caveat on the recorded figures, see ``SolveTelemetry``
+
+        Returns:
+            SolveTelemetry: Recorded run
+        """
+        if solver is not None:
+            response = response_statistics(solver, status)
+        else:
+            statistics = statistics or {}
+            response = {'status': statistics.get('status'), 'num_conflicts': statistics.get('conflicts'),
+                        'num_branches': statistics.get('branches'), 'wall_time': statistics.get('wall_time'),
+                        'deterministic_time': statistics.get('deterministic_time')}
+        run = SolveTelemetry(name, model_statistics(model) if model is not None else None, response, timeline, note)
+        self.runs.append(run)
+        return run
+
+    def aggregate(self):
+        """
+        Batch totals: number of runs of each status and sums and maxima of the solve times and search effort
+        """
+        summaries = [run.summary() for run in self.runs]
+
+        def values(field):
+            return [summary[field] for summary in summaries if summary[field] is not None]
+
+        return {'runs': len(summaries),
+                'statuses': dict(collections.Counter(summary['status'] for summary in summaries)),
+                'total_wall_time': sum(values('wall_time')),
+                'max_wall_time': max(values('wall_time'), default=None),
+                'total_deterministic_time': sum(values('deterministic_time')),
+                'total_conflicts': sum(values('num_conflicts')),
+                'total_branches': sum(values('num_branches')),
+                'max_gap': max(values('gap'), default=None)}
+
+    def write(self, directory):
+        """
+        Writes every run, see ``SolveTelemetry.write``, a ``telemetry.csv`` summary with one row per run and the
+        ``telemetry.json`` batch aggregate to ``directory``
+
+        Returns:
+            list(str): Paths of the files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for run in self.runs:
+            paths.extend(run.write(directory))
+
+        summary_path = os.path.join(directory, 'telemetry.csv')
+        with open(summary_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, SUMMARY_HEADER)
+            writer.writeheader()
+            for run in self.runs:
+                writer.writerow(run.summary())
+
+        aggregate_path = os.path.join(directory, 'telemetry.json')
+        with open(aggregate_path, 'w') as f:
+            json.dump({'aggregate': self.aggregate(), 'runs': [run.summary() for run in self.runs]}, f, indent=2)
+        return paths + [summary_path, aggregate_path]
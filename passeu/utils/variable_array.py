@@ -0,0 +1,67 @@
+import numpy as np
+from ortools.sat.python import cp_model
+
+
+def new_variables(model, domain, names):
+    """
+    Appends integer variables with the same domain straight to the model proto, without creating a Python variable
+    object for each of them
+
+    Args:
+        model (cp_model.CpModel): Model the variables are added to
+        domain (cp_model.Domain): Domain of the variables
+        names (list(str)): Name of each variable, empty for unnamed variables
+
+    Returns:
+        np.ndarray: Proto indices of the new variables
+    """
+    variables = model.Proto().variables
+    start = len(variables)
+    bounds = domain.FlattenedIntervals()
+    for name in names:
+        variable = variables.add()
+        variable.domain.extend(bounds)
+        if name:
+            variable.name = name
+    return np.arange(start, start + len(names), dtype=np.int64)
+
+
+class VariableArray:
+    """
+    Model variables indexed by tuples of integers, e.g. (employee, shift, day), stored as an array of their proto
+    indices.
+
+    Accessing an item wraps its index into a ``cp_model.IntVar``, which is released with the expression it is used
+    in, so the memory held on the Python side is that of the index array only. It reads as a dictionary of
+    index tuple: variable.
+
+    Args:
+        model (cp_model.CpModel): Model of the variables
+        indices (np.ndarray): Proto index of each variable, of the shape of the item tuples
+    """
+
+    def __init__(self, model, indices):
+        self.proto = model.Proto()
+        self.indices = indices
+
+    def __getitem__(self, key):
+        return cp_model.IntVar(self.proto, int(self.indices[key]), None)
+
+    def __len__(self):
+        return self.indices.size
+
+    def __contains__(self, key):
+        return len(key) == self.indices.ndim and all(0 <= k < n for k, n in zip(key, self.indices.shape))
+
+    def __iter__(self):
+        return np.ndindex(*self.indices.shape)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for index in self.indices.ravel().tolist():
+            yield cp_model.IntVar(self.proto, index, None)
+
+    def items(self):
+        return zip(self.keys(), self.values())